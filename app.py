@@ -6,8 +6,16 @@ if __name__ == "__main__":
         from waitress import serve
         logging.basicConfig(level=logging.DEBUG, format='[%(asctime)s] %(message)s',
             datefmt='%Y-%m-%d %H:%M')
-        serve(app, host=config.HOST, port=config.PORT)
+        serve(app,
+              host=config.HOST,
+              port=config.PORT,
+              threads=config.WAITRESS_THREADS,
+              connection_limit=config.WAITRESS_CONNECTION_LIMIT,
+              backlog=config.WAITRESS_BACKLOG,
+              channel_timeout=config.WAITRESS_CHANNEL_TIMEOUT,
+              asyncore_use_poll=config.WAITRESS_ASYNCORE_USE_POLL,
+              asyncore_loop_timeout=config.WAITRESS_ASYNCORE_LOOP_TIMEOUT)
     else:
         app.run(host=config.HOST,
                 port=config.PORT,
-                debug=config.DEBUG)
\ No newline at end of file
+                debug=config.DEBUG)
@@ -0,0 +1,17 @@
+import os
+
+# Multi-process production mode, an alternative to the single waitress process of app.py:
+#   gunicorn -c gunicorn.conf.py app:app
+# Each worker process imports the app itself (no preload), so the model loader and the other background
+# threads start inside every worker instead of being lost across the fork
+bind = f"{os.getenv('HOST', '0.0.0.0')}:{os.getenv('PORT', 80)}"
+workers = int(os.getenv('GUNICORN_WORKERS', 2))
+worker_class = 'gthread'
+threads = int(os.getenv('GUNICORN_THREADS', 8))
+backlog = int(os.getenv('GUNICORN_BACKLOG', 1024))
+timeout = int(os.getenv('GUNICORN_TIMEOUT', 120))
+keepalive = int(os.getenv('GUNICORN_KEEPALIVE', 5))
+max_requests = int(os.getenv('GUNICORN_MAX_REQUESTS', 0))
+max_requests_jitter = int(os.getenv('GUNICORN_MAX_REQUESTS_JITTER', 0))
+preload_app = False
+accesslog = '-'
@@ -18,5 +18,18 @@ if os.environ["ENVIRONMENT"] == "production":
 
 app.env = config.ENV
 
+# request.remote_addr is the client's address from X-Forwarded-For rather than the proxy's
+if config.TRUSTED_PROXY_COUNT > 0:
+    from werkzeug.middleware.proxy_fix import ProxyFix
+    app.wsgi_app = ProxyFix(app.wsgi_app, x_for=config.TRUSTED_PROXY_COUNT)
+
+from src.middlewares.encoding import init_app as init_encoding
+init_encoding(app)
+
 from src.routes import api
-app.register_blueprint(api, url_prefix="/api/v1")
\ No newline at end of file
+app.register_blueprint(api, url_prefix="/api/v1")
+
+# Starts loading the recommendation model once the app is assembled rather than when a blueprint is imported,
+# so importing the controllers (tests, scripts) never reaches out to MLflow
+from src.services.model_registry import model_registry
+model_registry.start()
@@ -0,0 +1,81 @@
+import os
+
+# Settings shared by every environment, with the defaults of a single development process. DevConfig and
+# ProductionConfig only set what differs
+class BaseConfig:
+    def __init__(self):
+        self.HOST = '0.0.0.0'
+        # waitress: request threads, open connections accepted before refusing, listen backlog, seconds an idle
+        # connection is kept, and poll() instead of select() so more than 1024 sockets can be watched
+        self.WAITRESS_THREADS = int(os.getenv('WAITRESS_THREADS', 4))
+        self.WAITRESS_CONNECTION_LIMIT = int(os.getenv('WAITRESS_CONNECTION_LIMIT', 100))
+        self.WAITRESS_BACKLOG = int(os.getenv('WAITRESS_BACKLOG', 1024))
+        self.WAITRESS_CHANNEL_TIMEOUT = int(os.getenv('WAITRESS_CHANNEL_TIMEOUT', 120))
+        self.WAITRESS_ASYNCORE_USE_POLL = os.getenv('WAITRESS_ASYNCORE_USE_POLL', 'true').lower() == 'true'
+        self.WAITRESS_ASYNCORE_LOOP_TIMEOUT = int(os.getenv('WAITRESS_ASYNCORE_LOOP_TIMEOUT', 1))
+        # JWT signing key, read once at startup
+        self.SECRET_KEY = os.getenv('SECRET_KEY')
+        # Recently verified JWTs kept per process, so repeat requests skip signature verification
+        self.AUTH_CACHE_SIZE = int(os.getenv('AUTH_CACHE_SIZE', 10000))
+        # bcrypt cost factor for new password hashes, existing ones are upgraded on the next login
+        self.BCRYPT_LOG_ROUNDS = int(os.getenv('BCRYPT_LOG_ROUNDS', 12))
+        self.PASSWORD_HASH_WORKERS = int(os.getenv('PASSWORD_HASH_WORKERS', 2))
+        self.PASSWORD_HASH_MAX_PENDING = int(os.getenv('PASSWORD_HASH_MAX_PENDING', 32))
+        # Concurrent login/signup requests allowed per email, and per client IP with AUTH_LIMIT_BY_IP
+        self.AUTH_MAX_CONCURRENT = int(os.getenv('AUTH_MAX_CONCURRENT', 2))
+        # Only turn on once the client address can be trusted. Behind a load balancer that means setting
+        # TRUSTED_PROXY_COUNT, otherwise every client shares the proxy's address (or spoofs its own)
+        self.AUTH_LIMIT_BY_IP = os.getenv('AUTH_LIMIT_BY_IP', 'false').lower() == 'true'
+        # Proxies in front of the app that append to X-Forwarded-For, the client address is taken from the
+        # entry the outermost of them added. 0 when clients connect directly
+        self.TRUSTED_PROXY_COUNT = int(os.getenv('TRUSTED_PROXY_COUNT', 0))
+        # Seconds a user record read for login/update-oura is reused within a worker process
+        self.USER_CACHE_TTL = int(os.getenv('USER_CACHE_TTL', 60))
+        # Also find users stored under random ids, until python -m src.services.users has migrated them
+        self.USERS_LEGACY_LOOKUP = os.getenv('USERS_LEGACY_LOOKUP', 'true').lower() == 'true'
+        self.MLFLOW_TRACKING_URI = os.getenv('MLFLOW_TRACKING_URI', 'https://mlflow.3hv.ethanwu.net')
+        self.MLFLOW_EXPERIMENT = os.getenv('MLFLOW_EXPERIMENT', 'XGBoost')
+        # Directory holding model/ and label_encoder.pkl, skips MLflow entirely when set
+        self.MODEL_DIR = os.getenv('MODEL_DIR')
+        self.MODEL_POLL_INTERVAL = int(os.getenv('MODEL_POLL_INTERVAL', 300))
+        self.MODEL_LOAD_TIMEOUT = float(os.getenv('MODEL_LOAD_TIMEOUT', 30))
+        # Concurrent predictions within INFERENCE_BATCH_WINDOW seconds run as one batch, 0 predicts per request
+        self.INFERENCE_BATCH_WINDOW = float(os.getenv('INFERENCE_BATCH_WINDOW', 0.005))
+        self.INFERENCE_MAX_BATCH_ROWS = int(os.getenv('INFERENCE_MAX_BATCH_ROWS', 4096))
+        # Predict with the XGBoost booster directly instead of through the pyfunc wrapper
+        self.INFERENCE_NATIVE = os.getenv('INFERENCE_NATIVE', 'true').lower() == 'true'
+        # Rescore stored recommendations from older runs in the background when a new production run is swapped in
+        self.RESCORE_ON_SWAP = os.getenv('RESCORE_ON_SWAP', 'true').lower() == 'true'
+        self.RESCORE_BATCH_SIZE = int(os.getenv('RESCORE_BATCH_SIZE', 500))
+        self.FIRESTORE_WRITE_WORKERS = int(os.getenv('FIRESTORE_WRITE_WORKERS', 8))
+        self.FIRESTORE_WRITE_RETRIES = int(os.getenv('FIRESTORE_WRITE_RETRIES', 5))
+        # 'redis' shares job status and per-user locks across worker processes, 'local' keeps them in process
+        self.JOB_BACKEND = os.getenv('JOB_BACKEND', 'local')
+        self.JOB_WORKERS = int(os.getenv('JOB_WORKERS', 4))
+        self.JOB_TTL = int(os.getenv('JOB_TTL', 3600))
+        # Seconds a job lock outlives a worker that died mid-job, running jobs refresh it every third of that
+        self.JOB_LOCK_TTL = int(os.getenv('JOB_LOCK_TTL', 300))
+        self.OURA_POOL_SIZE = int(os.getenv('OURA_POOL_SIZE', 32))
+        self.OURA_CONNECT_TIMEOUT = float(os.getenv('OURA_CONNECT_TIMEOUT', 5))
+        self.OURA_READ_TIMEOUT = float(os.getenv('OURA_READ_TIMEOUT', 30))
+        self.OURA_MAX_RETRIES = int(os.getenv('OURA_MAX_RETRIES', 3))
+        # Requests per second allowed per Oura access token, Oura allows 5000 per 5 minutes
+        self.OURA_RATE_LIMIT = float(os.getenv('OURA_RATE_LIMIT', 16))
+        self.OURA_RATE_BURST = int(os.getenv('OURA_RATE_BURST', 10))
+        # Oura requests in flight at once across the process on the async fetch path
+        self.OURA_ASYNC_CONCURRENCY = int(os.getenv('OURA_ASYNC_CONCURRENCY', 32))
+        self.DISPLAY_CACHE_TTL = int(os.getenv('DISPLAY_CACHE_TTL', 60))
+        # Also collapse display-info rebuilds across worker processes through a Redis lock
+        self.SINGLE_FLIGHT_REDIS = os.getenv('SINGLE_FLIGHT_REDIS', 'false').lower() == 'true'
+        self.SINGLE_FLIGHT_TIMEOUT = float(os.getenv('SINGLE_FLIGHT_TIMEOUT', 30))
+        # Stale-while-revalidate: after DISPLAY_CACHE_TTL, display-info keeps serving the cached records for up to
+        # DISPLAY_CACHE_STALE_TTL more seconds while DISPLAY_REFRESH_WORKERS threads rebuild them
+        self.DISPLAY_CACHE_SWR = os.getenv('DISPLAY_CACHE_SWR', 'true').lower() == 'true'
+        self.DISPLAY_CACHE_STALE_TTL = int(os.getenv('DISPLAY_CACHE_STALE_TTL', 86400))
+        self.DISPLAY_REFRESH_WORKERS = int(os.getenv('DISPLAY_REFRESH_WORKERS', 4))
+        # Display-info only reads stored days, a rebuild queues a background Oura sync when the last one is older than this
+        self.DISPLAY_SYNC_INTERVAL = int(os.getenv('DISPLAY_SYNC_INTERVAL', 900))
+        # After a failed sync the next one waits DISPLAY_SYNC_RETRY seconds, doubling per consecutive failure
+        # up to DISPLAY_SYNC_MAX_BACKOFF
+        self.DISPLAY_SYNC_RETRY = int(os.getenv('DISPLAY_SYNC_RETRY', 60))
+        self.DISPLAY_SYNC_MAX_BACKOFF = int(os.getenv('DISPLAY_SYNC_MAX_BACKOFF', 21600))
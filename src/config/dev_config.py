@@ -1,6 +1,8 @@
-class DevConfig:
+from src.config.base_config import BaseConfig
+
+class DevConfig(BaseConfig):
     def __init__(self):
+        super().__init__()
         self.ENV = 'development'
         self.DEBUG = True
         self.PORT = 8080
-        self.HOST = '0.0.0.0'
\ No newline at end of file
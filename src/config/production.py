@@ -1,6 +1,13 @@
-class ProductionConfig:
+import os
+from src.config.base_config import BaseConfig
+
+class ProductionConfig(BaseConfig):
     def __init__(self):
+        super().__init__()
         self.ENV = 'production'
         self.DEBUG = False
         self.PORT = 80
-        self.HOST = '0.0.0.0'
\ No newline at end of file
+        self.WAITRESS_THREADS = int(os.getenv('WAITRESS_THREADS', 16))
+        # Production runs several worker processes, which share job state and display-info rebuilds through Redis
+        self.JOB_BACKEND = os.getenv('JOB_BACKEND', 'redis')
+        self.SINGLE_FLIGHT_REDIS = os.getenv('SINGLE_FLIGHT_REDIS', 'true').lower() == 'true'
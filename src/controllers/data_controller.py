@@ -1,210 +1,86 @@
-from flask import request, Response, json, Blueprint
-import os
+from flask import request, Response, json, Blueprint, g
 from dotenv import load_dotenv
-import pandas as pd
-from src.db.firestore import db
-from src.db.redis import setDisplayInfo, get
-import jwt
-from src.utils import update_db, delete_email_data, fetch_data, load_label_encoder, default_values
-from datetime import datetime, timedelta
-from concurrent.futures import ThreadPoolExecutor, as_completed
-import zlib
+from src.db.collections import display_info
+from src.services.deletion import delete_user_data, DeletionError
+from src.services.model_registry import model_registry
+from src.services.display import SERIES_COLUMNS, DISPLAY_FIELDS
+from src.services import sync_state
+from src.services.sync import sync_scores
+from src.services.rescoring import rescore
+from src.services.single_flight import SingleFlight
+from src.db.redis import redis_db
+from src import config
+from src.services.jobs import job_queue
+from src.services.display_cache import display_cache
+from src.services.timeseries_codec import decode_record
+from src.middlewares.auth import require_auth
+from datetime import datetime, timezone
 import base64
-import mlflow
-import pickle
-import xgboost as xgb
+import logging
 
 load_dotenv()
 
 data = Blueprint('data', __name__)
-display_info = db.collection('display_info')
-main_raw = db.collection('main_raw')
-activity_raw = db.collection('activity_raw')
-readiness_raw = db.collection('readiness_raw')
-sleep_raw = db.collection('sleep_raw')
-sleep_time_raw = db.collection('sleep_time_raw')
 
+logger = logging.getLogger(__name__)
 
-mlflow.set_tracking_uri("https://mlflow.3hv.ethanwu.net")
-experiment = mlflow.get_experiment_by_name("XGBoost")
-runs = mlflow.search_runs(experiment_ids=[experiment.experiment_id], filter_string="tags.production = 'true'")
-run_id = ""
-for index, row in runs.iterrows():
-    if row["tags.mlflow.runName"] == "Production":
-        run_id = row["run_id"]
+# A new production run rescores the stored recommendations of the previous one in the background. The job is
+# keyed by the run, so with the redis job store the workers swapping to it together share one rescore, and a
+# worker swapping after it finished only reads the rows still scored by another run
+def _rescore_on_swap(previous, run_id):
+    if previous:
+        job_queue.submit('rescore', run_id, rescore)
 
-model_uri = f"runs:/{run_id}/model"
-loaded_model = mlflow.pyfunc.load_model(model_uri)
 
+if config.RESCORE_ON_SWAP:
+    model_registry.on_swap(_rescore_on_swap)
+
+DEFAULT_PAGE_SIZE = 30
+MAX_PAGE_SIZE = 366
+
+display_flight = SingleFlight(redis_db if config.SINGLE_FLIGHT_REDIS else None, wait_timeout=config.SINGLE_FLIGHT_TIMEOUT)
+
+# Queues the Oura sync and returns straight away, poll /jobs/<job_id> for its progress
 @data.route('/update-scores', methods = ['POST'])
+@require_auth
 def update_scores():
     try:
-        full_token = request.headers.get('Authorization')
-        token = full_token.split(" ")[1]
-        decoded = jwt.decode(token, os.getenv('SECRET_KEY'), algorithms='HS256')
+        decoded = g.user
 
         email = decoded.get('email')
         oura_token = decoded.get('oura_token')
 
-        main_url = f"{os.getenv('OURA_API_BASE_URI')}/sleep" 
-        sleep_url = f"{os.getenv('OURA_API_BASE_URI')}/daily_sleep"
-        activity_url = f"{os.getenv('OURA_API_BASE_URI')}/daily_activity"
-        readiness_url = f"{os.getenv('OURA_API_BASE_URI')}/daily_readiness"
-        sleep_time_url = f"{os.getenv('OURA_API_BASE_URI')}/sleep_time"
-
-        # Get latest day in database
-        try:
-            current_latest = display_info.where('email', '==', email).order_by('day', 'DESCENDING').limit(1).get()[0].to_dict()['day']
-        except IndexError:
-            current_latest = '1970-01-01'
-        start_date = (datetime.strptime(current_latest, "%Y-%m-%d") + timedelta(days=1)).strftime("%Y-%m-%d")
-        end_date = (datetime.now() + timedelta(days=1)).strftime("%Y-%m-%d")
-        end_date_activity = (datetime.now() + timedelta(days=1)).strftime("%Y-%m-%d")
-
-        params={ 
-            'start_date': start_date, 
-            'end_date': end_date
-        }
-        activity_params={
-            'start_date':start_date,
-            'end_date': end_date_activity
-        }
-        headers = { 
-        'Authorization': f"Bearer {oura_token}" 
-        }
-
-        # Multithreading queries to Oura
-        with ThreadPoolExecutor() as executor:
-            futures = {
-                executor.submit(fetch_data, main_url, params, headers): 'main',
-                executor.submit(fetch_data, sleep_url, params, headers): 'sleep',
-                executor.submit(fetch_data, activity_url, activity_params, headers): 'activity',
-                executor.submit(fetch_data, readiness_url, params, headers): 'readiness',
-                executor.submit(fetch_data, sleep_time_url, params, headers): 'sleep_time'
-            }
-            responses = {}
-            for future in as_completed(futures):
-                url_type = futures[future]
-                try:
-                    data = future.result()
-                    responses[url_type] = data
-                except Exception as e:
-                    return Response(
-                        response=json.dumps({'message': f"Error getting {url_type} data", 'error': str(e)}),
-                        status=500,
-                        mimetype='application/json'
-                    )
-
-        try:
-            df_main = pd.DataFrame(responses['main']['data'])
-        except KeyError:
+        job, created = job_queue.submit('update-scores', email, sync_scores, email, oura_token)
+
+        return Response(
+            response=json.dumps({'message': "accepted" if created else "sync already in progress", 'job_id': job['id'], 'status': job['status']}),
+            status=202,
+            mimetype='application/json'
+        )
+    except Exception as e:
+        return Response(
+            response= json.dumps({'message': "Error has occurred", 'error': str(e)}),
+            status=500,
+            mimetype='application/json'
+        )
+
+
+@data.route('/jobs/<job_id>', methods = ['GET'])
+@require_auth
+def get_job(job_id):
+    try:
+        decoded = g.user
+
+        job = job_queue.get(job_id)
+        if job is None or job['user'] != decoded.get('email'):
             return Response(
-                response=json.dumps({'message': "Error getting data", 'error': responses['main']}),
-                status=500,
+                response=json.dumps({'message': "Job does not exist"}),
+                status=404,
                 mimetype='application/json'
             )
-        df_sleep = pd.DataFrame(responses['sleep']['data'])
-        df_activity = pd.DataFrame(responses['activity']['data'])
-        df_readiness = pd.DataFrame(responses['readiness']['data'])
-        df_sleep_time = pd.DataFrame(responses['sleep_time']['data'])
-        records = []
-
-        if len(df_main) > 0:
-            # Display info data
-            df = df_main.merge(df_sleep[["contributors", "day", "score"]], on='day', how='left').merge(df_activity.rename({"score":"activity_score"}, axis=1)[["day","activity_score"]], on="day", how="left")
-            if(len(df_sleep_time) > 0):
-                df = df.merge(df_sleep_time[["day", "recommendation", "status"]], on="day", how="left")
-            # Cleaning
-            df['contributors'] = df['contributors'].apply(lambda x: {} if pd.isna(x) else x)
-
-            df.sort_values(by='day', ascending=False, inplace=True)
-
-            # met is a dict, items a list of avg movement level every 60 secs, 1440 per day, breaks database, so we compress
-            for index, row in df_activity.iterrows():
-                items = row['met']['items']
-                items_bytes = str(items).encode('utf-8')
-                compressed = zlib.compress(items_bytes)
-                compressed_base64 = base64.b64encode(compressed).decode('utf-8')
-                df_activity.at[index, 'met']['items'] = compressed_base64
-
-            # Decompression Code
-            # for index, row in df_activity.iterrows():
-            #     compressed_base64 = row['met']['items']
-            #     compressed_bytes = base64.b64decode(compressed_base64)
-            #     decompressed_bytes = zlib.decompress(compressed_bytes)
-            #     decompressed_items = eval(decompressed_bytes.decode('utf-8'))
-            #     df_activity.at[index, 'met']['items'] = decompressed_items
-
-            # Display info, NoneType checks for subscripted dicts
-            for i, row in df.iterrows():
-                records.append({
-                    "day": row["day"],
-                    "sleep_score": row["score"],
-                    "readiness_score": row.get("readiness", {}).get("score") if isinstance(row.get("readiness"), dict) else 0,
-                    "activity_score": row["activity_score"],
-                    "efficiency": row["efficiency"],
-                    "restfulness": row.get("contributors", {}).get("restfulness") if isinstance(row.get("contributors"), dict) else 0,
-                    "total_sleep": row["total_sleep_duration"],
-                    "awake": row["awake_time"],
-                    "rem_sleep": row["rem_sleep_duration"],
-                    "light_sleep": row["light_sleep_duration"],
-                    "deep_sleep": row["deep_sleep_duration"],
-                    "latency": row["latency"],
-                    "bedtime_start": row["bedtime_start"],
-                    "bedtime_end": row["bedtime_end"],
-                    "heart_rate": row.get("heart_rate", {}).get("items") if isinstance(row.get("heart_rate"), dict) else list(),
-                    "average_heart_rate": row["average_heart_rate"],
-                    "hrv": row.get("hrv", {}).get("items") if isinstance(row.get("hrv"), dict) else list(),
-                    "average_hrv": row["average_hrv"],
-                    "type": row["type"],
-                    "oura_recommendation": row.get("recommendation", ""), 
-                    "oura_status": row.get("status", "")
-                })
-
-            df_display = pd.DataFrame(records)
-            
-            
-            df_tmp = df_display.copy(deep=True)
-            df_tmp['day'] = pd.to_datetime(df_tmp['day'], utc=True).dt.normalize()
-            df_tmp['bedtime_start'] = pd.to_datetime(df_tmp['bedtime_start'], utc=True)
-            df_tmp['bedtime_start'] = (df_tmp['bedtime_start'] - df_tmp['day']).dt.total_seconds()
-            df_tmp['bedtime_end'] = pd.to_datetime(df_tmp['bedtime_end'], utc=True)
-            df_tmp['bedtime_end'] = (df_tmp['bedtime_end'] - df_tmp['day']).dt.total_seconds()
-            df_main_predict = df_tmp[["sleep_score", "readiness_score", "activity_score", "efficiency", "restfulness", "total_sleep", "awake", "rem_sleep", "light_sleep", "deep_sleep", "latency", "bedtime_start", "bedtime_end", "average_heart_rate", "average_hrv"]]
-
-            artifact_path = 'label_encoder.pkl'
-            local_path = mlflow.artifacts.download_artifacts(run_id=run_id, artifact_path=artifact_path)
-            label_encoder = load_label_encoder(local_path)
-            recommendations = loaded_model.predict(df_main_predict)
-            recommendation_original = label_encoder.inverse_transform(recommendations)
-
-            df_display["recommendation"] = recommendation_original
-
-            dataframes = [df_display, df_main, df_sleep, df_activity, df_readiness, df_sleep_time]
-            for dataframe in dataframes:
-                dataframe['email'] = email
-                for column in dataframe.columns:
-                        dtype = dataframe[column].dtype
-                        if dtype == 'object' and pd.api.types.is_categorical_dtype(dataframe[column]):
-                            dataframe[column] = dataframe[column].fillna(default_values['object'])
-                            dataframe[column] = dataframe[column].astype('category')
-                        elif dtype == 'object':
-                            dataframe[column] = dataframe[column].fillna(default_values['object'])
-                        else:
-                            dataframe[column] = dataframe[column].fillna(default_values[str(dtype)])
-                            dataframe[column] = dataframe[column].astype(dtype)
-
-            update_db(df_display, display_info)
-            update_db(df_main, main_raw)
-            update_db(df_sleep, sleep_raw)
-            update_db(df_activity, activity_raw)
-            update_db(df_readiness, readiness_raw)
-            update_db(df_sleep_time, sleep_time_raw)
-
-            records = df_display.to_dict(orient='records')
 
         return Response(
-            response=json.dumps({'message': "success", 'data': records}),
+            response=json.dumps({'message': "success", 'data': job}),
             status=200,
             mimetype='application/json'
         )
@@ -216,162 +92,175 @@ def update_scores():
         )
 
 
-# Significantly faster than update-scores, good for quick frontend updating
+# Everything stored for the user, newest first. Recommendations were predicted (and versioned) when the days
+# were synced, so a rebuild neither runs the model nor waits on Oura: days Oura has that are not stored yet
+# arrive through a background sync, whose writes invalidate the cached display-info. The records are only
+# cached if no such write landed while they were read, and the sync is queued after caching them
+def _build_display_info(email, oura_token):
+    generation = display_cache.generation(email)
+
+    records = []
+    display_info_stream = display_info.where('email', '==', email).stream()
+    for doc in display_info_stream:
+        records.append(decode_record(doc.to_dict(), SERIES_COLUMNS))
+
+    records.sort(key=lambda x: x['day'], reverse=True)
+    display_cache.set(email, records, generation=generation)
+    _schedule_sync(email, oura_token)
+    return records
+
+
+def _seconds_since(moment, now):
+    return float('inf') if moment is None else (now - moment).total_seconds()
+
+
+# A sync is due when the last one is older than DISPLAY_SYNC_INTERVAL. After failed attempts the next one also
+# waits DISPLAY_SYNC_RETRY seconds, doubled per consecutive failure up to DISPLAY_SYNC_MAX_BACKOFF
+def _sync_due(state, now):
+    state = state or {}
+    if _seconds_since(state.get('last_synced_at'), now) <= config.DISPLAY_SYNC_INTERVAL:
+        return False
+    failures = state.get('failures') or 0
+    if failures:
+        backoff = min(config.DISPLAY_SYNC_RETRY * 2 ** (failures - 1), config.DISPLAY_SYNC_MAX_BACKOFF)
+        return _seconds_since(state.get('last_failed_at'), now) > backoff
+    return True
+
+
+# Queues a sync when one is due, at most one per user at a time. Tokens without an Oura token have nothing to sync
+def _schedule_sync(email, oura_token):
+    if not oura_token:
+        return
+    if _sync_due(sync_state.get_state(email), datetime.now(timezone.utc)):
+        job_queue.submit('update-scores', email, sync_scores, email, oura_token)
+
+
+class BadRequest(Exception):
+    pass
+
+
+def _parse_day(value, name):
+    if value is None:
+        return None
+    try:
+        return datetime.strptime(value, "%Y-%m-%d").strftime("%Y-%m-%d")
+    except ValueError:
+        raise BadRequest(f"{name} must be a YYYY-MM-DD date")
+
+
+# Cursors carry the (day, document id) of the last record of a page, the position to continue after
+def _encode_cursor(doc):
+    position = json.dumps([doc.get('day'), doc.id])
+    return base64.urlsafe_b64encode(position.encode('utf-8')).decode('utf-8')
+
+
+def _decode_cursor(cursor):
+    try:
+        day, doc_id = json.loads(base64.urlsafe_b64decode(cursor.encode('utf-8')).decode('utf-8'))
+    except Exception:
+        raise BadRequest("cursor is invalid")
+    if not isinstance(day, str) or not isinstance(doc_id, str) or not doc_id or '/' in doc_id:
+        raise BadRequest("cursor is invalid")
+    return _parse_day(day, 'cursor'), doc_id
+
+
+# One page of stored display_info, newest first, served by an (email, day desc) indexed query.
+# fields= projects the documents server side, e.g. to leave out the heart_rate/hrv series
+def _query_display_info(email, args):
+    start = _parse_day(args.get('start'), 'start')
+    end = _parse_day(args.get('end'), 'end')
+    try:
+        limit = min(int(args.get('limit', DEFAULT_PAGE_SIZE)), MAX_PAGE_SIZE)
+    except ValueError:
+        raise BadRequest("limit must be an integer")
+    if limit < 1:
+        raise BadRequest("limit must be positive")
+
+    query = display_info.where('email', '==', email)
+    if start:
+        query = query.where('day', '>=', start)
+    if end:
+        query = query.where('day', '<=', end)
+    # Document id breaks ties between periods of the same day, so cursors are exact
+    query = query.order_by('day', 'DESCENDING').order_by('__name__', 'DESCENDING')
+
+    if args.get('fields'):
+        fields = [field.strip() for field in args['fields'].split(',') if field.strip()]
+        unknown = [field for field in fields if field not in DISPLAY_FIELDS]
+        if unknown:
+            raise BadRequest(f"Unknown fields: {', '.join(unknown)}")
+        query = query.select(sorted(set(fields) | {'day'}))
+
+    # Only a position within the user's own query, no document is read for it
+    if args.get('cursor'):
+        day, doc_id = _decode_cursor(args['cursor'])
+        query = query.start_after({'day': day, '__name__': display_info.document(doc_id)})
+
+    docs = list(query.limit(limit + 1).stream())
+    next_cursor = _encode_cursor(docs[limit - 1]) if len(docs) > limit else None
+    records = [decode_record(doc.to_dict(), SERIES_COLUMNS) for doc in docs[:limit]]
+    return records, next_cursor
+
+
+# Significantly faster than update-scores, good for quick frontend updating.
+# With start, end, limit, cursor or fields it returns one page of stored days instead of the full history.
+# Either way a background sync is queued when one is due
 @data.route('/display-info', methods = ['GET'])
+@require_auth
 def get_display_info():
     try:
-        full_token = request.headers.get('Authorization')
-        token = full_token.split(" ")[1]
-        decoded = jwt.decode(token, os.getenv('SECRET_KEY'), algorithms='HS256')
+        decoded = g.user
 
         email = decoded.get('email')
         oura_token = decoded.get('oura_token')
 
-        redis_data = get(token)
+        if any(param in request.args for param in ('start', 'end', 'limit', 'cursor', 'fields')):
+            records, next_cursor = _query_display_info(email, request.args)
+            _schedule_sync(email, oura_token)
+            return Response(
+                response=json.dumps({'message': "success", 'data': records, 'next_cursor': next_cursor}),
+                status=200,
+                mimetype='application/json'
+            )
+
+        redis_data, age, fresh = display_cache.lookup(email)
 
         if(redis_data == None):
-            print("Cache Miss")
-            main_url = f"{os.getenv('OURA_API_BASE_URI')}/sleep" 
-            sleep_url = f"{os.getenv('OURA_API_BASE_URI')}/daily_sleep"
-            activity_url = f"{os.getenv('OURA_API_BASE_URI')}/daily_activity"
-
-            # Get latest day in database
-            try:
-                current_latest = display_info.where('email', '==', email).order_by('day', 'DESCENDING').limit(1).get()[0].to_dict()['day']
-            except IndexError:
-                current_latest = '1970-01-01'
-            start_date = (datetime.strptime(current_latest, "%Y-%m-%d") + timedelta(days=1)).strftime("%Y-%m-%d")
-            end_date = (datetime.now() + timedelta(days=1)).strftime("%Y-%m-%d")
-            end_date_activity = (datetime.now() + timedelta(days=1)).strftime("%Y-%m-%d")
-
-            params={ 
-                'start_date': start_date, 
-                'end_date': end_date
-            }
-            activity_params={
-                'start_date':start_date,
-                'end_date': end_date_activity
-            }
-            headers = { 
-            'Authorization': f"Bearer {oura_token}" 
-            }
-
-            # Multithreading queries to Oura
-            with ThreadPoolExecutor() as executor:
-                futures = {
-                    executor.submit(fetch_data, main_url, params, headers): 'main',
-                    executor.submit(fetch_data, sleep_url, params, headers): 'sleep',
-                    executor.submit(fetch_data, activity_url, activity_params, headers): 'activity',
-                }
-                responses = {}
-                for future in as_completed(futures):
-                    url_type = futures[future]
-                    try:
-                        data = future.result()
-                        responses[url_type] = data
-                    except Exception as e:
-                        return Response(
-                            response=json.dumps({'message': f"Error getting {url_type} data", 'error': str(e)}),
-                            status=500,
-                            mimetype='application/json'
-                        )
-
-            try:
-                df_main = pd.DataFrame(responses['main']['data'])
-            except KeyError:
-                return Response(
-                    response=json.dumps({'message': "Error getting data", 'error': responses['main']}),
-                    status=500,
-                    mimetype='application/json'
-                )
-            df_sleep = pd.DataFrame(responses['sleep']['data'])
-            df_activity = pd.DataFrame(responses['activity']['data'])
-            records = []
-
-            if len(df_main) > 0 and len(df_sleep) > 0 and len(df_activity) > 0:
-            # if len(df_main) > 0:
-                # Display info data
-                df = df_main.merge(df_sleep[["contributors", "day", "score"]], on='day', how='left').merge(df_activity.rename({"score":"activity_score"}, axis=1)[["day","activity_score"]], on="day", how="left")
-
-                df['contributors'] = df['contributors'].apply(lambda x: {} if pd.isna(x) else x)
-
-                df.sort_values(by='day', ascending=False, inplace=True)
-
-                # Display info, NoneType checks for subscripted dicts
-                for i, row in df.iterrows():
-                    records.append({
-                        "day": row["day"],
-                        "sleep_score": row["score"],
-                        "readiness_score": row.get("readiness", {}).get("score") if isinstance(row.get("readiness"), dict) else 0,
-                        "activity_score": row["activity_score"],
-                        "efficiency": row["efficiency"],
-                        "restfulness": row.get("contributors", {}).get("restfulness") if isinstance(row.get("contributors"), dict) else 0,
-                        "total_sleep": row["total_sleep_duration"],
-                        "awake": row["awake_time"],
-                        "rem_sleep": row["rem_sleep_duration"],
-                        "light_sleep": row["light_sleep_duration"],
-                        "deep_sleep": row["deep_sleep_duration"],
-                        "latency": row["latency"],
-                        "bedtime_start": row["bedtime_start"],
-                        "bedtime_end": row["bedtime_end"],
-                        "heart_rate": row.get("heart_rate", {}).get("items") if isinstance(row.get("heart_rate"), dict) else list(),
-                        "average_heart_rate": row["average_heart_rate"],
-                        "hrv": row.get("hrv", {}).get("items") if isinstance(row.get("hrv"), dict) else list(),
-                        "average_hrv": row["average_hrv"],
-                        "type": row["type"],
-                        "oura_recommendation": row.get("recommendation", ""), 
-                        "oura_status": row.get("status", ""),
-                    })
-            
-                df_display = pd.DataFrame(records)
-                df_tmp = df_display.copy(deep=True)
-                df_tmp['day'] = pd.to_datetime(df_tmp['day'], utc=True).dt.normalize()
-                df_tmp['bedtime_start'] = pd.to_datetime(df_tmp['bedtime_start'], utc=True)
-                df_tmp['bedtime_start'] = (df_tmp['bedtime_start'] - df_tmp['day']).dt.total_seconds()
-                df_tmp['bedtime_end'] = pd.to_datetime(df_tmp['bedtime_end'], utc=True)
-                df_tmp['bedtime_end'] = (df_tmp['bedtime_end'] - df_tmp['day']).dt.total_seconds()
-                df_main_predict = df_tmp[["sleep_score", "readiness_score", "activity_score", "efficiency", "restfulness", "total_sleep", "awake", "rem_sleep", "light_sleep", "deep_sleep", "latency", "bedtime_start", "bedtime_end", "average_heart_rate", "average_hrv"]]
-
-                artifact_path = 'label_encoder.pkl'
-                local_path = mlflow.artifacts.download_artifacts(run_id=run_id, artifact_path=artifact_path)
-                label_encoder = load_label_encoder(local_path)
-                recommendations = loaded_model.predict(df_main_predict)
-                recommendation_original = label_encoder.inverse_transform(recommendations)
-
-                df_display["recommendation"] = recommendation_original
-
-                for column in df_display.columns:
-                    dtype = df_display[column].dtype
-                    if dtype == 'object' and pd.api.types.is_categorical_dtype(df_display[column]):
-                        df_display[column] = df_display[column].fillna(default_values['object'])
-                        df_display[column] = df_display[column].astype('category')
-                    elif dtype == 'object':
-                        df_display[column] = df_display[column].fillna(default_values['object'])
-                    else:
-                        df_display[column] = df_display[column].fillna(default_values[str(dtype)])
-                        df_display[column] = df_display[column].astype(dtype)
-
-                records = df_display.to_dict(orient='records')
-
-            display_info_stream = display_info.where('email', '==', email).stream()
-            for doc in display_info_stream:
-                records.append(doc.to_dict())
-
-            records.sort(key=lambda x: x['day'], reverse=True)
-            setDisplayInfo(token, records)
+            logger.debug("Display cache miss")
+            # Concurrent misses for the same user share one rebuild
+            records = display_flight.do(email, lambda: _build_display_info(email, oura_token),
+                                        lookup=lambda: display_cache.peek(email))
 
             return Response(
                 response=json.dumps({'message': "success", 'data': records}),
                 status=200,
-                mimetype='application/json'
+                mimetype='application/json',
+                headers={'X-Cache': "MISS", 'Age': "0"}
+            )
+        elif not fresh:
+            logger.debug("Display cache stale")
+            # Serve the stale copy now and rebuild it in the background
+            display_cache.revalidate(email, lambda: display_flight.do(email, lambda: _build_display_info(email, oura_token)))
+            return Response(
+                response=json.dumps({'message': "success", 'data': redis_data}),
+                status=200,
+                mimetype='application/json',
+                headers={'X-Cache': "STALE", 'Age': str(int(age)), 'Warning': '110 - "Response is Stale"'}
             )
         else:
-            print("Cache Hit")
+            logger.debug("Display cache hit")
             return Response(
                 response=json.dumps({'message': "success", 'data': redis_data}),
                 status=200,
-                mimetype='application/json'
+                mimetype='application/json',
+                headers={'X-Cache': "HIT", 'Age': str(int(age))}
             )
+    except BadRequest as e:
+        return Response(
+            response=json.dumps({'message': str(e)}),
+            status=400,
+            mimetype='application/json'
+        )
     except Exception as e:
         return Response(
             response= json.dumps({'message': "Error has occurred", 'error': str(e)}),
@@ -381,26 +270,26 @@ def get_display_info():
 
         
 @data.route('/remove-data', methods = ['DELETE'])
+@require_auth
 def remove_data():
     try:
-        full_token = request.headers.get('Authorization')
-        token = full_token.split(" ")[1]
-        decoded = jwt.decode(token, os.getenv('SECRET_KEY'), algorithms='HS256')
+        decoded = g.user
 
         email = decoded.get('email')
-        
-        collections = [display_info, main_raw, activity_raw, readiness_raw, sleep_raw, sleep_time_raw]
 
-        # Multithreading deletion on all collections simultaneously
-        with ThreadPoolExecutor() as executor:
-            futures = [executor.submit(delete_email_data, collection, email) for collection in collections]
-            for future in futures:
-                future.result()
+        # Deletes from all collections simultaneously, report has per-collection counts and timings
+        report = delete_user_data(email)
         return Response(
-            response=json.dumps({'message': "success", 'data': 'Successfully deleted associated email data.'}),
+            response=json.dumps({'message': "success", 'data': 'Successfully deleted associated email data.', 'report': report}),
             status=200,
             mimetype='application/json'
         )
+    except DeletionError as e:
+        return Response(
+            response=json.dumps({'message': e.message, 'report': e.report}),
+            status=500,
+            mimetype='application/json'
+        )
     except Exception as e:
         return Response(
             response= json.dumps({'message': "Error has occurred", 'error': str(e)}),
@@ -0,0 +1,52 @@
+from flask import Blueprint, Response, json
+from src.services.model_registry import model_registry
+from src.services.inference import batch_predictor
+from src.services.features import timestamp_cache
+from src.utils import batch_writer
+from src.services.oura_client import oura_client
+from src.services.oura_async import oura_fetcher
+from src.services.display_cache import display_cache
+from src.controllers.data_controller import display_flight
+from src.middlewares.auth import token_verifier
+from src.services.passwords import password_hasher, auth_limiter
+from src.services.users import user_cache
+
+health = Blueprint('health', __name__)
+
+@health.route("/live", methods=["GET"])
+def live():
+    return Response(
+        response=json.dumps({'message': "ok"}),
+        status=200,
+        mimetype='application/json'
+    )
+
+# Reports 503 until the recommendation model has loaded, for load balancer readiness probes
+@health.route("/ready", methods=["GET"])
+def ready():
+    return Response(
+        response=json.dumps({'message': "ready" if model_registry.ready else "loading", 'model': model_registry.stats()}),
+        status=200 if model_registry.ready else 503,
+        mimetype='application/json'
+    )
+
+@health.route("/metrics", methods=["GET"])
+def metrics():
+    return Response(
+        response=json.dumps({
+            'model': model_registry.stats(),
+            'inference': batch_predictor.stats(),
+            'timestamp_cache': timestamp_cache.stats(),
+            'firestore_writes': batch_writer.stats(),
+            'oura': oura_client.stats(),
+            'oura_async': oura_fetcher.stats(),
+            'display_cache': display_cache.stats(),
+            'display_single_flight': display_flight.stats(),
+            'auth': token_verifier.stats(),
+            'passwords': password_hasher.stats(),
+            'auth_limiter': auth_limiter.stats(),
+            'user_cache': user_cache.stats(),
+        }),
+        status=200,
+        mimetype='application/json'
+    )
@@ -1,31 +1,68 @@
 from datetime import datetime, timezone
 from dotenv import load_dotenv
-from flask import request, Response, json, Blueprint
-from flask_bcrypt import Bcrypt
+from flask import request, Response, json, Blueprint, g
+from functools import wraps
 import jwt
+import logging
 import os
-import requests
 from requests.auth import HTTPBasicAuth
 import time
 from src.models.user_model import UserModel
-from src.db.firestore import db
+from src.services.oura_client import oura_client
+from src.middlewares.auth import require_auth
+from src.services.passwords import password_hasher, auth_limiter, TooManyRequests
+from src.services.users import find_user, create_user, update_user, UserExists
+from src import config
 
 load_dotenv()
 
-bcrypt = Bcrypt()
+logger = logging.getLogger(__name__)
+
 users = Blueprint('users', __name__)
-users_ref = db.collection('users')
+
+
+def _too_many(e):
+    return Response(
+        response=json.dumps({'message': str(e)}),
+        status=429,
+        mimetype='application/json'
+    )
+
+
+# At most AUTH_MAX_CONCURRENT logins/signups in flight per email, and per client IP when AUTH_LIMIT_BY_IP is
+# set, 429 beyond that
+def auth_limited(fn):
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+        data = request.get_json(silent=True)
+        email = data.get('email') if isinstance(data, dict) else None
+        ip = f"ip:{request.remote_addr}" if config.AUTH_LIMIT_BY_IP else None
+        try:
+            with auth_limiter.limit(ip, f"email:{str(email).strip().lower()}" if email else None):
+                return fn(*args, **kwargs)
+        except TooManyRequests as e:
+            return _too_many(e)
+    return wrapper
+
 
 @users.route("/login", methods = ["POST"])
+@auth_limited
 def handle_login():
     try:
         data = request.json
         required_fields = ['email', 'password']
         if all(field in data for field in required_fields):
-            user = users_ref.where('email', '==', data['email']).limit(1).get()
-            if user:
-                user_obj = user[0].to_dict()
-                if bcrypt.check_password_hash(user_obj.get('password'), data['password']):
+            user_ref, user_obj = find_user(data['email'])
+            if user_ref is not None:
+                if password_hasher.check(user_obj.get('password'), data['password']):
+                    # Stored with an older cost factor, upgrade it now that the plain password is at hand
+                    try:
+                        new_hash = password_hasher.rehash(user_obj.get('password'), data['password'])
+                        if new_hash:
+                            update_user(data['email'], {'password': new_hash})
+                    except Exception as e:
+                        logger.warning(f"Password rehash failed: {e}")
+
                     payload = {
                         'iat': datetime.now(timezone.utc),
                         'exp': time.time() + 86400,
@@ -36,7 +73,7 @@ def handle_login():
                         'oura_refresh': user_obj.get('ouraRefresh')
                     }
 
-                    token = jwt.encode(payload, os.getenv('SECRET_KEY'), algorithm='HS256')
+                    token = jwt.encode(payload, config.SECRET_KEY, algorithm='HS256')
 
                     return Response(
                         response=json.dumps({'message': "User Sign In Successful", 'token': token}),
@@ -61,6 +98,8 @@ def handle_login():
                 status=400,
                 mimetype='application/json'
             )
+    except TooManyRequests as e:
+        return _too_many(e)
     except Exception as e:
         return Response(
             response= json.dumps({'message': "Error has occurred", 'error': str(e)}),
@@ -69,19 +108,20 @@ def handle_login():
         )
 
 @users.route('/signup', methods = ["POST"])
+@auth_limited
 def handle_signup():
     try:
         data = request.json
         required_fields = ['email', 'firstName', 'lastName', 'password']
         if all(field in data for field in required_fields):
-            user = users_ref.where('email', '==', data['email']).limit(1).get()
-            if not user:
+            user_ref, _ = find_user(data['email'])
+            if user_ref is None:
                 user_obj = UserModel(email=data['email'],
                                      first_name=data['firstName'],
                                      last_name=data['lastName'],
-                                     password=bcrypt.generate_password_hash(data['password']).decode('utf-8'))
-                
-                users_ref.add(user_obj.to_dict())
+                                     password=password_hasher.hash(data['password']))
+
+                create_user(user_obj.to_dict())
 
                 payload = {
                     'iat': datetime.now(timezone.utc),
@@ -93,7 +133,7 @@ def handle_signup():
                     'oura_refresh': user_obj.oura_refresh
                 }
                 
-                token = jwt.encode(payload, os.getenv('SECRET_KEY'), algorithm='HS256')
+                token = jwt.encode(payload, config.SECRET_KEY, algorithm='HS256')
 
                 return Response(
                     response=json.dumps({'message': "User Sign Up Successful", 'token': token}),
@@ -112,6 +152,14 @@ def handle_signup():
                 status=400,
                 mimetype='application/json'
             )
+    except UserExists:
+        return Response(
+            response=json.dumps({'message': "User already exists."}),
+            status=409,
+            mimetype='application/json'
+        )
+    except TooManyRequests as e:
+        return _too_many(e)
     except Exception as e:
         return  Response(
             response= json.dumps({'message': "Error has occurred", 'error': str(e)}),
@@ -120,29 +168,18 @@ def handle_signup():
         )
 
 @users.route('/update-oura', methods = ["PATCH"])
+@require_auth
 def update_oura():
     try:
         data = request.json
 
-        full_token = request.headers.get('Authorization')
-        token = full_token.split(" ")[1]
-        decoded = jwt.decode(token, os.getenv('SECRET_KEY'), algorithms='HS256')
+        decoded = g.user
 
-        if(time.time() > decoded.get('exp')):
-            return Response(
-                response=json.dumps({'message': "Token has expired"}),
-                status=401,
-                mimetype='application/json'
-            )
-        
         required_fields = ['ouraToken', 'ouraRefresh']
         if all(field in data for field in required_fields):
-            user = users_ref.where('email', '==', decoded.get("email")).limit(1).get()
+            new_user_obj = update_user(decoded.get("email"), {'ouraToken': data['ouraToken'], 'ouraRefresh': data['ouraRefresh']})
 
-            if user:
-                user_doc_ref = users_ref.document(user[0].id)
-                user_doc_ref.update({'ouraToken': data['ouraToken'], 'ouraRefresh': data['ouraRefresh']})
-                new_user_obj = user_doc_ref.get().to_dict()
+            if new_user_obj is not None:
 
                 payload = {
                     'iat': datetime.now(timezone.utc),
@@ -154,7 +191,7 @@ def update_oura():
                     'oura_refresh': new_user_obj.get('ouraRefresh')
                 }
 
-                token = jwt.encode(payload, os.getenv('SECRET_KEY'), algorithm='HS256')
+                token = jwt.encode(payload, config.SECRET_KEY, algorithm='HS256')
 
                 return Response(
                     response=json.dumps({'message': "User Oura Tokens Updated", 'token': token}),
@@ -189,7 +226,7 @@ def get_token():
         required_fields = ['code', 'redirectUrl']
         if all(field in data for field in required_fields):
             url = f"https://api.ouraring.com/oauth/token?grant_type=authorization_code&code={data['code']}&redirect_uri={data['redirectUrl']}"
-            resp = requests.post(url, auth=HTTPBasicAuth(os.getenv('CLIENT_ID'), os.getenv('CLIENT_SECRET')))
+            resp = oura_client.post(url, auth=HTTPBasicAuth(os.getenv('CLIENT_ID'), os.getenv('CLIENT_SECRET')))
             return Response(
                 response=json.dumps(resp.json()),
                 status=resp.status_code,
@@ -215,7 +252,7 @@ def refresh_token():
         required_fields = ['refreshToken']
         if all(field in data for field in required_fields):
             url = f"https://api.ouraring.com/oauth/token?grant_type=refresh_token&refresh_token={data['refreshToken']}"
-            resp = requests.post(url, auth=HTTPBasicAuth(os.getenv('CLIENT_ID'), os.getenv('CLIENT_SECRET')))
+            resp = oura_client.post(url, auth=HTTPBasicAuth(os.getenv('CLIENT_ID'), os.getenv('CLIENT_SECRET')))
             return Response(
                 response=json.dumps(resp.json()),
                 status=resp.status_code,
@@ -0,0 +1,8 @@
+from src.db.firestore import db
+
+display_info = db.collection('display_info')
+main_raw = db.collection('main_raw')
+activity_raw = db.collection('activity_raw')
+readiness_raw = db.collection('readiness_raw')
+sleep_raw = db.collection('sleep_raw')
+sleep_time_raw = db.collection('sleep_time_raw')
@@ -0,0 +1,89 @@
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+import jwt
+from flask import request, g, Response, json
+from src import config
+
+
+# Verifies JWTs with the secret loaded once at startup and remembers recently verified tokens, so a client
+# polling with the same token skips the HMAC and JSON decoding. A cached token is only served until its exp
+class TokenVerifier:
+    def __init__(self, secret, algorithms=('HS256',), cache_size=10000):
+        self.secret = secret
+        self.algorithms = list(algorithms)
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.rejected = 0
+
+    # Returns the decoded claims, raises jwt.ExpiredSignatureError or jwt.InvalidTokenError
+    def verify(self, token):
+        now = time.time()
+        with self._lock:
+            entry = self._cache.get(token)
+            if entry is not None:
+                claims, expires = entry
+                if expires is None or expires > now:
+                    self._cache.move_to_end(token)
+                    self.hits += 1
+                    return claims
+                del self._cache[token]
+            self.misses += 1
+
+        try:
+            claims = jwt.decode(token, self.secret, algorithms=self.algorithms)
+        except jwt.InvalidTokenError:
+            with self._lock:
+                self.rejected += 1
+            raise
+
+        with self._lock:
+            self._cache[token] = (claims, claims.get('exp'))
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return claims
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'cached': len(self._cache),
+                'hits': self.hits,
+                'misses': self.misses,
+                'rejected': self.rejected,
+                'hit_ratio': self.hits / lookups if lookups else 0.0,
+            }
+
+
+token_verifier = TokenVerifier(config.SECRET_KEY, cache_size=config.AUTH_CACHE_SIZE)
+
+
+def _unauthorized(message):
+    return Response(
+        response=json.dumps({'message': message}),
+        status=401,
+        mimetype='application/json'
+    )
+
+
+# Verifies the Authorization header before the handler runs and puts the claims in g.user,
+# answering 401 for a missing, malformed, invalid or expired token
+def require_auth(fn):
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+        parts = (request.headers.get('Authorization') or '').split(" ")
+        if len(parts) != 2 or not parts[1]:
+            return _unauthorized("Authorization header is missing")
+        try:
+            g.user = token_verifier.verify(parts[1])
+        except jwt.ExpiredSignatureError:
+            return _unauthorized("Token has expired")
+        except jwt.InvalidTokenError:
+            return _unauthorized("Token is invalid")
+        return fn(*args, **kwargs)
+    return wrapper
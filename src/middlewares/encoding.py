@@ -0,0 +1,143 @@
+import gzip
+import orjson
+from flask import g, has_request_context, request
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+MSGPACK_MIMETYPES = ('application/msgpack', 'application/x-msgpack')
+MIN_COMPRESS_SIZE = 1024
+GZIP_LEVEL = 5
+BROTLI_QUALITY = 4
+
+
+# flask.json.dumps goes through app.json, so every existing json.dumps(...) response body is
+# serialized by orjson. NaN becomes null instead of invalid JSON, numpy values serialize natively.
+# When the request asks for another layout, the dumped objects are kept so the body can be rebuilt from them
+class OrjsonProvider(DefaultJSONProvider):
+    options = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+    def dumps(self, obj, **kwargs):
+        body = orjson.dumps(obj, default=self.default, option=self.options)
+        if has_request_context() and _wants_transcode():
+            g.setdefault('_json_payloads', []).append((body, obj))
+        return body.decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+
+# {'data': [{...}, {...}]} -> {'data': {'day': [...], 'sleep_score': [...]}}, keys repeated once instead of per row
+def to_columnar(payload):
+    rows = payload.get('data') if isinstance(payload, dict) else None
+    if not isinstance(rows, list) or not all(isinstance(row, dict) for row in rows):
+        return payload
+    columns = {}
+    for row in rows:
+        for key in row:
+            columns.setdefault(key, None)
+    payload = dict(payload)
+    payload['data'] = {key: [row.get(key) for row in rows] for key in columns}
+    return payload
+
+
+def _wants_msgpack():
+    if msgpack is None:
+        return False
+    return request.accept_mimetypes.best_match(('application/json',) + MSGPACK_MIMETYPES) in MSGPACK_MIMETYPES
+
+
+def _wants_columnar():
+    return request.args.get('layout') == 'columnar'
+
+
+def _wants_transcode():
+    return _wants_columnar() or _wants_msgpack()
+
+
+# Values MessagePack has no type for (numpy scalars and arrays, dates) are packed as their JSON form
+def _msgpack_default(obj):
+    return orjson.loads(orjson.dumps(obj, default=OrjsonProvider.default, option=OrjsonProvider.options))
+
+
+def _null_if_nan(value):
+    return None if isinstance(value, float) and value != value else value
+
+
+# MessagePack can carry NaN where the JSON body has null. Nulls it in the payload's own fields and in each
+# record's, where display-info has its missing scores (series items already hold None for their gaps)
+def _nan_to_null(payload):
+    if not isinstance(payload, dict):
+        return payload
+    payload = {key: _null_if_nan(value) for key, value in payload.items()}
+    rows = payload.get('data')
+    if isinstance(rows, list):
+        payload['data'] = [{key: _null_if_nan(value) for key, value in row.items()} if isinstance(row, dict) else row
+                           for row in rows]
+    return payload
+
+
+# The object json.dumps serialized into this body, only parsed back when the body was built some other way
+def _payload(body):
+    for dumped, obj in g.get('_json_payloads', ()):
+        if dumped == body:
+            return obj
+    return orjson.loads(body)
+
+
+def _transcode(response):
+    columnar = _wants_columnar()
+    wants_msgpack = _wants_msgpack()
+    if not (columnar or wants_msgpack):
+        return
+    payload = _payload(response.get_data())
+    if wants_msgpack:
+        payload = _nan_to_null(payload)
+    if columnar:
+        payload = to_columnar(payload)
+    if wants_msgpack:
+        response.set_data(msgpack.packb(payload, default=_msgpack_default, use_bin_type=True))
+        response.mimetype = 'application/msgpack'
+    else:
+        response.set_data(orjson.dumps(payload, default=OrjsonProvider.default, option=OrjsonProvider.options))
+    response.vary.add('Accept')
+
+
+def _compress(response):
+    if response.content_encoding or response.direct_passthrough:
+        return
+    if len(response.get_data()) < MIN_COMPRESS_SIZE:
+        return
+    encoding = request.accept_encodings.best_match(['br', 'gzip'] if brotli is not None else ['gzip'])
+    if encoding == 'br':
+        response.set_data(brotli.compress(response.get_data(), quality=BROTLI_QUALITY))
+        response.content_encoding = 'br'
+    elif encoding == 'gzip':
+        response.set_data(gzip.compress(response.get_data(), compresslevel=GZIP_LEVEL))
+        response.content_encoding = 'gzip'
+    else:
+        return
+    response.vary.add('Accept-Encoding')
+
+
+def encode_response(response):
+    if response.status_code < 200 or response.status_code in (204, 304) or response.mimetype != 'application/json':
+        return response
+    _transcode(response)
+    _compress(response)
+    return response
+
+
+# Serializes JSON with orjson, converts to columnar or MessagePack bodies on request
+# (?layout=columnar, Accept: application/msgpack) and gzip/brotli compresses per Accept-Encoding
+def init_app(app):
+    app.json = OrjsonProvider(app)
+    app.after_request(encode_response)
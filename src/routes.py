@@ -1,6 +1,7 @@
 from flask import Blueprint
 from src.controllers.data_controller import data
 from src.controllers.hello import hello
+from src.controllers.health import health
 from src.controllers.user_controller import users
 
 api = Blueprint('api', __name__)
@@ -9,4 +10,6 @@ api.register_blueprint(data, url_prefix="/data")
 
 api.register_blueprint(hello, url_prefix="/hello")
 
-api.register_blueprint(users, url_prefix="/users")
\ No newline at end of file
+api.register_blueprint(users, url_prefix="/users")
+
+api.register_blueprint(health, url_prefix="/health")
\ No newline at end of file
@@ -0,0 +1,135 @@
+import datetime
+import logging
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from google.api_core import exceptions
+
+logger = logging.getLogger(__name__)
+
+# Firestore allows a maximum of 500 operations and a 10 MiB request per batch, keep headroom on the size
+MAX_BATCH_OPERATIONS = 500
+MAX_BATCH_BYTES = 9 * 1024 * 1024
+
+RETRYABLE = (exceptions.Aborted, exceptions.DeadlineExceeded, exceptions.ServiceUnavailable,
+             exceptions.ResourceExhausted, exceptions.InternalServerError)
+
+
+# Approximates Firestore's storage size rules for a field value
+def estimate_size(value):
+    if value is None or isinstance(value, bool):
+        return 1
+    if isinstance(value, (int, float, datetime.datetime)):
+        return 8
+    if isinstance(value, str):
+        return len(value.encode('utf-8')) + 1
+    if isinstance(value, (bytes, bytearray)):
+        return len(value)
+    if isinstance(value, dict):
+        return sum(len(str(key)) + 1 + estimate_size(item) for key, item in value.items())
+    if isinstance(value, (list, tuple)):
+        return sum(estimate_size(item) for item in value)
+    return len(str(value))
+
+
+def _operation_size(reference, data):
+    return len(reference.path) + 16 + (estimate_size(data) if data is not None else 0)
+
+
+# Commits set/delete operations in batches bounded by both operation count and request size,
+# several batches at a time, retrying contention and transient errors with jittered backoff.
+# client only needs .batch(), so an in-memory fake can stand in for Firestore
+class BatchWriter:
+    def __init__(self, client, max_workers=8, max_retries=5, base_delay=0.2,
+                 max_operations=MAX_BATCH_OPERATIONS, max_bytes=MAX_BATCH_BYTES):
+        self.client = client
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_operations = max_operations
+        self.max_bytes = max_bytes
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="batch-writer")
+        self._lock = threading.Lock()
+
+        self.operations_written = 0
+        self.batches_committed = 0
+        self.retries = 0
+        self.failures = 0
+        self.commit_seconds = 0.0
+        self.max_commit_seconds = 0.0
+        self.write_seconds = 0.0
+
+    # operations are (reference, data) pairs, data None meaning delete
+    def chunk(self, operations):
+        chunk = []
+        chunk_bytes = 0
+        for reference, data in operations:
+            size = _operation_size(reference, data)
+            if chunk and (len(chunk) >= self.max_operations or chunk_bytes + size > self.max_bytes):
+                yield chunk
+                chunk = []
+                chunk_bytes = 0
+            chunk.append((reference, data))
+            chunk_bytes += size
+        if chunk:
+            yield chunk
+
+    def _commit(self, chunk, merge=False):
+        for attempt in range(self.max_retries + 1):
+            batch = self.client.batch()
+            for reference, data in chunk:
+                if data is None:
+                    batch.delete(reference)
+                else:
+                    batch.set(reference, data, merge=merge)
+            start = time.perf_counter()
+            try:
+                batch.commit()
+            except RETRYABLE as e:
+                if attempt == self.max_retries:
+                    with self._lock:
+                        self.failures += 1
+                    raise
+                delay = self.base_delay * 2 ** attempt * (0.5 + random.random())
+                logger.warning(f"Batch commit failed ({e}), retrying in {delay:.2f}s")
+                with self._lock:
+                    self.retries += 1
+                time.sleep(delay)
+                continue
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                self.operations_written += len(chunk)
+                self.batches_committed += 1
+                self.commit_seconds += elapsed
+                self.max_commit_seconds = max(self.max_commit_seconds, elapsed)
+            return len(chunk)
+
+    # Commits every operation, returning how many were written. Raises the first failure once all batches settle.
+    # With merge, set only updates the given fields instead of replacing the document
+    def write(self, operations, merge=False):
+        start = time.perf_counter()
+        futures = [self._executor.submit(self._commit, chunk, merge) for chunk in self.chunk(operations)]
+        written = 0
+        error = None
+        for future in futures:
+            try:
+                written += future.result()
+            except Exception as e:
+                error = error or e
+        with self._lock:
+            self.write_seconds += time.perf_counter() - start
+        if error is not None:
+            raise error
+        return written
+
+    def stats(self):
+        with self._lock:
+            return {
+                'operations_written': self.operations_written,
+                'batches_committed': self.batches_committed,
+                'retries': self.retries,
+                'failures': self.failures,
+                'rows_per_second': self.operations_written / self.write_seconds if self.write_seconds else 0.0,
+                'avg_commit_seconds': self.commit_seconds / self.batches_committed if self.batches_committed else 0.0,
+                'max_commit_seconds': self.max_commit_seconds,
+            }
@@ -0,0 +1,72 @@
+from src.db.firestore import db
+from src.utils import batch_writer, collection_keys, document_id, record_key_columns
+
+# Legacy documents settled per batch_writer call
+COMPACT_CHUNK = 2000
+
+
+def _key_fields(collection_name):
+    return sorted(set(collection_keys.get(collection_name, [])) | {'email', 'day'})
+
+
+# Moves (legacy_ids, target_id) groups onto their target ids. A document the upsert sync already wrote at the
+# target is newer than any random-id copy, so it is always kept and the copies are only deleted. Otherwise the
+# first copy is moved there. Every target is written before any copy is deleted, so a failed write loses nothing
+def _settle(collection, groups, existing):
+    moves = []
+    deletes = []
+    for target_id, legacy_ids in groups:
+        if target_id not in existing:
+            snapshot = collection.document(legacy_ids[0]).get()
+            if snapshot.exists:
+                moves.append((collection.document(target_id), snapshot.to_dict()))
+        deletes.extend((collection.document(legacy_id), None) for legacy_id in legacy_ids)
+    if moves:
+        batch_writer.write(moves)
+    if deletes:
+        batch_writer.write(deletes)
+    return len(moves), len(deletes)
+
+
+# One-off job moving documents written with random ids onto their deterministic upsert ids and
+# dropping the duplicates that overlapping syncs appended. The scan reads only the key fields and keeps
+# document ids, never records, so a run over a whole collection stays small
+def compact_collection(collection_name, email=None):
+    collection = db.collection(collection_name)
+    query = collection.where('email', '==', email) if email else collection
+
+    existing = set()
+    legacy = {}
+    scanned = 0
+    for doc in query.select(_key_fields(collection_name)).stream():
+        scanned += 1
+        record = doc.to_dict()
+        target_id = document_id(record, record_key_columns(collection_name, record.keys()))
+        if doc.id == target_id:
+            existing.add(target_id)
+        else:
+            legacy.setdefault(target_id, []).append(doc.id)
+
+    moved = 0
+    deleted = 0
+    groups = list(legacy.items())
+    for start in range(0, len(groups), COMPACT_CHUNK):
+        chunk_moved, chunk_deleted = _settle(collection, groups[start:start + COMPACT_CHUNK], existing)
+        moved += chunk_moved
+        deleted += chunk_deleted
+
+    remaining = len(existing | set(legacy))
+    return {'scanned': scanned, 'remaining': remaining, 'moved': moved, 'deleted': deleted}
+
+
+def compact_all(email=None):
+    results = {}
+    for collection_name in collection_keys:
+        results[collection_name] = compact_collection(collection_name, email)
+        print(f"{collection_name}: {results[collection_name]}")
+    return results
+
+
+if __name__ == "__main__":
+    import sys
+    compact_all(sys.argv[1] if len(sys.argv) > 1 else None)
@@ -0,0 +1,79 @@
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from src.db.collections import display_info, main_raw, activity_raw, readiness_raw, sleep_raw, sleep_time_raw
+from src.utils import batch_writer
+from src.services import sync_state
+from src.services.display_cache import display_cache
+
+logger = logging.getLogger(__name__)
+
+USER_COLLECTIONS = [display_info, main_raw, activity_raw, readiness_raw, sleep_raw, sleep_time_raw]
+# Deletes handed to the batch writer at a time, so commits start while the query is still streaming ids
+DELETE_CHUNK = 4000
+# A pass that fails part way is re-run from a fresh query, which only finds what is left
+MAX_PASSES = 3
+
+# Shared by every deletion request, one worker per collection. Concurrent deletions queue behind each other
+# instead of each starting its own threads on top of the batch writer's
+_executor = ThreadPoolExecutor(max_workers=len(USER_COLLECTIONS), thread_name_prefix="deletion")
+
+
+class DeletionError(Exception):
+    def __init__(self, message, report):
+        super().__init__(message)
+        self.message = message
+        self.report = report
+
+
+def _delete_pass(collection, email):
+    # An empty field mask streams document ids only, none of the stored data
+    query = collection.where('email', '==', email).select([])
+    deleted = 0
+    operations = []
+    for doc in query.stream():
+        operations.append((doc.reference, None))
+        if len(operations) == DELETE_CHUNK:
+            deleted += batch_writer.write(operations)
+            operations = []
+    if operations:
+        deleted += batch_writer.write(operations)
+    return deleted
+
+
+# Deletes every document of the user in one collection, returning {'deleted', 'seconds', 'passes'}
+def delete_collection_data(collection, email):
+    start = time.perf_counter()
+    deleted = 0
+    for attempt in range(1, MAX_PASSES + 1):
+        try:
+            deleted += _delete_pass(collection, email)
+            break
+        except Exception as e:
+            if attempt == MAX_PASSES:
+                raise
+            logger.warning(f"Deleting {collection.id} data for {email} failed ({e}), retrying")
+    return {'deleted': deleted, 'seconds': time.perf_counter() - start, 'passes': attempt}
+
+
+# Deletes the user's documents from every collection at the same time, then their sync state and cached
+# display-info. Returns a per-collection report, raises DeletionError carrying it when a collection failed
+def delete_user_data(email, collections=USER_COLLECTIONS):
+    start = time.perf_counter()
+    report = {'collections': {}, 'deleted': 0, 'seconds': 0.0}
+    futures = {collection.id: _executor.submit(delete_collection_data, collection, email) for collection in collections}
+    for name, future in futures.items():
+        try:
+            report['collections'][name] = future.result()
+            report['deleted'] += report['collections'][name]['deleted']
+        except Exception as e:
+            report['collections'][name] = {'error': str(e)}
+
+    failed = [name for name, result in report['collections'].items() if 'error' in result]
+    if not failed:
+        sync_state.clear(email)
+    display_cache.invalidate(email)
+    report['seconds'] = time.perf_counter() - start
+    if failed:
+        raise DeletionError(f"Could not delete data from {', '.join(failed)}", report)
+    return report
@@ -0,0 +1,85 @@
+import pandas as pd
+
+# display_info list columns stored as encoded time series bytes
+SERIES_COLUMNS = ['heart_rate', 'hrv']
+
+# Flat display_info columns copied straight from the merged Oura frame
+DIRECT_COLUMNS = {
+    "day": "day",
+    "sleep_score": "score",
+    "activity_score": "activity_score",
+    "efficiency": "efficiency",
+    "total_sleep": "total_sleep_duration",
+    "awake": "awake_time",
+    "rem_sleep": "rem_sleep_duration",
+    "light_sleep": "light_sleep_duration",
+    "deep_sleep": "deep_sleep_duration",
+    "latency": "latency",
+    "bedtime_start": "bedtime_start",
+    "bedtime_end": "bedtime_end",
+    "average_heart_rate": "average_heart_rate",
+    "average_hrv": "average_hrv",
+    "type": "type",
+}
+
+
+# Every field of a stored display_info document, what fields= projections may choose from
+DISPLAY_FIELDS = ["day", "sleep_score", "readiness_score", "activity_score", "efficiency", "restfulness",
+                  "total_sleep", "awake", "rem_sleep", "light_sleep", "deep_sleep", "latency", "bedtime_start",
+                  "bedtime_end", "heart_rate", "average_heart_rate", "hrv", "average_hrv", "type",
+                  "oura_recommendation", "oura_status", "recommendation", "model_run_id"]
+
+
+# Pulls key out of a column of nested dicts, NoneType checks for rows that are not dicts
+def _nested(df, column, key, default):
+    if column not in df.columns:
+        return [default() for _ in range(len(df))]
+    return [value.get(key) if isinstance(value, dict) else default() for value in df[column].tolist()]
+
+
+def _optional(df, column, default):
+    if column not in df.columns:
+        return [default] * len(df)
+    return df[column].tolist()
+
+
+# Days missing from the daily endpoints come out as NaN scores. reindex keeps the merge working when a
+# chunk's window has no daily rows at all, e.g. a last day whose daily sleep Oura has not scored yet
+def merge_display_sources(df_main, df_sleep, df_activity, df_sleep_time=None):
+    df = df_main.merge(df_sleep.reindex(columns=["contributors", "day", "score"]), on='day', how='left').merge(df_activity.rename({"score":"activity_score"}, axis=1).reindex(columns=["day","activity_score"]), on="day", how="left")
+    if df_sleep_time is not None and len(df_sleep_time) > 0:
+        df = df.merge(df_sleep_time[["day", "recommendation", "status"]], on="day", how="left")
+    # Cleaning
+    df['contributors'] = df['contributors'].apply(lambda x: {} if pd.isna(x) else x)
+
+    df.sort_values(by='day', ascending=False, inplace=True)
+    return df
+
+
+# Builds the display_info frame column by column instead of row by row, same records as iterating the rows
+def build_display_frame(df):
+    columns = {name: df[source].tolist() for name, source in DIRECT_COLUMNS.items()}
+    display = {
+        "day": columns["day"],
+        "sleep_score": columns["sleep_score"],
+        "readiness_score": _nested(df, "readiness", "score", lambda: 0),
+        "activity_score": columns["activity_score"],
+        "efficiency": columns["efficiency"],
+        "restfulness": _nested(df, "contributors", "restfulness", lambda: 0),
+        "total_sleep": columns["total_sleep"],
+        "awake": columns["awake"],
+        "rem_sleep": columns["rem_sleep"],
+        "light_sleep": columns["light_sleep"],
+        "deep_sleep": columns["deep_sleep"],
+        "latency": columns["latency"],
+        "bedtime_start": columns["bedtime_start"],
+        "bedtime_end": columns["bedtime_end"],
+        "heart_rate": _nested(df, "heart_rate", "items", list),
+        "average_heart_rate": columns["average_heart_rate"],
+        "hrv": _nested(df, "hrv", "items", list),
+        "average_hrv": columns["average_hrv"],
+        "type": columns["type"],
+        "oura_recommendation": _optional(df, "recommendation", ""),
+        "oura_status": _optional(df, "status", ""),
+    }
+    return pd.DataFrame(display)
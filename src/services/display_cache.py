@@ -0,0 +1,197 @@
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from redis.commands.json.path import Path
+from redis.exceptions import WatchError
+from src.db.redis import redis_db
+from src import config
+
+logger = logging.getLogger(__name__)
+
+
+# Display-info records cached per user (and optional day window) rather than per JWT, so re-logins,
+# refreshed Oura tokens and other devices share one entry. Writers invalidate every window of a user.
+# Entries are fresh for ttl seconds, then kept for another stale_ttl seconds so that, with
+# stale-while-revalidate, a dashboard gets the old records at once while a bounded pool rebuilds them.
+# Every invalidation bumps a per-user generation. A rebuild reads the generation before reading Firestore
+# and only stores its records if no write invalidated the user in the meantime, so records read before a
+# sync finished are never cached as fresh
+class DisplayCache:
+    def __init__(self, client, ttl=60, stale_ttl=0, refresh_workers=4, prefix='display-info'):
+        self.client = client
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.prefix = prefix
+        self._lock = threading.Lock()
+        self._refresher = ThreadPoolExecutor(max_workers=refresh_workers, thread_name_prefix="display-refresh")
+        self._refreshing = set()
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.errors = 0
+        self.get_seconds = 0.0
+        self.set_seconds = 0.0
+        self.sets = 0
+        self.skipped_sets = 0
+        self.invalidations = 0
+        self.revalidations = 0
+
+    def key(self, email, window=None):
+        start, end = window or (None, None)
+        return f"{self.prefix}:{email}:{start or ''}:{end or ''}"
+
+    def _index_key(self, email):
+        return f"{self.prefix}-keys:{email}"
+
+    def _generation_key(self, email):
+        return f"{self.prefix}-gen:{email}"
+
+    # The user's current generation, to pass to set() after rebuilding. None when the cache is unavailable
+    def generation(self, email):
+        try:
+            return int(self.client.get(self._generation_key(email)) or 0)
+        except Exception as e:
+            logger.warning(f"Display cache generation read failed: {e}")
+            return None
+
+    def _read(self, email, window):
+        entry = self.client.json().get(self.key(email, window))
+        if not isinstance(entry, dict) or 'records' not in entry:
+            return None, None
+        return entry['records'], max(0.0, time.time() - entry.get('cached_at', 0))
+
+    # Returns (records, age_seconds, fresh). records is None on a miss, and stale entries only come
+    # back when stale-while-revalidate is enabled
+    def lookup(self, email, window=None):
+        start = time.perf_counter()
+        try:
+            records, age = self._read(email, window)
+        except Exception as e:
+            # A cache outage only costs a recompute
+            logger.warning(f"Display cache read failed: {e}")
+            records, age = None, None
+            with self._lock:
+                self.errors += 1
+
+        fresh = records is not None and age <= self.ttl
+        if records is not None and not fresh and not self.stale_ttl:
+            records, age = None, None
+        with self._lock:
+            self.get_seconds += time.perf_counter() - start
+            if records is None:
+                self.misses += 1
+            elif fresh:
+                self.hits += 1
+            else:
+                self.stale_hits += 1
+        return records, age, fresh
+
+    def get(self, email, window=None):
+        records, age, fresh = self.lookup(email, window)
+        return records if fresh else None
+
+    # Fresh records read without counting towards the metrics, for callers polling on someone else's rebuild
+    def peek(self, email, window=None):
+        try:
+            records, age = self._read(email, window)
+        except Exception:
+            return None
+        return records if records is not None and age <= self.ttl else None
+
+    # With generation, the records are only stored while the user's generation still matches it
+    def set(self, email, records, window=None, generation=None):
+        key = self.key(email, window)
+        generation_key = self._generation_key(email)
+        expires = self.ttl + self.stale_ttl
+        start = time.perf_counter()
+        stored = True
+        try:
+            with self.client.pipeline() as pipe:
+                if generation is not None:
+                    pipe.watch(generation_key)
+                    stored = int(pipe.get(generation_key) or 0) == generation
+                if stored:
+                    pipe.multi()
+                    pipe.json().set(key, Path.root_path(), {'cached_at': time.time(), 'records': records})
+                    pipe.expire(key, expires)
+                    pipe.sadd(self._index_key(email), key)
+                    pipe.expire(self._index_key(email), expires)
+                    pipe.execute()
+        except WatchError:
+            # Invalidated between the generation check and the write
+            stored = False
+        except Exception as e:
+            logger.warning(f"Display cache write failed: {e}")
+            with self._lock:
+                self.errors += 1
+        with self._lock:
+            if stored:
+                self.sets += 1
+            else:
+                self.skipped_sets += 1
+            self.set_seconds += time.perf_counter() - start
+        return stored
+
+    # Rebuilds a stale entry in the background, at most one pending rebuild per user and window
+    def revalidate(self, email, rebuild, window=None):
+        key = self.key(email, window)
+        with self._lock:
+            if key in self._refreshing:
+                return False
+            self._refreshing.add(key)
+            self.revalidations += 1
+
+        def run():
+            try:
+                rebuild()
+            except Exception as e:
+                logger.warning(f"Display cache revalidation for {email} failed: {e}")
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        self._refresher.submit(run)
+        return True
+
+    # Drops every cached window of the user and bumps their generation, called after their stored data changes
+    def invalidate(self, email):
+        index_key = self._index_key(email)
+        generation_key = self._generation_key(email)
+        try:
+            keys = [key.decode('utf-8') if isinstance(key, bytes) else key for key in self.client.smembers(index_key)]
+            pipe = self.client.pipeline()
+            pipe.incr(generation_key)
+            # Only has to outlive rebuilds in flight, an expired generation reads as 0 and still mismatches
+            pipe.expire(generation_key, max(self.ttl + self.stale_ttl, 3600))
+            pipe.delete(index_key, self.key(email), *keys)
+            pipe.execute()
+        except Exception as e:
+            logger.warning(f"Display cache invalidation failed: {e}")
+            with self._lock:
+                self.errors += 1
+        with self._lock:
+            self.invalidations += 1
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.stale_hits + self.misses
+            return {
+                'hits': self.hits,
+                'stale_hits': self.stale_hits,
+                'misses': self.misses,
+                'hit_ratio': (self.hits + self.stale_hits) / lookups if lookups else 0.0,
+                'errors': self.errors,
+                'avg_get_seconds': self.get_seconds / lookups if lookups else 0.0,
+                'avg_set_seconds': self.set_seconds / (self.sets + self.skipped_sets) if self.sets + self.skipped_sets else 0.0,
+                'skipped_sets': self.skipped_sets,
+                'invalidations': self.invalidations,
+                'revalidations': self.revalidations,
+                'revalidating': len(self._refreshing),
+            }
+
+
+display_cache = DisplayCache(redis_db,
+                             ttl=config.DISPLAY_CACHE_TTL,
+                             stale_ttl=config.DISPLAY_CACHE_STALE_TTL if config.DISPLAY_CACHE_SWR else 0,
+                             refresh_workers=config.DISPLAY_REFRESH_WORKERS)
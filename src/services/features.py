@@ -0,0 +1,86 @@
+import threading
+import numpy as np
+import pandas as pd
+from src.services.normalize import COLLECTION_SCHEMAS, KIND_DEFAULTS
+
+# Model input columns, in the order the recommendation model was trained on
+FEATURE_COLUMNS = ["sleep_score", "readiness_score", "activity_score", "efficiency", "restfulness", "total_sleep", "awake", "rem_sleep", "light_sleep", "deep_sleep", "latency", "bedtime_start", "bedtime_end", "average_heart_rate", "average_hrv"]
+# Timestamps fed to the model as seconds since midnight UTC of the record's day
+OFFSET_COLUMNS = ("bedtime_start", "bedtime_end")
+EPOCH = pd.Timestamp(0, tz='UTC')
+DAY_SECONDS = 86400
+# What normalize_frame stores in place of a missing display_info feature, e.g. 0 for a day without daily sleep
+STORED_DEFAULTS = {column: KIND_DEFAULTS[pd.api.types.pandas_dtype(dtype).kind]
+                   for column, dtype in COLLECTION_SCHEMAS['display_info'].items() if column in FEATURE_COLUMNS}
+
+
+# Timestamp strings parsed to epoch seconds, kept across calls and shared by every caller: sync chunks,
+# rescoring batches and display rebuilds keep meeting the same days and bedtimes. Unparseable values
+# become NaN. The oldest entries are dropped past max_size
+class TimestampCache:
+    def __init__(self, max_size=100000):
+        self.max_size = max_size
+        self._seconds = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def seconds(self, values):
+        codes, uniques = pd.factorize(pd.Series(values, copy=False), use_na_sentinel=True)
+        uniques = list(uniques)
+        with self._lock:
+            parsed = [self._seconds.get(value) for value in uniques]
+        missing = [value for value, seconds in zip(uniques, parsed) if seconds is None]
+        if missing:
+            timestamps = pd.to_datetime(pd.Series(missing, dtype=object), utc=True, format='ISO8601', errors='coerce')
+            new = dict(zip(missing, (timestamps - EPOCH).dt.total_seconds().to_numpy(dtype=np.float64, na_value=np.nan)))
+            parsed = [new[value] if seconds is None else seconds for value, seconds in zip(uniques, parsed)]
+            with self._lock:
+                self._seconds.update(new)
+                while len(self._seconds) > self.max_size:
+                    del self._seconds[next(iter(self._seconds))]
+        with self._lock:
+            self.hits += len(uniques) - len(missing)
+            self.misses += len(missing)
+        # NaN for the NA code -1
+        return np.append(np.asarray(parsed, dtype=np.float64), np.nan)[codes]
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'cached': len(self._seconds),
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': self.hits / lookups if lookups else 0.0,
+            }
+
+
+timestamp_cache = TimestampCache()
+
+
+# Bedtime offsets in seconds from the start of the (UTC) day, the day parsed once for both columns
+def bedtime_offsets(df):
+    day = np.floor(timestamp_cache.seconds(df['day']) / DAY_SECONDS) * DAY_SECONDS
+    return {column: timestamp_cache.seconds(df[column]) - day for column in OFFSET_COLUMNS}
+
+
+# Model input for display rows as a contiguous float32 matrix in FEATURE_COLUMNS order, read column by
+# column from the display frame without copying it. Missing values, and the 0 and 'Unknown' placeholders
+# stored rows were filled with, become NaN, which XGBoost treats as missing. Sync scores the rows before they
+# are filled and rescoring after, so both have to read a placeholder as missing to predict the same label
+def feature_matrix(df):
+    offsets = bedtime_offsets(df)
+    matrix = np.empty((len(df), len(FEATURE_COLUMNS)), dtype=np.float32)
+    for index, column in enumerate(FEATURE_COLUMNS):
+        if column in offsets:
+            matrix[:, index] = offsets[column]
+            continue
+        values = df[column]
+        if not pd.api.types.is_numeric_dtype(values):
+            values = pd.to_numeric(values, errors='coerce')
+        matrix[:, index] = values.to_numpy(dtype=np.float32, na_value=np.nan)
+        if column in STORED_DEFAULTS:
+            matrix[matrix[:, index] == STORED_DEFAULTS[column], index] = np.nan
+    return matrix
+
@@ -0,0 +1,215 @@
+import json
+import logging
+import queue
+import threading
+import time
+import numpy as np
+import pandas as pd
+from src.services.model_registry import model_registry
+from src.services.oura_client import LatencyHistogram
+from src.services.features import FEATURE_COLUMNS
+from src import config
+
+logger = logging.getLogger(__name__)
+
+BATCH_BUCKETS = [1, 2, 4, 8, 16, 32, 64, 128]
+
+
+class _Request:
+    def __init__(self, features, matrix):
+        self.features = features
+        self.matrix = matrix
+        self.enqueued = time.perf_counter()
+        self.done = threading.Event()
+        self.result = None
+        self.run_id = None
+        self.error = None
+
+
+# The XGBoost booster under an MLflow pyfunc model, None when the model is not an XGBoost flavor
+def native_booster(model):
+    if hasattr(model, 'get_raw_model'):
+        try:
+            raw = model.get_raw_model()
+        except Exception:
+            raw = None
+    else:
+        raw = getattr(getattr(model, '_model_impl', None), 'xgb_model', None)
+    if hasattr(raw, 'get_booster'):
+        raw = raw.get_booster()
+    return raw if hasattr(raw, 'inplace_predict') else None
+
+
+class _Native:
+    def __init__(self, booster, columns):
+        self.booster = booster
+        self.objective = json.loads(booster.save_config())['learner']['objective']['name']
+        names = booster.feature_names
+        self.index = [columns.index(name) for name in names] if names and list(names) != list(columns) else None
+
+    # Class ids, as the pyfunc wrapper of the sklearn classifier returns them
+    def predict(self, matrix):
+        if self.index is not None:
+            matrix = matrix[:, self.index]
+        output = self.booster.inplace_predict(matrix)
+        if output.ndim == 2:
+            return output.argmax(axis=1)
+        if self.objective.startswith('binary:'):
+            return (output > 0.5).astype(np.int64)
+        return output.astype(np.int64)
+
+
+# Recommendation inference shared by every request thread. Runs the native XGBoost booster straight on a
+# float32 matrix, skipping pyfunc schema validation and DataFrame handling, and collects the rows of
+# concurrent requests for up to window seconds so the model runs once per batch instead of once per request.
+# Models that are not XGBoost boosters go through pyfunc, still batched
+class BatchPredictor:
+    def __init__(self, registry, columns=FEATURE_COLUMNS, window=0.005, max_batch_rows=4096, native=True):
+        self.registry = registry
+        self.columns = list(columns)
+        self.window = window
+        self.max_batch_rows = max_batch_rows
+        self.native = native
+        self._queue = queue.Queue()
+        self._worker = None
+        self._lock = threading.Lock()
+        self._boosters = {}
+
+        self.requests = 0
+        self.batches = 0
+        self.rows = 0
+        self.native_batches = 0
+        self.errors = 0
+        self.predict_latency = LatencyHistogram()
+        self.request_latency = LatencyHistogram()
+        self.batch_requests = LatencyHistogram(BATCH_BUCKETS)
+
+    def _matrix(self, features):
+        if isinstance(features, pd.DataFrame):
+            features = features[self.columns].to_numpy(dtype=np.float32)
+        return np.ascontiguousarray(features, dtype=np.float32)
+
+    def _native(self, run_id, model):
+        if not self.native:
+            return None
+        with self._lock:
+            if run_id in self._boosters:
+                return self._boosters[run_id]
+        booster = native_booster(model)
+        native = None
+        if booster is None:
+            logger.info(f"Model for run {run_id} is not an XGBoost booster, predicting through pyfunc")
+        else:
+            try:
+                native = _Native(booster, self.columns)
+            except (ValueError, KeyError) as e:
+                # e.g. the booster names features the matrix does not have
+                logger.warning(f"Cannot predict natively with the booster of run {run_id}, predicting through pyfunc: {e}")
+        with self._lock:
+            # Only the current production run is kept, older boosters go with the swapped out model
+            self._boosters = {run_id: native}
+        return native
+
+    def _predict_batch(self, requests):
+        run_id, model, label_encoder = self.registry.get()
+        native = self._native(run_id, model)
+        start = time.perf_counter()
+        if native is not None:
+            matrices = [request.matrix for request in requests]
+            classes = native.predict(np.vstack(matrices) if len(matrices) > 1 else matrices[0])
+        else:
+            frames = [request.features if isinstance(request.features, pd.DataFrame) else pd.DataFrame(request.matrix, columns=self.columns)
+                      for request in requests]
+            classes = model.predict(pd.concat(frames, ignore_index=True) if len(frames) > 1 else frames[0])
+        labels = label_encoder.inverse_transform(np.asarray(classes))
+        elapsed = time.perf_counter() - start
+
+        with self._lock:
+            self.batches += 1
+            self.rows += len(labels)
+            self.native_batches += native is not None
+            self.predict_latency.observe(elapsed)
+            self.batch_requests.observe(len(requests))
+        return run_id, np.split(labels, np.cumsum([len(request.matrix) for request in requests])[:-1])
+
+    def _complete(self, requests):
+        try:
+            run_id, results = self._predict_batch(requests)
+        except Exception as e:
+            with self._lock:
+                self.errors += 1
+            for request in requests:
+                request.error = e
+        else:
+            for request, result in zip(requests, results):
+                request.result = result
+                request.run_id = run_id
+        finally:
+            for request in requests:
+                request.done.set()
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            rows = len(batch[0].matrix)
+            deadline = time.monotonic() + self.window
+            while rows < self.max_batch_rows:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    request = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                batch.append(request)
+                rows += len(request.matrix)
+            self._complete(batch)
+
+    def _start(self):
+        with self._lock:
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._run, name="batch-predictor", daemon=True)
+                self._worker.start()
+
+    # (labels, run_id) for the feature rows, a DataFrame with the feature columns or a matrix in their order.
+    # run_id is the model run that produced the labels, stored alongside them
+    def score(self, features):
+        request = _Request(features, self._matrix(features))
+        with self._lock:
+            self.requests += 1
+        if not len(request.matrix):
+            return np.array([], dtype=object), None
+
+        if self.window:
+            self._start()
+            self._queue.put(request)
+            request.done.wait()
+        else:
+            self._complete([request])
+
+        with self._lock:
+            self.request_latency.observe(time.perf_counter() - request.enqueued)
+        if request.error is not None:
+            raise request.error
+        return request.result, request.run_id
+
+    def stats(self):
+        with self._lock:
+            return {
+                'requests': self.requests,
+                'batches': self.batches,
+                'rows': self.rows,
+                'native_batches': self.native_batches,
+                'errors': self.errors,
+                'avg_batch_rows': self.rows / self.batches if self.batches else 0.0,
+                'queued': self._queue.qsize(),
+                'predict_seconds': self.predict_latency.to_dict(),
+                'request_seconds': self.request_latency.to_dict(),
+                'batch_requests': self.batch_requests.to_dict(),
+            }
+
+
+batch_predictor = BatchPredictor(model_registry,
+                                 window=config.INFERENCE_BATCH_WINDOW,
+                                 max_batch_rows=config.INFERENCE_MAX_BATCH_ROWS,
+                                 native=config.INFERENCE_NATIVE)
@@ -0,0 +1,209 @@
+import json
+import logging
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from src import config
+
+logger = logging.getLogger(__name__)
+
+QUEUED = 'queued'
+RUNNING = 'running'
+SUCCEEDED = 'succeeded'
+FAILED = 'failed'
+
+
+# Job records and per-user locks kept in this process only. Like the Redis store, records expire job_ttl
+# seconds after their last save
+class LocalJobStore:
+    def __init__(self, job_ttl=3600):
+        self.job_ttl = job_ttl
+        self._jobs = OrderedDict()
+        self._locks = {}
+        self._lock = threading.Lock()
+
+    # Records are kept in save order, so the expired ones are always at the front
+    def _prune(self, now):
+        while self._jobs:
+            job_id, (expires_at, _) = next(iter(self._jobs.items()))
+            if expires_at > now:
+                break
+            del self._jobs[job_id]
+
+    def save(self, job):
+        now = time.monotonic()
+        with self._lock:
+            self._prune(now)
+            self._jobs[job['id']] = (now + self.job_ttl, dict(job))
+            self._jobs.move_to_end(job['id'])
+
+    def load(self, job_id):
+        with self._lock:
+            self._prune(time.monotonic())
+            entry = self._jobs.get(job_id)
+            return dict(entry[1]) if entry else None
+
+    # Returns None when the lock was taken, otherwise the id of the job already holding it
+    def claim(self, lock_key, job_id):
+        with self._lock:
+            holder = self._locks.get(lock_key)
+            if holder is not None:
+                return holder
+            self._locks[lock_key] = job_id
+            return None
+
+    def release(self, lock_key, job_id):
+        with self._lock:
+            if self._locks.get(lock_key) == job_id:
+                del self._locks[lock_key]
+
+    # Keeps a running job's record from expiring. Local locks have no ttl, they only go away on release
+    def refresh(self, lock_key, job_id):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._jobs.get(job_id)
+            if entry is not None:
+                self._jobs[job_id] = (now + self.job_ttl, entry[1])
+                self._jobs.move_to_end(job_id)
+            return self._locks.get(lock_key) == job_id
+
+
+# Extends the lock only while job_id still holds it
+REFRESH_LOCK = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('expire', KEYS[1], ARGV[2])
+end
+return 0
+"""
+
+
+# Job records and per-user locks shared by every worker process through Redis. A lock expires lock_ttl seconds
+# after it was taken or last refreshed, so the lock of a worker that died mid-job frees itself
+class RedisJobStore:
+    def __init__(self, client, job_ttl=3600, lock_ttl=300):
+        self.client = client
+        self.job_ttl = job_ttl
+        self.lock_ttl = lock_ttl
+
+    def save(self, job):
+        self.client.set(f"job:{job['id']}", json.dumps(job, default=str), ex=self.job_ttl)
+
+    def load(self, job_id):
+        data = self.client.get(f"job:{job_id}")
+        return json.loads(data) if data else None
+
+    def claim(self, lock_key, job_id):
+        if self.client.set(f"job-lock:{lock_key}", job_id, nx=True, ex=self.lock_ttl):
+            return None
+        holder = self.client.get(f"job-lock:{lock_key}")
+        if holder is None:
+            # Lock expired between the two calls, try again
+            return self.claim(lock_key, job_id)
+        return holder.decode('utf-8') if isinstance(holder, bytes) else holder
+
+    def release(self, lock_key, job_id):
+        holder = self.client.get(f"job-lock:{lock_key}")
+        if holder is not None and (holder.decode('utf-8') if isinstance(holder, bytes) else holder) == job_id:
+            self.client.delete(f"job-lock:{lock_key}")
+
+    # Pushes back the expiry of a running job's lock and record, returns False when the lock was lost
+    def refresh(self, lock_key, job_id):
+        self.client.expire(f"job:{job_id}", self.job_ttl)
+        return bool(self.client.eval(REFRESH_LOCK, 1, f"job-lock:{lock_key}", job_id, self.lock_ttl))
+
+
+# Runs jobs on a bounded pool of worker threads, at most one job per (kind, user) at a time. While jobs
+# run, a heartbeat thread refreshes their locks every heartbeat seconds, so a lock outlives a long job
+# but not a dead worker
+class JobQueue:
+    def __init__(self, store, max_workers=4, heartbeat=100):
+        self.store = store
+        self.heartbeat = heartbeat
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="jobs")
+        self._running = {}
+        self._lock = threading.Lock()
+        self._heartbeat_thread = None
+
+    def _start_heartbeat(self):
+        with self._lock:
+            if self._heartbeat_thread is None:
+                self._heartbeat_thread = threading.Thread(target=self._beat, name="jobs-heartbeat", daemon=True)
+                self._heartbeat_thread.start()
+
+    def _beat(self):
+        while True:
+            time.sleep(self.heartbeat)
+            with self._lock:
+                running = list(self._running.items())
+            for job_id, lock_key in running:
+                try:
+                    if not self.store.refresh(lock_key, job_id):
+                        logger.warning(f"Job {job_id} lost its lock {lock_key}")
+                except Exception as e:
+                    logger.warning(f"Could not refresh lock {lock_key} of job {job_id}: {e}")
+
+    # Returns (job, created). When the user already has a job of this kind running, that job is returned instead
+    def submit(self, kind, user, fn, *args):
+        job = {
+            'id': uuid.uuid4().hex,
+            'kind': kind,
+            'user': user,
+            'status': QUEUED,
+            'created_at': time.time(),
+            'started_at': None,
+            'finished_at': None,
+            'result': None,
+            'error': None,
+        }
+        lock_key = f"{kind}:{user}"
+        for attempt in range(2):
+            holder = self.store.claim(lock_key, job['id'])
+            if holder is None:
+                break
+            existing = self.store.load(holder)
+            if existing is not None:
+                return existing, False
+            # The holder's record expired without releasing the lock, take it over
+            self.store.release(lock_key, holder)
+        else:
+            raise RuntimeError(f"Could not acquire job lock {lock_key}")
+
+        self.store.save(job)
+        self._executor.submit(self._run, job, lock_key, fn, args)
+        return job, True
+
+    def _run(self, job, lock_key, fn, args):
+        job['status'] = RUNNING
+        job['started_at'] = time.time()
+        self.store.save(job)
+        with self._lock:
+            self._running[job['id']] = lock_key
+        self._start_heartbeat()
+        try:
+            job['result'] = fn(*args)
+            job['status'] = SUCCEEDED
+        except Exception as e:
+            logger.warning(f"Job {job['id']} ({job['kind']}) failed: {e}")
+            job['error'] = {'message': getattr(e, 'message', "Error has occurred"), 'error': getattr(e, 'error', str(e))}
+            job['status'] = FAILED
+        finally:
+            with self._lock:
+                self._running.pop(job['id'], None)
+            job['finished_at'] = time.time()
+            self.store.save(job)
+            self.store.release(lock_key, job['id'])
+
+    def get(self, job_id):
+        return self.store.load(job_id)
+
+
+def _default_store():
+    if config.JOB_BACKEND == 'redis':
+        from src.db.redis import redis_db
+        return RedisJobStore(redis_db, job_ttl=config.JOB_TTL, lock_ttl=config.JOB_LOCK_TTL)
+    return LocalJobStore(job_ttl=config.JOB_TTL)
+
+
+job_queue = JobQueue(_default_store(), max_workers=config.JOB_WORKERS, heartbeat=config.JOB_LOCK_TTL / 3)
@@ -0,0 +1,169 @@
+import logging
+import os
+import threading
+import time
+from src.utils import load_label_encoder
+from src import config
+
+logger = logging.getLogger(__name__)
+
+
+class ModelNotReadyError(Exception):
+    pass
+
+
+# Keeps the production pyfunc model and its label encoder in memory, keyed by run_id,
+# and hot-swaps to a new production run from a background thread.
+# Nothing touches MLflow until start() or the first prediction, so importing this never blocks app boot
+class ModelRegistry:
+    def __init__(self, tracking_uri, experiment_name, model_dir=None, poll_interval=300, load_timeout=30):
+        self.tracking_uri = tracking_uri
+        self.experiment_name = experiment_name
+        self.model_dir = model_dir
+        self.poll_interval = poll_interval
+        self.load_timeout = load_timeout
+        self.run_id = None
+        self.error = None
+        self._models = {}
+        self._lock = threading.Lock()
+        self._ready = threading.Event()
+        self._worker = None
+        self._listeners = []
+
+        self.hits = 0
+        self.misses = 0
+        self.loads = 0
+        self.last_load_seconds = 0.0
+        self.total_load_seconds = 0.0
+
+    @property
+    def ready(self):
+        return self._ready.is_set()
+
+    def find_production_run(self):
+        if self.model_dir:
+            return f"local:{os.path.abspath(self.model_dir)}"
+
+        import mlflow
+        mlflow.set_tracking_uri(self.tracking_uri)
+        experiment = mlflow.get_experiment_by_name(self.experiment_name)
+        runs = mlflow.search_runs(experiment_ids=[experiment.experiment_id], filter_string="tags.production = 'true'")
+        run_id = ""
+        for index, row in runs.iterrows():
+            if row["tags.mlflow.runName"] == "Production":
+                run_id = row["run_id"]
+        return run_id
+
+    def _load(self, run_id):
+        import mlflow
+        start = time.perf_counter()
+        if run_id.startswith("local:"):
+            model_dir = run_id[len("local:"):]
+            model = mlflow.pyfunc.load_model(os.path.join(model_dir, 'model'))
+            label_encoder = load_label_encoder(os.path.join(model_dir, 'label_encoder.pkl'))
+        else:
+            mlflow.set_tracking_uri(self.tracking_uri)
+            model = mlflow.pyfunc.load_model(f"runs:/{run_id}/model")
+            local_path = mlflow.artifacts.download_artifacts(run_id=run_id, artifact_path='label_encoder.pkl')
+            label_encoder = load_label_encoder(local_path)
+        elapsed = time.perf_counter() - start
+
+        with self._lock:
+            self.loads += 1
+            self.last_load_seconds = elapsed
+            self.total_load_seconds += elapsed
+        logger.info(f"Loaded model for run {run_id} in {elapsed:.2f}s")
+        return model, label_encoder
+
+    # Returns (run_id, model, label_encoder), loading the run only if it is not cached yet.
+    # Before the first load finishes, waits up to load_timeout (loading inline if start() was never called)
+    def get(self, run_id=None):
+        if run_id is None and not self.ready:
+            if self._worker is None:
+                self.refresh()
+            elif not self._ready.wait(self.load_timeout):
+                raise ModelNotReadyError("Recommendation model is still loading")
+
+        with self._lock:
+            run_id = run_id or self.run_id
+            entry = self._models.get(run_id)
+            if entry is not None:
+                self.hits += 1
+                return run_id, entry[0], entry[1]
+            self.misses += 1
+
+        model, label_encoder = self._load(run_id)
+        with self._lock:
+            self._models.setdefault(run_id, (model, label_encoder))
+            model, label_encoder = self._models[run_id]
+        return run_id, model, label_encoder
+
+    # Loads the current production run fully before swapping it in, so requests never wait on it
+    def refresh(self):
+        run_id = self.find_production_run()
+        if run_id == self.run_id:
+            return False
+
+        model, label_encoder = self._load(run_id)
+        with self._lock:
+            previous = self.run_id
+            self._models = {run_id: (model, label_encoder)}
+            self.run_id = run_id
+            self.error = None
+        self._ready.set()
+        logger.info(f"Production model swapped from {previous} to {run_id}")
+        for listener in self._listeners:
+            try:
+                listener(previous, run_id)
+            except Exception as e:
+                logger.warning(f"Model swap listener failed: {e}")
+        return True
+
+    # Calls fn(previous_run_id, run_id) after every swap, previous_run_id is None for the first load
+    def on_swap(self, fn):
+        self._listeners.append(fn)
+
+    def _run(self):
+        delay = 1
+        while not self.ready:
+            try:
+                self.refresh()
+            except Exception as e:
+                self.error = str(e)
+                logger.warning(f"Initial model load failed, retrying in {delay}s: {e}")
+                time.sleep(delay)
+                delay = min(delay * 2, self.poll_interval)
+
+        # A local model directory is pinned, there is no production tag to follow
+        while not self.model_dir:
+            time.sleep(self.poll_interval)
+            try:
+                self.refresh()
+            except Exception as e:
+                logger.warning(f"Production model refresh failed: {e}")
+
+    # Loads the model in a background thread and keeps following the production run
+    def start(self):
+        if self._worker is None:
+            self._worker = threading.Thread(target=self._run, name="model-registry", daemon=True)
+            self._worker.start()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'ready': self.ready,
+                'run_id': self.run_id,
+                'error': self.error,
+                'cached_runs': list(self._models.keys()),
+                'hits': self.hits,
+                'misses': self.misses,
+                'loads': self.loads,
+                'last_load_seconds': self.last_load_seconds,
+                'total_load_seconds': self.total_load_seconds,
+            }
+
+
+model_registry = ModelRegistry(config.MLFLOW_TRACKING_URI, config.MLFLOW_EXPERIMENT,
+                               model_dir=config.MODEL_DIR,
+                               poll_interval=config.MODEL_POLL_INTERVAL,
+                               load_timeout=config.MODEL_LOAD_TIMEOUT)
@@ -0,0 +1,82 @@
+import pandas as pd
+from src.utils import default_values
+
+# Target dtypes of the numeric Oura fields per collection. Declared columns are coerced to their dtype, so a
+# day missing from one endpoint stores 0 rather than flipping the column to float or object. Columns not
+# listed here keep their own dtype and get the default of its kind
+COLLECTION_SCHEMAS = {
+    'display_info': {
+        'sleep_score': 'int64', 'readiness_score': 'int64', 'activity_score': 'int64', 'efficiency': 'int64',
+        'restfulness': 'int64', 'total_sleep': 'int64', 'awake': 'int64', 'rem_sleep': 'int64',
+        'light_sleep': 'int64', 'deep_sleep': 'int64', 'latency': 'int64',
+        'average_heart_rate': 'float64', 'average_hrv': 'float64',
+    },
+    'main_raw': {
+        'awake_time': 'int64', 'deep_sleep_duration': 'int64', 'efficiency': 'int64', 'latency': 'int64',
+        'light_sleep_duration': 'int64', 'lowest_heart_rate': 'int64', 'rem_sleep_duration': 'int64',
+        'restless_periods': 'int64', 'time_in_bed': 'int64', 'total_sleep_duration': 'int64',
+        'average_breath': 'float64', 'average_heart_rate': 'float64', 'average_hrv': 'float64',
+    },
+    'sleep_raw': {
+        'score': 'int64',
+    },
+    'activity_raw': {
+        'score': 'int64', 'active_calories': 'int64', 'steps': 'int64', 'total_calories': 'int64',
+        'target_calories': 'int64', 'target_meters': 'int64', 'meters_to_target': 'int64',
+        'equivalent_walking_distance': 'int64', 'inactivity_alerts': 'int64', 'high_activity_time': 'int64',
+        'medium_activity_time': 'int64', 'low_activity_time': 'int64', 'sedentary_time': 'int64',
+        'resting_time': 'int64', 'non_wear_time': 'int64',
+        'average_met_minutes': 'float64', 'high_activity_met_minutes': 'float64',
+        'medium_activity_met_minutes': 'float64', 'low_activity_met_minutes': 'float64',
+        'sedentary_met_minutes': 'float64',
+    },
+    'readiness_raw': {
+        'score': 'int64', 'temperature_deviation': 'float64', 'temperature_trend_deviation': 'float64',
+    },
+    'sleep_time_raw': {},
+}
+
+# dtype kind -> fill value, anything else (objects, strings, categories) gets default_values['object']
+KIND_DEFAULTS = {
+    'i': default_values['int64'],
+    'u': default_values['int64'],
+    'f': default_values['float64'],
+    'b': default_values['bool'],
+}
+
+
+def _default(dtype):
+    if isinstance(dtype, pd.CategoricalDtype):
+        return default_values['object']
+    return KIND_DEFAULTS.get(getattr(dtype, 'kind', 'O'), default_values['object'])
+
+
+# Fills nulls and applies the collection's dtypes in place, one fillna over the whole frame instead of one
+# per column. Integer columns are downcast to the smallest integer dtype holding them; floats stay float64
+# since Firestore stores doubles and a float32 round trip would change the stored values
+def normalize_frame(df, collection_id):
+    schema = COLLECTION_SCHEMAS.get(collection_id, {})
+    fills = {}
+    for column in df.columns:
+        declared = schema.get(column)
+        if declared is not None:
+            if not pd.api.types.is_numeric_dtype(df[column]):
+                df[column] = pd.to_numeric(df[column], errors='coerce')
+            fills[column] = KIND_DEFAULTS[pd.api.types.pandas_dtype(declared).kind]
+            continue
+        dtype = df[column].dtype
+        if pd.api.types.is_datetime64_any_dtype(dtype):
+            continue
+        fills[column] = _default(dtype)
+        if isinstance(dtype, pd.CategoricalDtype) and fills[column] not in dtype.categories:
+            df[column] = df[column].cat.add_categories([fills[column]])
+
+    df.fillna(fills, inplace=True)
+
+    for column, declared in schema.items():
+        if column in df.columns:
+            df[column] = df[column].astype(declared)
+    for column in df.columns:
+        if pd.api.types.is_integer_dtype(df[column].dtype):
+            df[column] = pd.to_numeric(df[column], downcast='integer')
+    return df
@@ -0,0 +1,152 @@
+import asyncio
+import concurrent.futures
+import logging
+import threading
+import time
+import httpx
+from src.services.oura_client import oura_client, RETRY_STATUSES, retry_after
+from src import config
+
+logger = logging.getLogger(__name__)
+
+
+class FetchError(Exception):
+    def __init__(self, name, error):
+        super().__init__(f"{name}: {error}")
+        self.name = name
+        self.error = error
+
+
+# Fans Oura GETs out on one long-lived event loop thread shared by every request, instead of a thread per
+# call. At most max_concurrency requests are in flight across the process, and when one call of a fan-out
+# fails the others are cancelled straight away. Timeouts, retries, backoff and the per-token rate limit
+# are the ones of the blocking OuraClient, and latencies land in its histograms
+class AsyncOuraFetcher:
+    def __init__(self, client, max_concurrency=32):
+        self.client = client
+        self.max_concurrency = max_concurrency
+        self._loop = None
+        self._http = None
+        self._semaphore = None
+        self._lock = threading.Lock()
+
+        self.fanouts = 0
+        self.cancelled = 0
+        self.retries = 0
+        self.errors = 0
+        self.in_flight = 0
+
+    def _start(self):
+        with self._lock:
+            if self._loop is not None:
+                return self._loop
+            loop = asyncio.new_event_loop()
+            threading.Thread(target=loop.run_forever, name="oura-async", daemon=True).start()
+
+            async def setup():
+                connect_timeout, read_timeout = self.client.timeout
+                self._http = httpx.AsyncClient(
+                    timeout=httpx.Timeout(read_timeout, connect=connect_timeout),
+                    limits=httpx.Limits(max_connections=self.max_concurrency, max_keepalive_connections=self.max_concurrency),
+                )
+                self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            asyncio.run_coroutine_threadsafe(setup(), loop).result()
+            self._loop = loop
+            return loop
+
+    async def _get(self, url, params, headers):
+        rate_key = (headers or {}).get('Authorization')
+        for attempt in range(self.client.max_retries + 1):
+            if rate_key:
+                wait = self.client.rate_limiter.try_acquire(rate_key)
+                while wait:
+                    await asyncio.sleep(wait)
+                    wait = self.client.rate_limiter.try_acquire(rate_key)
+
+            start = time.perf_counter()
+            async with self._semaphore:
+                with self._lock:
+                    self.in_flight += 1
+                try:
+                    response = await self._http.get(url, params=params, headers=headers)
+                except (httpx.TransportError, httpx.TimeoutException) as e:
+                    self.client.observe(url, time.perf_counter() - start)
+                    if attempt == self.client.max_retries:
+                        with self._lock:
+                            self.errors += 1
+                        raise
+                    delay = self.client.backoff(attempt)
+                    logger.warning(f"Oura request to {url} failed ({e}), retrying in {delay:.2f}s")
+                    response = None
+                finally:
+                    with self._lock:
+                        self.in_flight -= 1
+
+            if response is not None:
+                self.client.observe(url, time.perf_counter() - start)
+                retryable = response.status_code == 429 or response.status_code in RETRY_STATUSES
+                if not retryable or attempt == self.client.max_retries:
+                    if response.status_code >= 400:
+                        with self._lock:
+                            self.errors += 1
+                    response.raise_for_status()
+                    return response.json()
+                delay = self.client.backoff(attempt, retry_after(response))
+                logger.warning(f"Oura responded {response.status_code} for {url}, retrying in {delay:.2f}s")
+            with self._lock:
+                self.retries += 1
+            await asyncio.sleep(delay)
+
+    # Same result as OuraClient.fetch_all, every page joined into {'data': [...]}
+    async def _fetch_all(self, url, params, headers):
+        params = dict(params or {})
+        first = await self._get(url, params, headers)
+        if 'data' not in first:
+            return first
+        data = list(first['data'])
+        next_token = first.get('next_token')
+        while next_token:
+            params['next_token'] = next_token
+            page = await self._get(url, params, headers)
+            data.extend(page.get('data', []))
+            next_token = page.get('next_token')
+        return {'data': data}
+
+    async def _gather(self, calls):
+        tasks = {asyncio.ensure_future(self._fetch_all(*args)): name for name, args in calls.items()}
+        done, pending = await asyncio.wait(tasks, return_when=asyncio.FIRST_EXCEPTION)
+        failed = next((task for task in done if task.exception() is not None), None)
+        if failed is not None:
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+            with self._lock:
+                self.cancelled += len(pending)
+            raise FetchError(tasks[failed], failed.exception())
+        return {name: task.result() for task, name in tasks.items()}
+
+    # Fetches every call at once, {name: (url, params, headers)} -> {name: body}. Raises FetchError naming
+    # the first call that failed, after cancelling the ones still running
+    def fetch_many(self, calls, timeout=None):
+        loop = self._start()
+        with self._lock:
+            self.fanouts += 1
+        future = asyncio.run_coroutine_threadsafe(self._gather(calls), loop)
+        try:
+            return future.result(timeout)
+        except concurrent.futures.TimeoutError:
+            future.cancel()
+            raise
+
+    def stats(self):
+        with self._lock:
+            return {
+                'fanouts': self.fanouts,
+                'in_flight': self.in_flight,
+                'cancelled': self.cancelled,
+                'retries': self.retries,
+                'errors': self.errors,
+            }
+
+
+oura_fetcher = AsyncOuraFetcher(oura_client, max_concurrency=config.OURA_ASYNC_CONCURRENCY)
@@ -0,0 +1,213 @@
+import bisect
+import logging
+import random
+import threading
+import time
+from collections import OrderedDict
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+import requests
+from requests.adapters import HTTPAdapter
+from src import config
+
+logger = logging.getLogger(__name__)
+
+RETRY_STATUSES = (500, 502, 503, 504)
+LATENCY_BUCKETS = [0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30]
+MAX_TRACKED_TOKENS = 10000
+
+
+# Token bucket per Oura access token, so one user's backfill cannot spend everyone's share of the API
+class RateLimiter:
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    # Takes a token if the key has one and returns 0, otherwise returns the seconds until it will
+    def try_acquire(self, key):
+        if not self.rate:
+            return 0
+        with self._lock:
+            now = time.monotonic()
+            tokens, updated = self._buckets.pop(key, (self.burst, now))
+            tokens = min(self.burst, tokens + (now - updated) * self.rate)
+            if tokens >= 1:
+                self._buckets[key] = (tokens - 1, now)
+                wait = 0
+            else:
+                self._buckets[key] = (tokens, now)
+                wait = (1 - tokens) / self.rate
+            while len(self._buckets) > MAX_TRACKED_TOKENS:
+                self._buckets.popitem(last=False)
+        return wait
+
+    # Blocks until the key has a token available
+    def acquire(self, key):
+        while True:
+            wait = self.try_acquire(key)
+            if not wait:
+                return
+            time.sleep(wait)
+
+
+class LatencyHistogram:
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, seconds):
+        self.counts[bisect.bisect_left(self.buckets, seconds)] += 1
+        self.total += seconds
+        self.count += 1
+
+    def to_dict(self):
+        labels = [f"le_{bucket}" for bucket in self.buckets] + ["le_inf"]
+        return {'buckets': dict(zip(labels, self.counts)), 'count': self.count, 'sum': self.total}
+
+
+# Seconds the response's Retry-After header asks to wait, in either of its forms, None without a usable one
+def retry_after(response):
+    value = response.headers.get('Retry-After')
+    if value is None:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        try:
+            return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+        except (TypeError, ValueError):
+            return None
+
+
+# Shared, connection-pooled HTTP client for the Oura API. Keeps TLS connections alive between requests,
+# applies timeouts, retries 429 (honouring Retry-After) and transient failures with jittered backoff,
+# and rate limits per access token
+class OuraClient:
+    def __init__(self, pool_connections=4, pool_maxsize=32, connect_timeout=5, read_timeout=30,
+                 max_retries=3, backoff_base=0.5, backoff_max=30, rate_limit=None, rate_burst=10):
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.rate_limiter = RateLimiter(rate_limit, rate_burst)
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+        self._lock = threading.Lock()
+        self._latency = {}
+        self.requests = 0
+        self.retries = 0
+        self.rate_limited = 0
+        self.errors = 0
+
+    # Jittered delay before retry attempt + 1, the server's Retry-After when it sent one
+    def backoff(self, attempt, retry_after=None):
+        if retry_after is not None:
+            return min(retry_after, self.backoff_max) + random.uniform(0, self.backoff_base)
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    # Counts a request to url that took seconds in its path's latency histogram
+    def observe(self, url, seconds):
+        path = urlsplit(url).path
+        with self._lock:
+            self.requests += 1
+            histogram = self._latency.get(path)
+            if histogram is None:
+                histogram = self._latency[path] = LatencyHistogram()
+            histogram.observe(seconds)
+
+    # 429s are always retried since Oura did not process the request, 5xx and connection errors only
+    # for idempotent methods
+    def request(self, method, url, rate_key=None, **kwargs):
+        kwargs.setdefault('timeout', self.timeout)
+        idempotent = method.upper() in ('GET', 'HEAD', 'OPTIONS')
+        for attempt in range(self.max_retries + 1):
+            if rate_key:
+                self.rate_limiter.acquire(rate_key)
+            start = time.perf_counter()
+            try:
+                response = self.session.request(method, url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                self.observe(url, time.perf_counter() - start)
+                if not idempotent or attempt == self.max_retries:
+                    with self._lock:
+                        self.errors += 1
+                    raise
+                delay = self.backoff(attempt)
+                logger.warning(f"Oura request to {url} failed ({e}), retrying in {delay:.2f}s")
+            else:
+                self.observe(url, time.perf_counter() - start)
+                retryable = response.status_code == 429 or (idempotent and response.status_code in RETRY_STATUSES)
+                if not retryable or attempt == self.max_retries:
+                    if response.status_code >= 400:
+                        with self._lock:
+                            self.errors += 1
+                    return response
+                if response.status_code == 429:
+                    with self._lock:
+                        self.rate_limited += 1
+                delay = self.backoff(attempt, retry_after(response))
+                logger.warning(f"Oura responded {response.status_code} for {url}, retrying in {delay:.2f}s")
+                response.close()
+            with self._lock:
+                self.retries += 1
+            time.sleep(delay)
+
+    def get(self, url, params=None, headers=None):
+        rate_key = (headers or {}).get('Authorization')
+        return self.request('GET', url, rate_key=rate_key, params=params, headers=headers)
+
+    def post(self, url, **kwargs):
+        return self.request('POST', url, **kwargs)
+
+    def get_json(self, url, params=None, headers=None):
+        response = self.get(url, params=params, headers=headers)
+        response.raise_for_status()
+        return response.json()
+
+    # Follows Oura's next_token, yielding one page (the decoded JSON body) at a time
+    def iter_pages(self, url, params=None, headers=None):
+        params = dict(params or {})
+        while True:
+            page = self.get_json(url, params=params, headers=headers)
+            yield page
+            next_token = page.get('next_token') if isinstance(page, dict) else None
+            if not next_token:
+                return
+            params['next_token'] = next_token
+
+    # All pages joined into a single {'data': [...]} body, error bodies without data are returned as is
+    def fetch_all(self, url, params=None, headers=None):
+        pages = self.iter_pages(url, params=params, headers=headers)
+        first = next(pages)
+        if 'data' not in first:
+            return first
+        data = list(first['data'])
+        for page in pages:
+            data.extend(page.get('data', []))
+        return {'data': data}
+
+    def stats(self):
+        with self._lock:
+            return {
+                'requests': self.requests,
+                'retries': self.retries,
+                'rate_limited': self.rate_limited,
+                'errors': self.errors,
+                'latency_seconds': {path: histogram.to_dict() for path, histogram in self._latency.items()},
+            }
+
+
+oura_client = OuraClient(pool_maxsize=config.OURA_POOL_SIZE,
+                         connect_timeout=config.OURA_CONNECT_TIMEOUT,
+                         read_timeout=config.OURA_READ_TIMEOUT,
+                         max_retries=config.OURA_MAX_RETRIES,
+                         rate_limit=config.OURA_RATE_LIMIT,
+                         rate_burst=config.OURA_RATE_BURST)
@@ -0,0 +1,137 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import bcrypt
+from src import config
+
+
+class TooManyRequests(Exception):
+    pass
+
+
+# Runs bcrypt on a small dedicated pool, so a burst of logins uses at most max_workers cores and queues
+# behind them instead of holding every waitress thread. The bcrypt extension releases the GIL while hashing,
+# so the pool's threads run in parallel with each other and with request threads. Hashes are the same
+# $2b$ format flask_bcrypt produced, so existing passwords keep verifying
+class PasswordHasher:
+    def __init__(self, rounds=12, max_workers=2, max_pending=32, timeout=30):
+        self.rounds = rounds
+        self.timeout = timeout
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="bcrypt")
+        self._pending = threading.BoundedSemaphore(max_pending)
+        self._lock = threading.Lock()
+
+        self.hashes = 0
+        self.checks = 0
+        self.rehashes = 0
+        self.rejected = 0
+        self.hash_seconds = 0.0
+
+    def _run(self, fn, *args):
+        # Past max_pending queued hashes, shed load rather than let the queue grow without bound
+        if not self._pending.acquire(blocking=False):
+            with self._lock:
+                self.rejected += 1
+            raise TooManyRequests("Too many password checks in progress")
+        try:
+            start = time.perf_counter()
+            result = self._executor.submit(fn, *args).result(timeout=self.timeout)
+            with self._lock:
+                self.hash_seconds += time.perf_counter() - start
+            return result
+        finally:
+            self._pending.release()
+
+    def hash(self, password):
+        with self._lock:
+            self.hashes += 1
+        return self._run(bcrypt.hashpw, password.encode('utf-8'), bcrypt.gensalt(self.rounds)).decode('utf-8')
+
+    def check(self, hashed, password):
+        with self._lock:
+            self.checks += 1
+        try:
+            return self._run(bcrypt.checkpw, password.encode('utf-8'), hashed.encode('utf-8'))
+        except ValueError:
+            # Not a bcrypt hash
+            return False
+
+    # True when the hash was made with another cost than the configured one, e.g. after BCRYPT_LOG_ROUNDS changed
+    def needs_rehash(self, hashed):
+        try:
+            return int(hashed.split('$')[2]) != self.rounds
+        except (IndexError, ValueError):
+            return True
+
+    # A new hash when the stored one uses another cost, to be saved after the password checked out
+    def rehash(self, hashed, password):
+        if not self.needs_rehash(hashed):
+            return None
+        with self._lock:
+            self.rehashes += 1
+        return self.hash(password)
+
+    def stats(self):
+        with self._lock:
+            operations = self.hashes + self.checks
+            return {
+                'rounds': self.rounds,
+                'hashes': self.hashes,
+                'checks': self.checks,
+                'rehashes': self.rehashes,
+                'rejected': self.rejected,
+                'avg_seconds': self.hash_seconds / operations if operations else 0.0,
+            }
+
+
+# Caps how many requests per key (client IP, email) may be in flight at once
+class ConcurrencyLimiter:
+    def __init__(self, max_per_key=2):
+        self.max_per_key = max_per_key
+        self._active = {}
+        self._lock = threading.Lock()
+        self.limited = 0
+
+    def acquire(self, keys):
+        with self._lock:
+            if any(self._active.get(key, 0) >= self.max_per_key for key in keys):
+                self.limited += 1
+                raise TooManyRequests("Too many concurrent requests, try again shortly")
+            for key in keys:
+                self._active[key] = self._active.get(key, 0) + 1
+
+    def release(self, keys):
+        with self._lock:
+            for key in keys:
+                count = self._active.get(key, 0) - 1
+                if count > 0:
+                    self._active[key] = count
+                else:
+                    self._active.pop(key, None)
+
+    def limit(self, *keys):
+        return _Held(self, [key for key in keys if key])
+
+    def stats(self):
+        with self._lock:
+            return {'active_keys': len(self._active), 'limited': self.limited}
+
+
+class _Held:
+    def __init__(self, limiter, keys):
+        self.limiter = limiter
+        self.keys = keys
+
+    def __enter__(self):
+        self.limiter.acquire(self.keys)
+        return self
+
+    def __exit__(self, *exc):
+        self.limiter.release(self.keys)
+        return False
+
+
+password_hasher = PasswordHasher(rounds=config.BCRYPT_LOG_ROUNDS,
+                                 max_workers=config.PASSWORD_HASH_WORKERS,
+                                 max_pending=config.PASSWORD_HASH_MAX_PENDING)
+auth_limiter = ConcurrencyLimiter(max_per_key=config.AUTH_MAX_CONCURRENT)
@@ -0,0 +1,76 @@
+import pandas as pd
+from datetime import datetime, timezone
+from src.db.firestore import db
+from src.db.collections import display_info
+from src.utils import batch_writer
+from src.services.model_registry import model_registry
+from src.services.inference import batch_predictor
+from src.services.features import FEATURE_COLUMNS, feature_matrix
+from src.services.display_cache import display_cache
+from src import config
+
+# Only what the features need, the heart_rate/hrv series stay on the server
+RESCORE_FIELDS = sorted(set(FEATURE_COLUMNS) | {'day', 'email', 'model_run_id'})
+
+# Set once a full scan has given every row stored before run ids one. Sync always stores the run id, so no
+# such row appears afterwards and later rescores skip the scan
+legacy_scan = db.collection('rescoring').document('legacy-scan')
+
+
+def _batches(docs, batch_size):
+    batch = []
+    for doc in docs:
+        batch.append(doc)
+        if len(batch) == batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+# Rows scored by another run come from a model_run_id != query, which only reads those rows. A != filter never
+# matches rows without the field, so until the legacy scan is done they are found by streaming the rest
+def _stale_docs(query, run_id, scan_legacy):
+    yield from query.where('model_run_id', '!=', run_id).select(RESCORE_FIELDS).stream()
+    if scan_legacy:
+        for doc in query.select(RESCORE_FIELDS).stream():
+            if doc.to_dict().get('model_run_id') is None:
+                yield doc
+
+
+# Re-predicts the stored display_info rows whose recommendation came from another model run than the current
+# production one (or from before run ids were stored), batch_size rows at a time, and merges the new
+# recommendation and run id into them. Rows already scored by the current run are not read
+def rescore(email=None, batch_size=None):
+    batch_size = batch_size or config.RESCORE_BATCH_SIZE
+    run_id = model_registry.get()[0]
+    query = display_info.where('email', '==', email) if email else display_info
+    scan_legacy = not legacy_scan.get().exists
+
+    summary = {'run_id': run_id, 'rescored': 0, 'batches': 0, 'users': 0, 'legacy_scan': scan_legacy}
+    users = set()
+    for docs in _batches(_stale_docs(query, run_id, scan_legacy), batch_size):
+        df = pd.DataFrame([doc.to_dict() for doc in docs]).reindex(columns=RESCORE_FIELDS)
+        labels, scored_run_id = batch_predictor.score(feature_matrix(df))
+        batch_writer.write([
+            (doc.reference, {'recommendation': label, 'model_run_id': scored_run_id})
+            for doc, label in zip(docs, labels.tolist())
+        ], merge=True)
+
+        users |= set(df['email'].dropna())
+        summary['rescored'] += len(docs)
+        summary['batches'] += 1
+
+    # A single user's scan leaves the other users' legacy rows
+    if scan_legacy and email is None:
+        legacy_scan.set({'completed_at': datetime.now(timezone.utc), 'run_id': run_id})
+
+    for user in users:
+        display_cache.invalidate(user)
+    summary['users'] = len(users)
+    return summary
+
+
+if __name__ == "__main__":
+    import sys
+    print(rescore(sys.argv[1] if len(sys.argv) > 1 else None))
@@ -0,0 +1,116 @@
+import logging
+import threading
+import time
+import uuid
+
+logger = logging.getLogger(__name__)
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+# Collapses concurrent calls for the same key into one. Within a process the other waitress threads wait
+# for the leader's result; with a Redis client, leaders in other processes wait on a Redis lock and then
+# read the result the leader stored (through lookup) instead of recomputing it
+class SingleFlight:
+    def __init__(self, redis_client=None, lock_ttl=60, wait_timeout=30, poll_interval=0.1, prefix='single-flight'):
+        self.redis_client = redis_client
+        self.lock_ttl = lock_ttl
+        self.wait_timeout = wait_timeout
+        self.poll_interval = poll_interval
+        self.prefix = prefix
+        self._calls = {}
+        self._lock = threading.Lock()
+
+        self.leaders = 0
+        self.shared = 0
+        self.remote_shared = 0
+        self.timeouts = 0
+
+    def do(self, key, fn, lookup=None):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.leaders += 1
+            else:
+                self.shared += 1
+
+        if not leader:
+            if not call.done.wait(self.wait_timeout):
+                with self._lock:
+                    self.timeouts += 1
+                return fn()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = self._lead(key, fn, lookup)
+            return call.result
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+
+    def _lead(self, key, fn, lookup):
+        if self.redis_client is None:
+            return fn()
+
+        lock_key = f"{self.prefix}:{key}"
+        token = uuid.uuid4().hex
+        try:
+            acquired = self.redis_client.set(lock_key, token, nx=True, ex=self.lock_ttl)
+        except Exception as e:
+            logger.warning(f"Single-flight lock unavailable, computing locally: {e}")
+            return fn()
+
+        if not acquired:
+            result = self._wait_remote(lock_key, lookup)
+            if result is not None:
+                with self._lock:
+                    self.remote_shared += 1
+                return result
+            return fn()
+
+        try:
+            return fn()
+        finally:
+            try:
+                if self.redis_client.get(lock_key) in (token, token.encode('utf-8')):
+                    self.redis_client.delete(lock_key)
+            except Exception as e:
+                logger.warning(f"Single-flight lock release failed: {e}")
+
+    # Waits for another process to finish, returning its result or None when it has to be recomputed
+    def _wait_remote(self, lock_key, lookup):
+        deadline = time.monotonic() + self.wait_timeout
+        while time.monotonic() < deadline:
+            if lookup is not None:
+                result = lookup()
+                if result is not None:
+                    return result
+            if not self.redis_client.exists(lock_key):
+                return lookup() if lookup is not None else None
+            time.sleep(self.poll_interval)
+        with self._lock:
+            self.timeouts += 1
+        return None
+
+    def stats(self):
+        with self._lock:
+            return {
+                'leaders': self.leaders,
+                'shared': self.shared,
+                'remote_shared': self.remote_shared,
+                'timeouts': self.timeouts,
+                'in_flight': len(self._calls),
+            }
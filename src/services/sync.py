@@ -0,0 +1,196 @@
+import os
+import logging
+import pandas as pd
+from datetime import datetime, timedelta
+from src.db.collections import display_info, main_raw, activity_raw, readiness_raw, sleep_raw, sleep_time_raw
+from src.utils import update_many
+from src.services.oura_client import oura_client
+from src.services.oura_async import oura_fetcher, FetchError
+from src.services.inference import batch_predictor
+from src.services.features import feature_matrix
+from src.services.display import SERIES_COLUMNS, merge_display_sources, build_display_frame
+from src.services.normalize import normalize_frame
+from src.services.timeseries_codec import encode_columns, encode_sample
+from src.services import sync_state
+from src.services.display_cache import display_cache
+
+logger = logging.getLogger(__name__)
+
+
+# Daily Oura endpoints fetched for each chunk's date window, name -> path
+DAILY_ENDPOINTS = {
+    'sleep': 'daily_sleep',
+    'activity': 'daily_activity',
+    'readiness': 'daily_readiness',
+    'sleep_time': 'sleep_time',
+}
+
+
+class SyncError(Exception):
+    def __init__(self, message, error):
+        super().__init__(message)
+        self.message = message
+        self.error = error
+
+
+def _day_after(day):
+    return (datetime.strptime(day, "%Y-%m-%d") + timedelta(days=1)).strftime("%Y-%m-%d")
+
+
+# Regroups pages of sleep periods into chunks that never split a day, since a day can hold several
+# periods (naps) and every period of a day has to be merged with the same daily data.
+# Yields (rows, is_last_chunk)
+def _main_chunks(pages):
+    carry = []
+    pending = None
+    for page in pages:
+        if 'data' not in page:
+            raise SyncError("Error getting data", page)
+        rows = carry + page['data']
+        if not rows:
+            continue
+        last_day = max(row['day'] for row in rows)
+        ready = [row for row in rows if row['day'] < last_day]
+        carry = [row for row in rows if row['day'] == last_day]
+        if ready:
+            if pending is not None:
+                yield pending, False
+            pending = ready
+    if carry:
+        if pending is not None:
+            yield pending, False
+        pending = carry
+    if pending is not None:
+        yield pending, True
+
+
+# Fetches everything Oura has for the user since their last sync, one page of sleep periods at a time.
+# Each chunk fetches the daily endpoints for its own date window, predicts recommendations, stores all six
+# collections and advances the sync watermark, so memory stays bounded by the page size however long
+# the history is and an interrupted backfill resumes where it stopped. A failed sync is recorded in the sync state
+def sync_scores(email, oura_token):
+    try:
+        return _sync(email, oura_token)
+    except Exception:
+        try:
+            sync_state.record_failure(email)
+        except Exception as e:
+            logger.warning(f"Could not record the failed sync for {email}: {e}")
+        raise
+
+
+def _sync(email, oura_token):
+    main_url = f"{os.getenv('OURA_API_BASE_URI')}/sleep"
+
+    # Get latest synced day for the user
+    current_latest = sync_state.get_latest_day(email)
+    start_date = _day_after(current_latest)
+    end_date = (datetime.now() + timedelta(days=1)).strftime("%Y-%m-%d")
+
+    params={
+        'start_date': start_date,
+        'end_date': end_date
+    }
+    headers = {
+    'Authorization': f"Bearer {oura_token}"
+    }
+
+    summary = {'chunks': 0, 'rows': 0, 'last_day': None}
+    window_start = start_date
+    pages = _guarded_pages(oura_client.iter_pages(main_url, params, headers))
+    for rows, is_last in _main_chunks(pages):
+        last_day = max(row['day'] for row in rows)
+        window_end = end_date if is_last else _day_after(last_day)
+        responses = _fetch_daily(window_start, window_end, headers)
+        written = _process_chunk(email, pd.DataFrame(rows), responses)
+
+        # Write-through: the cached display-info no longer matches what is stored
+        display_cache.invalidate(email)
+
+        summary['chunks'] += 1
+        summary['rows'] += written
+        summary['last_day'] = last_day
+        window_start = window_end
+
+    if not summary['chunks']:
+        sync_state.touch(email)
+    return summary
+
+
+def _guarded_pages(pages):
+    try:
+        yield from pages
+    except Exception as e:
+        raise SyncError("Error getting main data", str(e))
+
+
+def _fetch_daily(start_date, end_date, headers):
+    params={
+        'start_date': start_date,
+        'end_date': end_date
+    }
+
+    # Concurrent queries to Oura on the shared event loop, a failing endpoint cancels the rest
+    try:
+        return oura_fetcher.fetch_many({
+            name: (f"{os.getenv('OURA_API_BASE_URI')}/{path}", params, headers)
+            for name, path in DAILY_ENDPOINTS.items()
+        })
+    except FetchError as e:
+        raise SyncError(f"Error getting {e.name} data", str(e.error))
+
+
+def _process_chunk(email, df_main, responses):
+    df_sleep = pd.DataFrame(responses['sleep']['data'])
+    df_activity = pd.DataFrame(responses['activity']['data'])
+    df_readiness = pd.DataFrame(responses['readiness']['data'])
+    df_sleep_time = pd.DataFrame(responses['sleep_time']['data'])
+    written = 0
+
+    if len(df_main) > 0:
+        # Display info data
+        df = merge_display_sources(df_main, df_sleep, df_activity, df_sleep_time)
+
+        # met is a dict, items a list of avg movement level every 60 secs, 1440 per day, breaks database, so we compress
+        if 'met' in df_activity.columns:
+            df_activity['met'] = [encode_sample(met) for met in df_activity['met'].tolist()]
+        for column in SERIES_COLUMNS:
+            if column in df_main.columns:
+                df_main[column] = [encode_sample(sample) for sample in df_main[column].tolist()]
+
+        df_display = build_display_frame(df)
+
+
+        recommendation_original, run_id = batch_predictor.score(feature_matrix(df_display))
+
+        df_display["recommendation"] = recommendation_original
+        # Lets the rescoring job find recommendations made by an older model
+        df_display["model_run_id"] = run_id
+
+        frames = [
+            (df_display, display_info),
+            (df_main, main_raw),
+            (df_sleep, sleep_raw),
+            (df_activity, activity_raw),
+            (df_readiness, readiness_raw),
+            (df_sleep_time, sleep_time_raw),
+        ]
+        for dataframe, collection in frames:
+            dataframe['email'] = email
+            normalize_frame(dataframe, collection.id)
+
+        update_many([
+            (encode_columns(dataframe, SERIES_COLUMNS) if collection is display_info else dataframe, collection)
+            for dataframe, collection in frames
+        ], upsert=True)
+        sync_state.record_sync(email, df_display, {
+            'main': df_main,
+            'sleep': df_sleep,
+            'activity': df_activity,
+            'readiness': df_readiness,
+            'sleep_time': df_sleep_time,
+        })
+
+        written = len(df_display)
+
+    return written
@@ -0,0 +1,125 @@
+from datetime import datetime, timezone
+from firebase_admin import firestore
+from src.db.firestore import db
+from src.services.users import user_id
+
+# One document per user recording how far each Oura endpoint has been synced, so finding the
+# sync start date is a single document get instead of an ordered query over display_info.
+# Documents are keyed like users, by the hash of the email, since an email may contain '/'
+sync_state = db.collection('sync_state')
+
+DEFAULT_LATEST = '1970-01-01'
+
+# Oura endpoint name -> raw collection it is stored in
+ENDPOINT_COLLECTIONS = {
+    'main': 'main_raw',
+    'sleep': 'sleep_raw',
+    'activity': 'activity_raw',
+    'readiness': 'readiness_raw',
+    'sleep_time': 'sleep_time_raw',
+}
+
+
+def _document(email):
+    return sync_state.document(user_id(email))
+
+
+def get_state(email):
+    snapshot = _document(email).get()
+    return snapshot.to_dict() if snapshot.exists else None
+
+
+# Latest display_info day for the user, computing the state from the collections the first time it is missing
+def get_latest_day(email):
+    state = get_state(email)
+    # A failure recorded before the first backfill leaves a document without last_day
+    if state is None or 'last_day' not in state:
+        state = backfill_user(email)
+    return state.get('last_day') or DEFAULT_LATEST
+
+
+def _max_day(dataframe):
+    if dataframe is None or len(dataframe) == 0 or 'day' not in dataframe.columns:
+        return None
+    return str(dataframe['day'].max())
+
+
+def _later(current, new):
+    if current is None:
+        return new
+    if new is None:
+        return current
+    return max(current, new)
+
+
+@firestore.transactional
+def _record_in_transaction(transaction, ref, display_day, endpoint_days):
+    snapshot = ref.get(transaction=transaction)
+    state = snapshot.to_dict() if snapshot.exists else {}
+
+    endpoints = state.get('endpoints', {})
+    for endpoint, day in endpoint_days.items():
+        endpoints[endpoint] = _later(endpoints.get(endpoint), day)
+
+    transaction.set(ref, {
+        'last_day': _later(state.get('last_day'), display_day),
+        'endpoints': endpoints,
+        'last_synced_at': datetime.now(timezone.utc),
+    })
+
+
+# Advances the watermarks after a sync wrote display_info and the raw endpoint frames. No row counts are kept:
+# upserts of overlapping windows rewrite stored documents, so the size of a write says nothing about what is stored
+def record_sync(email, df_display, endpoint_frames: dict):
+    endpoint_days = {endpoint: _max_day(frame) for endpoint, frame in endpoint_frames.items()}
+    _record_in_transaction(db.transaction(), _document(email), _max_day(df_display), endpoint_days)
+
+
+# Marks a sync attempt that found nothing new, so callers scheduling syncs by last_synced_at back off
+def touch(email):
+    _document(email).set({'last_synced_at': datetime.now(timezone.utc), 'failures': 0}, merge=True)
+
+
+# Marks a failed sync attempt, so callers scheduling syncs back off further after each consecutive failure.
+# record_sync and touch reset the count. Only one sync runs per user at a time, so the read-then-write is safe
+def record_failure(email):
+    state = get_state(email) or {}
+    _document(email).set({
+        'last_failed_at': datetime.now(timezone.utc),
+        'failures': (state.get('failures') or 0) + 1,
+    }, merge=True)
+
+
+def clear(email):
+    _document(email).delete()
+
+
+def _scan(collection_name, email):
+    latest = None
+    for doc in db.collection(collection_name).where('email', '==', email).select(['day']).stream():
+        latest = _later(latest, doc.to_dict().get('day'))
+    return latest
+
+
+# Rebuilds a user's state from what is already stored, reading only the day field
+def backfill_user(email):
+    state = {
+        'last_day': _scan('display_info', email),
+        'endpoints': {},
+        'last_synced_at': None,
+    }
+    for endpoint, collection_name in ENDPOINT_COLLECTIONS.items():
+        state['endpoints'][endpoint] = _scan(collection_name, email)
+    _document(email).set(state)
+    return state
+
+
+def backfill_all():
+    emails = {doc.to_dict().get('email') for doc in db.collection('users').select(['email']).stream()}
+    for email in sorted(filter(None, emails)):
+        state = backfill_user(email)
+        print(f"{email}: last_day={state['last_day']} endpoints={state['endpoints']}")
+
+
+if __name__ == "__main__":
+    backfill_all()
@@ -0,0 +1,129 @@
+import struct
+import zlib
+import numpy as np
+
+# Binary layout for Oura item arrays stored as Firestore bytes fields:
+#   header  magic(4s) version(B) kind(B) decimals(B) count(I)
+#   body    zlib(payload)
+# KIND_INT16_DELTA payload: packed null mask + int16 first differences of values * 10**decimals
+#   (heart rate, hrv, and MET which Oura reports to one decimal)
+# KIND_FLOAT32 payload: float32 values with the bytes transposed into planes, for anything else
+MAGIC = b'HVTS'
+VERSION = 1
+KIND_INT16_DELTA = 0
+KIND_FLOAT32 = 1
+HEADER = struct.Struct('<4sBBBI')
+MAX_DECIMALS = 3
+
+# Keeps every first difference of an int16 series inside int16
+INT16_DELTA_LIMIT = 2 ** 14
+COMPRESSION_LEVEL = 1
+
+
+def _to_float_array(items):
+    return np.array([np.nan if item is None else item for item in items], dtype=np.float64)
+
+
+# Smallest number of decimals that represents the series exactly as int16 deltas, None if there is none
+def _int16_decimals(values, mask):
+    present = values[~mask]
+    for decimals in range(MAX_DECIMALS + 1):
+        scaled = present * 10 ** decimals
+        if np.any(np.abs(scaled) >= INT16_DELTA_LIMIT):
+            return None
+        if np.allclose(scaled, np.round(scaled), rtol=0, atol=1e-6):
+            return decimals
+    return None
+
+
+def encode(items) -> bytes:
+    values = _to_float_array(items)
+    mask = np.isnan(values)
+
+    decimals = _int16_decimals(values, mask)
+    if decimals is not None:
+        # Carry the last value over nulls so they do not break the deltas
+        filled = values.copy()
+        if mask.any():
+            idx = np.where(~mask, np.arange(len(values)), 0)
+            np.maximum.accumulate(idx, out=idx)
+            filled = filled[idx]
+            filled[np.isnan(filled)] = 0
+        ints = np.round(filled * 10 ** decimals).astype(np.int32)
+        deltas = np.diff(ints, prepend=0).astype(np.int16)
+        payload = np.packbits(mask).tobytes() + deltas.tobytes()
+        kind = KIND_INT16_DELTA
+    else:
+        floats = values.astype(np.float32)
+        payload = floats.view(np.uint8).reshape(-1, 4).T.tobytes()
+        kind = KIND_FLOAT32
+        decimals = 0
+
+    return HEADER.pack(MAGIC, VERSION, kind, decimals, len(values)) + zlib.compress(payload, COMPRESSION_LEVEL)
+
+
+def is_encoded(value) -> bool:
+    return isinstance(value, (bytes, bytearray)) and value[:len(MAGIC)] == MAGIC
+
+
+def _header(blob):
+    magic, version, kind, decimals, count = HEADER.unpack_from(blob)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError("Not an encoded time series")
+    return kind, decimals, count
+
+
+# Returns a float array with NaN where the original series had nulls
+def decode(blob) -> np.ndarray:
+    blob = bytes(blob)
+    kind, decimals, count = _header(blob)
+    payload = zlib.decompress(blob[HEADER.size:])
+
+    if kind == KIND_INT16_DELTA:
+        mask_size = (count + 7) // 8
+        mask = np.unpackbits(np.frombuffer(payload[:mask_size], dtype=np.uint8), count=count).astype(bool)
+        deltas = np.frombuffer(payload[mask_size:], dtype=np.int16)
+        values = np.cumsum(deltas, dtype=np.int32) / 10 ** decimals
+        values[mask] = np.nan
+        return values
+    if kind == KIND_FLOAT32:
+        planes = np.frombuffer(payload, dtype=np.uint8).reshape(4, count)
+        return np.ascontiguousarray(planes.T).view(np.float32).reshape(count)
+    raise ValueError(f"Unknown time series kind {kind}")
+
+
+# JSON friendly form of a decoded series, nulls restored as None
+def to_list(values: np.ndarray, integral=False) -> list:
+    cast = int if integral else float
+    return [None if np.isnan(value) else cast(value) for value in values.tolist()]
+
+
+# Decodes a stored field back to a list, passing through documents written before encoding was introduced
+def decode_items(value):
+    if is_encoded(value):
+        kind, decimals, count = _header(bytes(value))
+        return to_list(decode(value), integral=kind == KIND_INT16_DELTA and decimals == 0)
+    return value
+
+
+# Returns a copy of the frame with the given list columns encoded for storage
+def encode_columns(dataframe, columns):
+    encoded = dataframe.copy(deep=False)
+    for column in columns:
+        if column in encoded.columns:
+            encoded[column] = [encode(items) if isinstance(items, list) else items for items in encoded[column].tolist()]
+    return encoded
+
+
+def decode_record(record: dict, columns) -> dict:
+    for column in columns:
+        if column in record:
+            record[column] = decode_items(record[column])
+    return record
+
+
+# Encodes the items list inside Oura sample dicts such as met, without mutating the originals
+def encode_sample(sample):
+    if not isinstance(sample, dict) or not isinstance(sample.get('items'), list):
+        return sample
+    return {**sample, 'items': encode(sample['items'])}
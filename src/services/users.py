@@ -0,0 +1,156 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from google.api_core import exceptions
+from src.db.firestore import db
+from src.utils import batch_writer
+from src import config
+
+users_ref = db.collection('users')
+
+
+class UserExists(Exception):
+    pass
+
+
+def normalize_email(email):
+    return email.strip().lower()
+
+
+# User documents live at sha256(normalized email), so finding a user is a document get instead of a query
+def user_id(email):
+    return hashlib.sha256(normalize_email(email).encode('utf-8')).hexdigest()
+
+
+# Recently read user records per process. Entries expire after ttl seconds, and updates made through this
+# module drop them at once; other worker processes see an update once their entry expires
+class UserCache:
+    def __init__(self, ttl=60, max_size=10000):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            self._entries.pop(key, None)
+            self.misses += 1
+            return None
+
+    def set(self, key, value):
+        if not self.ttl:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'cached': len(self._entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': self.hits / lookups if lookups else 0.0,
+            }
+
+
+user_cache = UserCache(ttl=config.USER_CACHE_TTL)
+
+
+# Documents created before ids were derived from the email, only looked up while USERS_LEGACY_LOOKUP is on
+def _find_legacy(email):
+    docs = users_ref.where('email', '==', email).limit(1).get()
+    return (docs[0].reference, docs[0].to_dict()) if docs else (None, None)
+
+
+# Returns (document reference, user record), or (None, None) when there is no such user
+def find_user(email):
+    key = user_id(email)
+    cached = user_cache.get(key)
+    if cached is not None:
+        return users_ref.document(cached[0]), cached[1]
+
+    snapshot = users_ref.document(key).get()
+    if snapshot.exists:
+        ref, record = snapshot.reference, snapshot.to_dict()
+    elif config.USERS_LEGACY_LOOKUP:
+        ref, record = _find_legacy(email)
+    else:
+        ref, record = None, None
+
+    if ref is not None:
+        user_cache.set(key, (ref.id, record))
+    return ref, record
+
+
+# Creates the user at their email's id. The create fails if the document exists, so two concurrent
+# signups for one email cannot both succeed
+def create_user(record):
+    if config.USERS_LEGACY_LOOKUP and _find_legacy(record['email'])[0] is not None:
+        raise UserExists(record['email'])
+    key = user_id(record['email'])
+    try:
+        users_ref.document(key).create(record)
+    except exceptions.Conflict:
+        raise UserExists(record['email'])
+    user_cache.set(key, (key, dict(record)))
+    return record
+
+
+# Updates fields of an existing user and returns the updated record, without reading the document back
+def update_user(email, fields):
+    ref, record = find_user(email)
+    if ref is None:
+        return None
+    ref.update(fields)
+    record = {**record, **fields}
+    user_cache.set(user_id(email), (ref.id, record))
+    return record
+
+
+# One-off job moving users stored under random ids onto their email's id. Users whose email already has a
+# document (duplicate signups) are left in place and reported
+def migrate_users():
+    summary = {'scanned': 0, 'moved': 0, 'duplicates': []}
+    copies = []
+    deletes = []
+    targets = set()
+    for doc in users_ref.stream():
+        summary['scanned'] += 1
+        record = doc.to_dict()
+        if not record.get('email'):
+            continue
+        target = user_id(record['email'])
+        if doc.id == target:
+            targets.add(target)
+            continue
+        if target in targets or users_ref.document(target).get().exists:
+            summary['duplicates'].append(doc.id)
+            continue
+        targets.add(target)
+        copies.append((users_ref.document(target), record))
+        deletes.append((doc.reference, None))
+        summary['moved'] += 1
+    # Old documents are only deleted once every copy is committed
+    batch_writer.write(copies)
+    batch_writer.write(deletes)
+    return summary
+
+
+if __name__ == "__main__":
+    print(migrate_users())
@@ -1,48 +1,55 @@
 import pandas as pd
 from src.db.firestore import db
-import requests
+from src.services.batch_writer import BatchWriter
+from src import config
 import pickle
+import hashlib
+
+batch_writer = BatchWriter(db, max_workers=config.FIRESTORE_WRITE_WORKERS, max_retries=config.FIRESTORE_WRITE_RETRIES)
 
 def load_label_encoder(filename):
     with open(filename, 'rb') as f:
         return pickle.load(f)
 
-def fetch_data(url, params, headers):
-    response = requests.get(url, headers=headers, params=params)
-    response.raise_for_status()
-    return response.json()
-
-def update_db(dataframe:pd.DataFrame, collection:db.collection):
-    batch = db.batch()
-
-    for i, row in dataframe.iterrows():
-        record = row.to_dict()
-        doc_ref = collection.document()
-        batch.set(doc_ref, record)
-
-         # Firestore allows a maximum of 500 operations per batch
-        if (i + 1) % 500 == 0:
-            batch.commit()
-            batch = db.batch()
-    batch.commit()
-
-def delete_email_data(collection: db.collection, email: str):
-    try:
-        to_remove = collection.where('email', '==', email).stream()
-        batch = db.batch()
-        count = 0
-        for doc in to_remove:
-            batch.delete(doc.reference)
-            count += 1
-            # Firestore allows a maximum of 500 operations per batch
-            if count == 500:
-                batch.commit()
-                batch = db.batch()
-                count = 0
-        if count > 0:
-            batch.commit()
-    except Exception as e:
-        print(f"Error deleting data from {collection.id} for {email}: {e}")
+# Columns identifying one row of each collection, used for deterministic document ids in upsert mode
+collection_keys = {
+    'display_info': ['email', 'day', 'bedtime_start'],
+    'main_raw': ['email', 'id'],
+    'sleep_raw': ['email', 'id'],
+    'activity_raw': ['email', 'id'],
+    'readiness_raw': ['email', 'id'],
+    'sleep_time_raw': ['email', 'id'],
+}
+
+def document_id(record: dict, key_columns):
+    key = "|".join(str(record.get(column)) for column in key_columns)
+    return hashlib.sha256(key.encode('utf-8')).hexdigest()
+
+def record_key_columns(collection_id, columns):
+    key_columns = collection_keys.get(collection_id, ['email', 'day'])
+    # Fall back to email and day for frames without an Oura id
+    if not all(column in columns for column in key_columns):
+        key_columns = ['email', 'day']
+    return key_columns
+
+def prepare_writes(dataframe:pd.DataFrame, collection:db.collection, upsert=False):
+    key_columns = record_key_columns(collection.id, dataframe.columns) if upsert else None
+    writes = []
+    for record in dataframe.to_dict(orient='records'):
+        if key_columns:
+            doc_ref = collection.document(document_id(record, key_columns))
+        else:
+            doc_ref = collection.document()
+        writes.append((doc_ref, record))
+    return writes
+
+# Writes several (dataframe, collection) pairs at the same time through the shared batch writer.
+# With upsert, re-syncing overlapping days overwrites the same documents instead of appending duplicates
+def update_many(frames, upsert=False):
+    writes = []
+    for dataframe, collection in frames:
+        writes.extend(prepare_writes(dataframe, collection, upsert))
+    return batch_writer.write(writes)
 
 default_values = {
     'int64': 0,
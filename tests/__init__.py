@@ -0,0 +1,25 @@
+import os
+import sys
+import types
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+os.environ.setdefault("ENVIRONMENT", "development")
+
+# Services are imported without src/__init__, which builds the Flask app and registers every route (and with
+# them the Firestore and Redis clients). The src package only carries the config the services read, and
+# src.db.firestore hands out an in-memory client instead of connecting with the service account
+if "src" not in sys.modules:
+    src = types.ModuleType("src")
+    src.__path__ = [os.path.join(ROOT, "src")]
+    sys.modules["src"] = src
+
+    from src.config.config import Config
+    src.config = Config().dev_config
+
+    from tests.fakes import FakeFirestore
+    firestore = types.ModuleType("src.db.firestore")
+    firestore.db = FakeFirestore()
+    sys.modules["src.db.firestore"] = firestore
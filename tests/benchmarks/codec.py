@@ -0,0 +1,52 @@
+import base64
+import timeit
+import zlib
+import numpy as np
+from src.services.timeseries_codec import encode, decode_items
+
+# python -m tests.benchmarks.codec
+# Stored size and encode/decode time per series, the str()+zlib+base64 scheme update_scores used for MET before
+# the codec vs timeseries_codec. The old decode evaluated the text back into a list
+
+
+def legacy_encode(items):
+    return base64.b64encode(zlib.compress(str(items).encode('utf-8'))).decode('utf-8')
+
+
+def legacy_decode(value):
+    return eval(zlib.decompress(base64.b64decode(value)).decode('utf-8'))
+
+
+def series(seed=0):
+    rng = np.random.default_rng(seed)
+    met = np.round(np.clip(rng.gamma(1.5, 0.8, 1440) + 0.9, 0.9, 12), 1).tolist()
+    heart_rate = [None if i % 17 == 0 else float(v) for i, v in enumerate(rng.integers(48, 75, 96))]
+    hrv = [None if i % 11 == 0 else float(v) for i, v in enumerate(rng.integers(20, 120, 96))]
+    noisy = rng.uniform(0, 5, 1440).tolist()
+    return {
+        'met (1440, 1 decimal)': met,
+        'heart_rate (96)': heart_rate,
+        'hrv (96)': hrv,
+        'float32 fallback (1440)': noisy,
+    }
+
+
+def _us(fn, number=200):
+    return min(timeit.repeat(fn, number=number, repeat=5)) / number * 1e6
+
+
+def main():
+    print(f"{'series':>24} {'scheme':>8} {'bytes':>7} {'encode us':>10} {'decode us':>10}")
+    for name, items in series().items():
+        old, new = legacy_encode(items), encode(items)
+        assert decode_items(new) == items or name.startswith('float32')
+        rows = [
+            ('str+b64', len(old), _us(lambda: legacy_encode(items)), _us(lambda: legacy_decode(old))),
+            ('codec', len(new), _us(lambda: encode(items)), _us(lambda: decode_items(new))),
+        ]
+        for scheme, size, encode_us, decode_us in rows:
+            print(f"{name:>24} {scheme:>8} {size:>7} {encode_us:>10.1f} {decode_us:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
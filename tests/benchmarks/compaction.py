@@ -0,0 +1,52 @@
+import json
+from src.services import compaction
+from src.services.batch_writer import BatchWriter
+from src.utils import collection_keys, document_id
+from tests.fakes import FakeFirestore
+from tests.oura_frames import display_records
+
+# python -m tests.benchmarks.compaction
+# Documents and bytes a full display-info read streams for one user whose history was synced several times
+# with random document ids (the old update_db) and then once more with upserts, before and after
+# compact_collection, and the reads the compaction itself made
+
+EMAIL = 'bench@example.com'
+
+
+def seed(client, days, legacy_syncs):
+    collection = client.collection('display_info')
+    records = [{**record, 'email': EMAIL} for record in display_records(days)]
+    for sync in range(legacy_syncs):
+        for i, record in enumerate(records):
+            collection.document(f"legacy-{sync}-{i:05d}").set(record)
+    for record in records:
+        collection.document(document_id(record, collection_keys['display_info'])).set(record)
+
+
+def read_display_info(client):
+    start = client.reads
+    body = [doc.to_dict() for doc in client.collection('display_info').where('email', '==', EMAIL).stream()]
+    return client.reads - start, len(json.dumps(body, default=str))
+
+
+def main():
+    print(f"{'days':>6} {'syncs':>6} {'docs before':>12} {'KB before':>10} {'docs after':>11} {'KB after':>9} "
+          f"{'compaction reads':>17}")
+    for days in (30, 365):
+        for legacy_syncs in (1, 3):
+            client = FakeFirestore()
+            compaction.db = client
+            compaction.batch_writer = BatchWriter(client)
+            seed(client, days, legacy_syncs)
+
+            docs_before, size_before = read_display_info(client)
+            start = client.reads
+            compaction.compact_collection('display_info', EMAIL)
+            compaction_reads = client.reads - start
+            docs_after, size_after = read_display_info(client)
+            print(f"{days:>6} {legacy_syncs + 1:>6} {docs_before:>12} {size_before / 1024:>10.0f} {docs_after:>11} "
+                  f"{size_after / 1024:>9.0f} {compaction_reads:>17}")
+
+
+if __name__ == "__main__":
+    main()
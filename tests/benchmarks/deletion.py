@@ -0,0 +1,67 @@
+import os
+import time
+from src.services import deletion
+from src.services.batch_writer import BatchWriter, MAX_BATCH_OPERATIONS
+from src.services.deletion import USER_COLLECTIONS
+from tests.fakes import FakeFirestore, RecordingCache
+
+# python -m tests.benchmarks.deletion
+# Time to delete one user's documents from the six user collections, the old sequential 500-delete batches
+# vs delete_user_data. Runs against the Firestore emulator when FIRESTORE_EMULATOR_HOST is set, otherwise
+# against the in-memory fake with a 30 ms commit round trip
+
+EMAIL = 'bench@example.com'
+
+
+def _client():
+    if os.getenv('FIRESTORE_EMULATOR_HOST'):
+        from google.cloud import firestore
+        return firestore.Client(project=os.getenv('GCLOUD_PROJECT', 'demo-benchmark')), 'emulator'
+    return FakeFirestore(commit_latency=0.03), 'fake, 30 ms commits'
+
+
+def _seed(client, collections, count):
+    writer = BatchWriter(client)
+    for collection in collections:
+        writer.write([(collection.document(f"{EMAIL}-{i}"), {'email': EMAIL, 'day': f"2024-01-{i % 28 + 1:02d}",
+                                                             'score': i})
+                      for i in range(count)])
+
+
+# The deletion remove_data ran before the deletion service, one collection after another
+def sequential_delete(client, collections):
+    for collection in collections:
+        batch = client.batch()
+        pending = 0
+        for doc in collection.where('email', '==', EMAIL).stream():
+            batch.delete(doc.reference)
+            pending += 1
+            if pending == MAX_BATCH_OPERATIONS:
+                batch.commit()
+                batch = client.batch()
+                pending = 0
+        if pending:
+            batch.commit()
+
+
+def main():
+    client, backend = _client()
+    collections = [client.collection(collection.id) for collection in USER_COLLECTIONS]
+    deletion.batch_writer = BatchWriter(client)
+    deletion.display_cache = RecordingCache()
+    print(f"backend: {backend}")
+    print(f"{'docs/collection':>16} {'sequential s':>13} {'deletion s':>11} {'speedup':>8}")
+    for count in (1000, 5000, 20000):
+        _seed(client, collections, count)
+        start = time.perf_counter()
+        sequential_delete(client, collections)
+        old = time.perf_counter() - start
+
+        _seed(client, collections, count)
+        report = deletion.delete_user_data(EMAIL, collections=collections)
+        assert report['deleted'] == count * len(collections)
+        print(f"{count:>16} {old:>13.2f} {report['seconds']:>11.2f} {old / report['seconds']:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,20 @@
+import timeit
+from src.services.display import merge_display_sources, build_display_frame
+from tests.oura_frames import oura_frames
+from tests.test_display import reference_display_frame
+
+# python -m tests.benchmarks.display
+# Display frame build time for 30, 365 and 3650 days of Oura data, iterrows loop vs column-wise build
+
+
+def main(repeat=5):
+    print(f"{'days':>6} {'iterrows ms':>12} {'columns ms':>12} {'speedup':>8}")
+    for days in (30, 365, 3650):
+        frames = oura_frames(days)
+        old = min(timeit.repeat(lambda: reference_display_frame(*frames), number=1, repeat=repeat))
+        new = min(timeit.repeat(lambda: build_display_frame(merge_display_sources(*frames)), number=1, repeat=repeat))
+        print(f"{days:>6} {old * 1000:>12.1f} {new * 1000:>12.1f} {old / new:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
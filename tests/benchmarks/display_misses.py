@@ -0,0 +1,97 @@
+import threading
+import time
+import fakeredis
+import jwt
+from flask import Flask
+from src.controllers import data_controller
+from src.middlewares import auth
+from src.middlewares.auth import TokenVerifier
+from src.services import sync_state
+from src.services.display_cache import DisplayCache
+from src.services.jobs import JobQueue, LocalJobStore
+from src.services.single_flight import SingleFlight
+from src.utils import collection_keys, document_id
+from tests.fakes import FakeFirestore
+from tests.oura_frames import display_records
+
+# python -m tests.benchmarks.display_misses
+# Concurrent GET /display-info cache misses for one user, with and without single-flight. The requests go
+# through the real route and data_controller._build_display_info, with display_info on the in-memory Firestore
+# (50 ms per query), the display cache on fakeredis and the background sync replaced by one that only
+# records it ran. Prints the display_info queries/documents read and the syncs queued per burst
+
+CONCURRENCY = (1, 5, 20, 50)
+DAYS = 365
+EMAIL = 'load@example.com'
+SECRET = 'benchmark-secret-of-at-least-thirty-two-bytes'
+
+
+# Every caller rebuilds on its own, the route before single-flight
+class NoFlight:
+    def do(self, key, fn, lookup=None):
+        return fn()
+
+
+def _seed(client):
+    collection = client.collection('display_info')
+    for record in display_records(DAYS):
+        record = {**record, 'email': EMAIL}
+        collection.document(document_id(record, collection_keys['display_info'])).set(record)
+
+
+def _app():
+    app = Flask(__name__)
+    app.register_blueprint(data_controller.data)
+    return app
+
+
+def _burst(concurrency, app, client, syncs):
+    token = jwt.encode({'email': EMAIL, 'oura_token': 'token', 'exp': int(time.time()) + 3600}, SECRET, algorithm='HS256')
+    data_controller.display_cache.invalidate(EMAIL)
+    data_controller.job_queue = JobQueue(LocalJobStore())
+    sync_state.clear(EMAIL)
+    syncs.clear()
+
+    def request():
+        response = app.test_client().get('/display-info', headers={'Authorization': f"Bearer {token}"})
+        assert response.status_code == 200 and len(response.json['data']) == DAYS
+
+    client.queries = client.reads = 0
+    threads = [threading.Thread(target=request) for _ in range(concurrency)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    seconds = time.perf_counter() - start
+    # Lets the queued syncs run
+    time.sleep(0.2)
+    return client.queries, client.reads, len(syncs), seconds
+
+
+def main():
+    client = FakeFirestore(query_latency=0.05)
+    _seed(client)
+    syncs = []
+
+    def sync_scores(email, oura_token):
+        syncs.append(email)
+        sync_state.touch(email)
+
+    auth.token_verifier = TokenVerifier(SECRET)
+    data_controller.display_info = client.collection('display_info')
+    data_controller.display_cache = DisplayCache(fakeredis.FakeRedis(), ttl=60)
+    data_controller.sync_scores = sync_scores
+    app = _app()
+
+    print(f"{'misses':>6} {'single-flight':>13} {'fs queries':>10} {'fs reads':>9} {'syncs':>6} {'seconds':>8}")
+    for concurrency in CONCURRENCY:
+        for flight in (NoFlight(), SingleFlight()):
+            data_controller.display_flight = flight
+            queries, reads, synced, seconds = _burst(concurrency, app, client, syncs)
+            on = isinstance(flight, SingleFlight)
+            print(f"{concurrency:>6} {'on' if on else 'off':>13} {queries:>10} {reads:>9} {synced:>6} {seconds:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+import gzip
+import json
+import timeit
+import brotli
+import msgpack
+import orjson
+from src.middlewares.encoding import OrjsonProvider, to_columnar, GZIP_LEVEL, BROTLI_QUALITY
+from tests.oura_frames import display_records
+
+# python -m tests.benchmarks.encoding
+# Serialization of display-info responses at 30, 365 and 3650 days (heart_rate/hrv series included):
+# the stdlib json Flask used before, orjson, the columnar layout and MessagePack, and what gzip and
+# brotli at the middleware's levels make of the orjson body
+
+
+def _time(fn, repeat=5):
+    return min(timeit.repeat(fn, number=1, repeat=repeat)) * 1000
+
+
+def main():
+    print(f"{'days':>6} {'encoding':>18} {'KB':>9} {'ms':>8}")
+    for days in (30, 365, 3650):
+        payload = {'message': "success", 'data': display_records(days)}
+        body = orjson.dumps(payload, option=OrjsonProvider.options)
+        encoders = {
+            'json (stdlib)': lambda: json.dumps(payload, default=str).encode('utf-8'),
+            'orjson': lambda: orjson.dumps(payload, option=OrjsonProvider.options),
+            'orjson columnar': lambda: orjson.dumps(to_columnar(payload), option=OrjsonProvider.options),
+            'msgpack': lambda: msgpack.packb(payload, use_bin_type=True),
+            'msgpack columnar': lambda: msgpack.packb(to_columnar(payload), use_bin_type=True),
+            'orjson + gzip': lambda: gzip.compress(body, compresslevel=GZIP_LEVEL),
+            'orjson + brotli': lambda: brotli.compress(body, quality=BROTLI_QUALITY),
+        }
+        for name, encode in encoders.items():
+            print(f"{days:>6} {name:>18} {len(encode()) / 1024:>9.1f} {_time(encode):>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+import os
+import tempfile
+import threading
+import time
+import numpy as np
+import pandas as pd
+from src.services.features import FEATURE_COLUMNS
+from src.services.inference import BatchPredictor
+from tests.models import pyfunc_model, StaticRegistry
+
+# python -m tests.benchmarks.inference
+# Recommendation predictions from concurrent request threads, each scoring 30 rows (a month of days):
+# the per-request pyfunc call every request made before BatchPredictor, BatchPredictor without batching
+# (window 0) and with its default 5 ms window, both on the native booster
+
+THREADS = (1, 8, 32)
+REQUESTS_PER_THREAD = 50
+ROWS = 30
+
+
+def _run(threads, predict):
+    rng = np.random.default_rng(0)
+    frames = [pd.DataFrame(rng.uniform(0, 100, (ROWS, len(FEATURE_COLUMNS))).astype(np.float32),
+                           columns=FEATURE_COLUMNS) for _ in range(threads)]
+    latencies = []
+    lock = threading.Lock()
+
+    def worker(df):
+        for _ in range(REQUESTS_PER_THREAD):
+            start = time.perf_counter()
+            predict(df)
+            with lock:
+                latencies.append(time.perf_counter() - start)
+
+    workers = [threading.Thread(target=worker, args=(df,)) for df in frames]
+    start = time.perf_counter()
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    return len(latencies) / elapsed, np.percentile(latencies, 50) * 1000, np.percentile(latencies, 99) * 1000
+
+
+def main():
+    with tempfile.TemporaryDirectory() as directory:
+        model, label_encoder = pyfunc_model(os.path.join(directory, 'model'))
+    registry = StaticRegistry(model, label_encoder)
+    unbatched = BatchPredictor(registry, window=0)
+    batched = BatchPredictor(registry, window=0.005)
+    paths = {
+        'pyfunc per request': lambda df: label_encoder.inverse_transform(model.predict(df)),
+        'native, window 0': lambda df: unbatched.score(df),
+        'native, window 5ms': lambda df: batched.score(df),
+    }
+
+    print(f"{'threads':>7} {'path':>20} {'requests/s':>11} {'p50 ms':>8} {'p99 ms':>8}")
+    for threads in THREADS:
+        for name, predict in paths.items():
+            throughput, p50, p99 = _run(threads, predict)
+            print(f"{threads:>7} {name:>20} {throughput:>11.0f} {p50:>8.2f} {p99:>8.2f}")
+    print(f"avg rows per batch with the window: {batched.stats()['avg_batch_rows']:.0f}")
+
+
+if __name__ == "__main__":
+    main()
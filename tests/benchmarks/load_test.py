@@ -0,0 +1,108 @@
+import argparse
+import logging
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import requests
+from flask import Flask, Response, json
+from waitress.server import create_server
+from tests.oura_frames import display_records
+
+# python -m tests.benchmarks.load_test
+#   Serves a stand-in app with waitress at each of --threads request threads and reports throughput and latency.
+#   1 in 4 requests waits 200 ms like an Oura-bound update_scores, the rest serialize 30 days of display-info.
+# python -m tests.benchmarks.load_test --url http://localhost:8080/api/v1/... --header "Authorization: Bearer ..."
+#   Loads a server that is already running instead, e.g. app.py with other settings or gunicorn -c gunicorn.conf.py
+
+OURA_LATENCY = 0.2
+
+
+def stand_in_app():
+    app = Flask(__name__)
+    records = display_records(30)
+
+    @app.route('/update-scores')
+    def update_scores():
+        time.sleep(OURA_LATENCY)
+        return Response(response=json.dumps({'message': 'ok'}), status=200, mimetype='application/json')
+
+    @app.route('/display-info')
+    def display_info():
+        return Response(response=json.dumps(records, default=str), status=200, mimetype='application/json')
+
+    return app
+
+
+# Sends total requests from concurrency client threads, each with its own keep-alive session.
+# Returns (requests/s, p50 s, p95 s, errors)
+def load(urls, concurrency, total, headers=None):
+    local = threading.local()
+    latencies = []
+    errors = 0
+    lock = threading.Lock()
+
+    def call(i):
+        nonlocal errors
+        if not hasattr(local, 'session'):
+            local.session = requests.Session()
+        start = time.perf_counter()
+        try:
+            ok = local.session.get(urls[i % len(urls)], headers=headers, timeout=60).ok
+        except requests.RequestException:
+            ok = False
+        elapsed = time.perf_counter() - start
+        with lock:
+            latencies.append(elapsed)
+            errors += not ok
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(call, range(total)))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return total / elapsed, statistics.median(latencies), latencies[int(len(latencies) * 0.95)], errors
+
+
+def sweep(concurrency, total, thread_counts, connection_limit):
+    # A deep task queue is the point of the smaller thread counts, not worth a warning per request
+    logging.getLogger('waitress.queue').setLevel(logging.ERROR)
+    app = stand_in_app()
+    print(f"{concurrency} clients, {total} requests, 1 in 4 waits {OURA_LATENCY * 1000:.0f} ms on a stand-in Oura call, "
+          f"connection limit {connection_limit}")
+    print(f"{'threads':>8} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'errors':>7}")
+    for threads in thread_counts:
+        server = create_server(app, host='127.0.0.1', port=0, threads=threads, connection_limit=connection_limit,
+                               backlog=1024, channel_timeout=120, asyncore_use_poll=True)
+        threading.Thread(target=server.run, daemon=True).start()
+        base = f"http://127.0.0.1:{server.effective_port}"
+        urls = [f"{base}/update-scores"] + [f"{base}/display-info"] * 3
+        try:
+            throughput, p50, p95, errors = load(urls, concurrency, total)
+        finally:
+            server.close()
+        print(f"{threads:>8} {throughput:>8.0f} {p50 * 1000:>8.1f} {p95 * 1000:>8.1f} {errors:>7}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Throughput and latency under concurrent load")
+    parser.add_argument('--url', action='append', help="load a running server at this URL instead of the sweep")
+    parser.add_argument('--header', action='append', default=[], help="'Name: value' sent with every request")
+    parser.add_argument('--concurrency', type=int, default=64)
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--threads', type=int, nargs='+', default=[4, 8, 16, 32], help="WAITRESS_THREADS to sweep")
+    parser.add_argument('--connection-limit', type=int, default=100, help="WAITRESS_CONNECTION_LIMIT of the sweep, "
+                        "clients past it wait for a keep-alive connection to close")
+    args = parser.parse_args()
+
+    if not args.url:
+        sweep(args.concurrency, args.requests, args.threads, args.connection_limit)
+        return
+    headers = dict(header.split(': ', 1) for header in args.header)
+    throughput, p50, p95, errors = load(args.url, args.concurrency, args.requests, headers)
+    print(f"{args.concurrency} clients: {throughput:.0f} req/s, p50 {p50 * 1000:.1f} ms, p95 {p95 * 1000:.1f} ms, "
+          f"{errors} errors")
+
+
+if __name__ == "__main__":
+    main()
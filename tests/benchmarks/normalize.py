@@ -0,0 +1,21 @@
+import timeit
+import pandas as pd
+from src.services.normalize import normalize_frame
+from tests.test_normalize import synced_frames
+
+# python -m tests.benchmarks.normalize
+# normalize_frame time per collection for the recorded Oura responses repeated to 365 and 3650 rows
+
+
+def main(repeat=5):
+    frames = synced_frames()
+    print(f"{'collection':>15} {'rows':>6} {'ms':>8}")
+    for collection_id, frame in frames.items():
+        for rows in (365, 3650):
+            df = pd.concat([frame] * -(-rows // len(frame)), ignore_index=True).head(rows)
+            elapsed = min(timeit.repeat(lambda: normalize_frame(df.copy(), collection_id), number=1, repeat=repeat))
+            print(f"{collection_id:>15} {rows:>6} {elapsed * 1000:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
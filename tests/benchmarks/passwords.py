@@ -0,0 +1,69 @@
+import json
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import bcrypt
+from src.services.passwords import PasswordHasher, TooManyRequests
+from tests.oura_frames import display_records
+
+# python -m tests.benchmarks.passwords
+# A burst of 200 logins (bcrypt cost 10) served by 16 request threads next to a steady stream of display-info
+# requests (json.dumps of 30 records). Reports login throughput, logins shed with 429 and display-info latency
+# for bcrypt inline in the request threads vs PasswordHasher pools of 1, 2 and 4 workers, and a pool of 2 that
+# sheds logins past 8 queued
+
+ROUNDS = 10
+LOGINS = 200
+REQUEST_THREADS = 16
+
+
+def run(check):
+    password = 'correct horse battery staple'
+    hashed = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(ROUNDS)).decode('utf-8')
+    records = display_records(30)
+    latencies = []
+    shed = 0
+    done = threading.Event()
+
+    def login(_):
+        nonlocal shed
+        try:
+            assert check(hashed, password)
+        except TooManyRequests:
+            shed += 1
+
+    def display():
+        while not done.is_set():
+            start = time.perf_counter()
+            json.dumps(records, default=str)
+            latencies.append(time.perf_counter() - start)
+            time.sleep(0.005)
+
+    reader = threading.Thread(target=display)
+    reader.start()
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=REQUEST_THREADS) as executor:
+        list(executor.map(login, range(LOGINS)))
+    elapsed = time.perf_counter() - start
+    done.set()
+    reader.join()
+    latencies.sort()
+    return (LOGINS - shed) / elapsed, shed, statistics.median(latencies), latencies[int(len(latencies) * 0.95)]
+
+
+def main():
+    variants = [('inline', lambda hashed, password: bcrypt.checkpw(password.encode('utf-8'), hashed.encode('utf-8')))]
+    for workers in (1, 2, 4):
+        hasher = PasswordHasher(rounds=ROUNDS, max_workers=workers, max_pending=LOGINS)
+        variants.append((f"pool of {workers}", hasher.check))
+    variants.append(('2, 8 queued', PasswordHasher(rounds=ROUNDS, max_workers=2, max_pending=8).check))
+
+    print(f"{'variant':>12} {'logins/s':>9} {'shed':>5} {'display p50 ms':>15} {'display p95 ms':>15}")
+    for name, check in variants:
+        throughput, shed, p50, p95 = run(check)
+        print(f"{name:>12} {throughput:>9.1f} {shed:>5} {p50 * 1000:>15.2f} {p95 * 1000:>15.2f}")
+
+
+if __name__ == "__main__":
+    main()
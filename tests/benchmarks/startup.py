@@ -0,0 +1,60 @@
+import os
+import pickle
+import subprocess
+import sys
+import tempfile
+from tests.models import pyfunc_model
+
+# python -m tests.benchmarks.startup
+# Seconds until a fresh process has imported the data blueprint and can serve requests, with the model loaded
+# at import like before the registry vs ModelRegistry.start(), and the time until the model is ready.
+# Both load the same local MODEL_DIR, so the old path's calls to the MLflow server are not even counted
+
+LEGACY = """
+import time
+start = time.perf_counter()
+import tests
+from src.controllers import data_controller
+import mlflow
+from src.utils import load_label_encoder
+model = mlflow.pyfunc.load_model(os.path.join(model_dir, 'model'))
+label_encoder = load_label_encoder(os.path.join(model_dir, 'label_encoder.pkl'))
+print(time.perf_counter() - start, time.perf_counter() - start)
+"""
+
+REGISTRY = """
+import time
+start = time.perf_counter()
+import tests
+from src.controllers import data_controller
+from src.services.model_registry import model_registry
+model_registry.start()
+boot = time.perf_counter() - start
+model_registry._ready.wait()
+print(boot, time.perf_counter() - start)
+"""
+
+
+def run(code, model_dir):
+    env = {**os.environ, 'MODEL_DIR': model_dir, 'MLFLOW_DISABLE_AGENT_HINT': '1'}
+    output = subprocess.check_output([sys.executable, '-c', f"import os\nmodel_dir = {model_dir!r}\n{code}"],
+                                     env=env, cwd=os.path.dirname(os.path.dirname(os.path.dirname(__file__))),
+                                     stderr=subprocess.DEVNULL)
+    boot, ready = output.decode().split()[-2:]
+    return float(boot), float(ready)
+
+
+def main(repeat=3):
+    with tempfile.TemporaryDirectory() as model_dir:
+        _, label_encoder = pyfunc_model(os.path.join(model_dir, 'model'))
+        with open(os.path.join(model_dir, 'label_encoder.pkl'), 'wb') as f:
+            pickle.dump(label_encoder, f)
+
+        print(f"{'variant':>16} {'boot s':>8} {'model ready s':>14}")
+        for name, code in (('blocking import', LEGACY), ('registry.start()', REGISTRY)):
+            boot, ready = min(run(code, model_dir) for _ in range(repeat))
+            print(f"{name:>16} {boot:>8.2f} {ready:>14.2f}")
+
+
+if __name__ == "__main__":
+    main()
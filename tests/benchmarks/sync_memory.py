@@ -0,0 +1,79 @@
+import argparse
+import os
+import resource
+import subprocess
+import sys
+import time
+from datetime import datetime, timedelta
+from tests.oura_frames import oura_rows
+from tests.stub_oura import StubOuraServer
+
+# python -m tests.benchmarks.sync_memory
+# Peak RSS of a full-history Oura sync against a local stub server, for growing history lengths. "paged"
+# is sync_scores, fetching and processing one page of sleep periods at a time; "whole" fetches every
+# endpoint's full history first and processes it in one go, as update_scores did before pagination.
+# Each run is its own process so ru_maxrss is not shared. Firestore writes, predictions and the sync
+# watermark are replaced by no-ops so only fetching and transforming is measured
+
+HISTORIES = (365, 1825, 3650)
+
+
+def _peak_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _patch(sync):
+    sync.sync_state.get_latest_day = lambda email: '1970-01-01'
+    sync.sync_state.record_sync = lambda *args: None
+    sync.sync_state.touch = lambda email: None
+    sync.display_cache.invalidate = lambda email: None
+    sync.batch_predictor.score = lambda matrix: (['Unknown'] * len(matrix), 'benchmark')
+    sync.update_many = lambda frames, upsert=False: sum(len(frame) for frame, _ in frames)
+
+
+def _whole(sync, headers):
+    base = os.environ['OURA_API_BASE_URI']
+    end_date = (datetime.now() + timedelta(days=1)).strftime("%Y-%m-%d")
+    params = {'start_date': '1970-01-02', 'end_date': end_date}
+    main = sync.oura_client.fetch_all(f"{base}/sleep", params, headers)
+    responses = {name: sync.oura_client.fetch_all(f"{base}/{path}", params, headers)
+                 for name, path in sync.DAILY_ENDPOINTS.items()}
+    return sync._process_chunk('benchmark@example.com', sync.pd.DataFrame(main['data']), responses)
+
+
+def run(days, mode):
+    with StubOuraServer(page_size=100) as server:
+        for path, rows in oura_rows(days).items():
+            server.serve(f"/v2/usercollection/{path}", rows)
+        os.environ['OURA_API_BASE_URI'] = f"{server.url}/v2/usercollection"
+
+        from src.services import sync
+        _patch(sync)
+        baseline = _peak_mb()
+        start = time.perf_counter()
+        if mode == 'paged':
+            rows = sync.sync_scores('benchmark@example.com', 'token')['rows']
+        else:
+            rows = _whole(sync, {'Authorization': 'Bearer token'})
+        print(f"{days} {mode} {rows} {_peak_mb() - baseline:.1f} {time.perf_counter() - start:.2f}")
+
+
+def main():
+    print(f"{'days':>6} {'mode':>6} {'rows':>6} {'peak RSS over baseline MB':>26} {'seconds':>8}")
+    for days in HISTORIES:
+        for mode in ('whole', 'paged'):
+            output = subprocess.run([sys.executable, '-m', 'tests.benchmarks.sync_memory', '--days', str(days),
+                                     '--mode', mode], capture_output=True, text=True, check=True).stdout
+            days_run, mode_run, rows, peak, seconds = output.split()[-5:]
+            print(f"{days_run:>6} {mode_run:>6} {rows:>6} {peak:>26} {seconds:>8}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--days', type=int)
+    parser.add_argument('--mode', choices=['paged', 'whole'])
+    args = parser.parse_args()
+    if args.days:
+        run(args.days, args.mode)
+    else:
+        main()
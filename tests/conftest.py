@@ -0,0 +1,8 @@
+import pytest
+from tests.stub_oura import StubOuraServer
+
+
+@pytest.fixture
+def oura_server():
+    with StubOuraServer() as server:
+        yield server
@@ -0,0 +1,244 @@
+import copy
+import threading
+import time
+import uuid
+from google.api_core import exceptions
+
+
+# Like Firestore, a filter never matches a document without the field, and only == matches null
+MISSING = object()
+
+
+def _present(value):
+    return value is not MISSING and value is not None
+
+
+OPERATORS = {
+    '==': lambda a, b: a is not MISSING and a == b,
+    '!=': lambda a, b: _present(a) and a != b,
+    '>=': lambda a, b: _present(a) and a >= b,
+    '<=': lambda a, b: _present(a) and a <= b,
+    '>': lambda a, b: _present(a) and a > b,
+    '<': lambda a, b: _present(a) and a < b,
+}
+
+
+# In-memory stand-in for the parts of the Firestore client the services use: collections, document
+# references, snapshots, simple queries and write batches. Queue exceptions on fail_commits to make the
+# next commits raise, and set commit_latency (query_latency) to make every commit (query) take that many seconds
+# like a round trip would. queries and reads count streamed queries and the documents they returned. Transactions work with
+# firestore.transactional: they commit only if the documents they read are unchanged, otherwise Aborted retries
+class FakeFirestore:
+    def __init__(self, commit_latency=0, query_latency=0):
+        self.documents = {}
+        self.commit_latency = commit_latency
+        self.query_latency = query_latency
+        self.commits = []
+        self.fail_commits = []
+        self.queries = 0
+        self.reads = 0
+        self._lock = threading.Lock()
+
+    def collection(self, name):
+        return FakeCollection(self, name)
+
+    def batch(self):
+        return FakeBatch(self)
+
+    def transaction(self, max_attempts=5):
+        return FakeTransaction(self, max_attempts)
+
+
+class FakeQuery:
+    def __init__(self, client, collection, filters=(), orders=(), fields=None, count=None, after=None):
+        self._client = client
+        self._collection = collection
+        self._filters = filters
+        self._orders = orders
+        self._fields = fields
+        self._count = count
+        self._after = after
+
+    def _with(self, **changes):
+        state = {'filters': self._filters, 'orders': self._orders, 'fields': self._fields, 'count': self._count,
+                 'after': self._after, **changes}
+        return FakeQuery(self._client, self._collection, **state)
+
+    def where(self, field, op, value):
+        return self._with(filters=self._filters + ((field, OPERATORS[op], value),))
+
+    def order_by(self, field, direction='ASCENDING'):
+        return self._with(orders=self._orders + ((field, direction),))
+
+    def select(self, fields):
+        return self._with(fields=list(fields))
+
+    def limit(self, count):
+        return self._with(count=count)
+
+    # A snapshot, or a dict of the order_by field values (__name__ a document reference) to start after
+    def start_after(self, cursor):
+        if isinstance(cursor, dict):
+            values = {field: value.id if isinstance(value, FakeDocumentReference) else value
+                      for field, value in cursor.items()}
+        else:
+            values = {**cursor.to_dict(), '__name__': cursor.id}
+        return self._with(after=values)
+
+    def _value(self, document_id, data, field):
+        return document_id if field == '__name__' else data.get(field)
+
+    def _is_after(self, document_id, data):
+        for field, direction in self._orders or (('__name__', 'ASCENDING'),):
+            value, cursor = self._value(document_id, data, field), self._after.get(field)
+            if value != cursor:
+                return value > cursor if direction == 'ASCENDING' else value < cursor
+        return False
+
+    def stream(self):
+        if self._client.query_latency:
+            time.sleep(self._client.query_latency)
+        prefix = f"{self._collection}/"
+        with self._client._lock:
+            matches = [(path[len(prefix):], dict(data)) for path, data in self._client.documents.items()
+                       if path.startswith(prefix) and '/' not in path[len(prefix):]]
+        matches = [(document_id, data) for document_id, data in matches
+                   if all(test(data.get(field, MISSING), value) for field, test, value in self._filters)]
+        matches.sort(key=lambda match: match[0])
+        for field, direction in reversed(self._orders):
+            matches.sort(key=lambda match: self._value(*match, field), reverse=direction == 'DESCENDING')
+        if self._after is not None:
+            matches = [match for match in matches if self._is_after(*match)]
+        if self._count is not None:
+            matches = matches[:self._count]
+        with self._client._lock:
+            self._client.queries += 1
+            self._client.reads += len(matches)
+        for document_id, data in matches:
+            if self._fields is not None:
+                data = {field: data[field] for field in self._fields if field in data}
+            yield FakeSnapshot(FakeDocumentReference(self._client, self._collection, document_id), data)
+
+    def get(self):
+        return list(self.stream())
+
+
+class FakeCollection(FakeQuery):
+    def __init__(self, client, name):
+        super().__init__(client, name)
+        self.id = name
+
+    def document(self, document_id=None):
+        return FakeDocumentReference(self._client, self.id, document_id or uuid.uuid4().hex)
+
+
+class FakeDocumentReference:
+    def __init__(self, client, collection, document_id):
+        self._client = client
+        self.id = document_id
+        self.path = f"{collection}/{document_id}"
+
+    def get(self, transaction=None):
+        with self._client._lock:
+            data = copy.deepcopy(self._client.documents.get(self.path))
+        if transaction is not None:
+            transaction._reads.setdefault(self.path, copy.deepcopy(data))
+        return FakeSnapshot(self, data)
+
+    def set(self, data, merge=False):
+        with self._client._lock:
+            current = self._client.documents.get(self.path) if merge else None
+            self._client.documents[self.path] = {**(current or {}), **data}
+
+    def delete(self):
+        with self._client._lock:
+            self._client.documents.pop(self.path, None)
+
+
+class FakeSnapshot:
+    def __init__(self, reference, data):
+        self.reference = reference
+        self.id = reference.id
+        self.exists = data is not None
+        self._data = data
+
+    def get(self, field):
+        return self._data.get(field) if self._data is not None else None
+
+    def to_dict(self):
+        return dict(self._data) if self._data is not None else None
+
+
+class FakeBatch:
+    def __init__(self, client):
+        self._client = client
+        self.operations = []
+
+    def set(self, reference, data, merge=False):
+        self.operations.append(('set', reference, data, merge))
+
+    def delete(self, reference):
+        self.operations.append(('delete', reference, None, False))
+
+    def commit(self):
+        with self._client._lock:
+            error = self._client.fail_commits.pop(0) if self._client.fail_commits else None
+        if error is not None:
+            raise error
+        if self._client.commit_latency:
+            time.sleep(self._client.commit_latency)
+        for kind, reference, data, merge in self.operations:
+            if kind == 'set':
+                reference.set(data, merge=merge)
+            else:
+                reference.delete()
+        with self._client._lock:
+            self._client.commits.append(len(self.operations))
+
+
+# The parts of Transaction that firestore.transactional drives: _begin, _commit, _rollback and _clean_up
+class FakeTransaction:
+    def __init__(self, client, max_attempts=5):
+        self._client = client
+        self._max_attempts = max_attempts
+        self._read_only = False
+        self._id = None
+        self._reads = {}
+        self._writes = []
+        self.commits = 0
+        self.aborts = 0
+
+    def _begin(self, retry_id=None):
+        self._id = uuid.uuid4().hex.encode('utf-8')
+
+    def _clean_up(self):
+        self._reads = {}
+        self._writes = []
+        self._id = None
+
+    def _rollback(self):
+        self._clean_up()
+
+    def set(self, reference, data, merge=False):
+        self._writes.append((reference, data, merge))
+
+    def _commit(self):
+        with self._client._lock:
+            if any(self._client.documents.get(path) != data for path, data in self._reads.items()):
+                self.aborts += 1
+                self._clean_up()
+                raise exceptions.Aborted("Transaction read documents that changed")
+            for reference, data, merge in self._writes:
+                current = self._client.documents.get(reference.path) if merge else None
+                self._client.documents[reference.path] = {**(current or {}), **data}
+            self.commits += 1
+        self._clean_up()
+
+
+# Stands in for the display cache of services that only invalidate it, recording who was invalidated
+class RecordingCache:
+    def __init__(self):
+        self.invalidated = []
+
+    def invalidate(self, email):
+        self.invalidated.append(email)
@@ -0,0 +1,35 @@
+import numpy as np
+import pandas as pd
+from src.services.features import FEATURE_COLUMNS
+
+RECOMMENDATIONS = ["Go to bed earlier", "Keep it up", "Take it easy today"]
+
+
+# A small XGBoost classifier over FEATURE_COLUMNS saved as an MLflow model and loaded through pyfunc, like
+# the production run, with the label encoder it was trained with
+def pyfunc_model(path, columns=FEATURE_COLUMNS, seed=0):
+    import mlflow.pyfunc
+    import mlflow.xgboost
+    import xgboost
+    from sklearn.preprocessing import LabelEncoder
+
+    rng = np.random.default_rng(seed)
+    features = pd.DataFrame(rng.uniform(0, 100, (600, len(columns))).astype(np.float32), columns=list(columns))
+    labels = np.array(RECOMMENDATIONS)[(features.iloc[:, 0] // 34).astype(int)]
+    label_encoder = LabelEncoder().fit(labels)
+    classifier = xgboost.XGBClassifier(n_estimators=20, max_depth=4)
+    classifier.fit(features, label_encoder.transform(labels))
+
+    mlflow.xgboost.save_model(classifier, str(path))
+    return mlflow.pyfunc.load_model(str(path)), label_encoder
+
+
+# Stands in for ModelRegistry, serving one loaded run
+class StaticRegistry:
+    def __init__(self, model, label_encoder, run_id='run-1'):
+        self.model = model
+        self.label_encoder = label_encoder
+        self.run_id = run_id
+
+    def get(self, run_id=None):
+        return self.run_id, self.model, self.label_encoder
@@ -0,0 +1,88 @@
+import numpy as np
+import pandas as pd
+
+
+# Synthetic Oura frames shaped like the daily endpoints' JSON after pd.DataFrame: sleep periods (main),
+# daily sleep, daily activity and sleep time. Every 7th day has no daily sleep, and every 5th/11th/13th
+# sleep period lacks its readiness, heart_rate or hrv dict
+def oura_frames(days, sleep_time=True, seed=0, start="2020-01-01"):
+    rng = np.random.default_rng(seed)
+    day = pd.date_range(start, periods=days, freq="D").strftime("%Y-%m-%d").tolist()
+    starts = pd.date_range(f"{start} 22:30", periods=days, freq="D")
+    offsets = ["-07:00" if i % 3 else "+02:00" for i in range(days)]
+
+    def items(n):
+        return [None if v < 45 else float(v) for v in rng.integers(40, 90, n)]
+
+    df_main = pd.DataFrame({
+        "id": [f"sleep-{i}" for i in range(days)],
+        "day": day,
+        "efficiency": rng.integers(60, 100, days),
+        "total_sleep_duration": rng.integers(14000, 32000, days),
+        "awake_time": rng.integers(600, 6000, days),
+        "rem_sleep_duration": rng.integers(2000, 9000, days),
+        "light_sleep_duration": rng.integers(8000, 18000, days),
+        "deep_sleep_duration": rng.integers(2000, 8000, days),
+        "latency": rng.integers(60, 2400, days),
+        "bedtime_start": [f"{s:%Y-%m-%dT%H:%M:%S}.000{o}" for s, o in zip(starts, offsets)],
+        "bedtime_end": [f"{s + pd.Timedelta(hours=8):%Y-%m-%dT%H:%M:%S}.000{o}" for s, o in zip(starts, offsets)],
+        "heart_rate": [None if i % 11 == 0 else {"interval": 300.0, "items": items(96), "timestamp": day[i]}
+                       for i in range(days)],
+        "average_heart_rate": rng.uniform(45, 70, days),
+        "hrv": [None if i % 13 == 0 else {"interval": 300.0, "items": items(96), "timestamp": day[i]}
+                for i in range(days)],
+        "average_hrv": rng.integers(20, 120, days),
+        "type": ["long_sleep" if i % 4 else "late_nap" for i in range(days)],
+        "readiness": [None if i % 5 == 0 else {"score": int(rng.integers(40, 100)), "temperature_deviation": 0.1}
+                      for i in range(days)],
+    })
+
+    sleep_days = [d for i, d in enumerate(day) if i % 7]
+    df_sleep = pd.DataFrame({
+        "id": [f"daily-sleep-{d}" for d in sleep_days],
+        "day": sleep_days,
+        "score": rng.integers(50, 100, len(sleep_days)),
+        "contributors": [{"restfulness": int(rng.integers(40, 100)), "efficiency": 90} for _ in sleep_days],
+    })
+    df_activity = pd.DataFrame({
+        "id": [f"activity-{d}" for d in day],
+        "day": day,
+        "score": rng.integers(30, 100, days),
+    })
+    df_sleep_time = pd.DataFrame({
+        "id": [f"sleep-time-{d}" for d in day],
+        "day": day,
+        "recommendation": ["earlier_bedtime" if i % 2 else "follow_optimal_bedtime" for i in range(days)],
+        "status": ["only_recommended_found" if i % 3 else "optimal_found" for i in range(days)],
+    }) if sleep_time else pd.DataFrame()
+    return df_main, df_sleep, df_activity, df_sleep_time
+
+
+# The same data as the JSON rows the Oura endpoints return for the last days days, endpoint path -> rows.
+# Daily activity also carries its 1440-item met series, the bulk of a real response
+def oura_rows(days, seed=0):
+    start = (pd.Timestamp.now().normalize() - pd.Timedelta(days=days)).strftime("%Y-%m-%d")
+    df_main, df_sleep, df_activity, df_sleep_time = oura_frames(days, seed=seed, start=start)
+    df_activity = df_activity.assign(met=[{"interval": 60.0, "items": [1.1] * 1440, "timestamp": day}
+                                          for day in df_activity["day"]])
+    df_readiness = pd.DataFrame({
+        "id": [f"readiness-{d}" for d in df_activity["day"]],
+        "day": df_activity["day"],
+        "score": np.random.default_rng(seed).integers(40, 100, days),
+    })
+    return {
+        "sleep": df_main.to_dict("records"),
+        "daily_sleep": df_sleep.to_dict("records"),
+        "daily_activity": df_activity.to_dict("records"),
+        "daily_readiness": df_readiness.to_dict("records"),
+        "sleep_time": df_sleep_time.to_dict("records"),
+    }
+
+
+# display-info records as the endpoint returns them, heart_rate and hrv series included
+def display_records(days):
+    from src.services.display import merge_display_sources, build_display_frame
+    df_display = build_display_frame(merge_display_sources(*oura_frames(days)))
+    df_display["recommendation"] = "Keep it up"
+    df_display["model_run_id"] = "run"
+    return df_display.to_dict(orient="records")
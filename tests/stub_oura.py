@@ -0,0 +1,98 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+
+
+# Local HTTP server standing in for the Oura API. Each path serves its rows in pages linked by next_token,
+# after first replaying any scripted (status, body, headers) responses queued for it. Like Oura, rows are
+# filtered to the start_date..end_date days when those are given. Requests are recorded, and max_in_flight
+# is the most requests it was handling at once
+class StubOuraServer:
+    def __init__(self, page_size=100):
+        self.page_size = page_size
+        self.rows = {}
+        self.scripted = {}
+        self.delays = {}
+        self.requests = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), self._handler())
+        self._server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self._server.server_port}"
+
+    def __enter__(self):
+        threading.Thread(target=self._server.serve_forever, args=(0.05,), daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def serve(self, path, rows):
+        self.rows[path] = list(rows)
+
+    def script(self, path, *responses):
+        self.scripted.setdefault(path, []).extend(responses)
+
+    def delay(self, path, seconds):
+        self.delays[path] = seconds
+
+    def count(self, path):
+        with self._lock:
+            return sum(1 for request in self.requests if request['path'] == path)
+
+    def _respond(self, path, query):
+        with self._lock:
+            scripted = self.scripted.get(path)
+            if scripted:
+                return scripted.pop(0)
+        if path not in self.rows:
+            return 404, {'detail': 'Not Found'}, {}
+        rows = self.rows[path]
+        if 'start_date' in query or 'end_date' in query:
+            first = query.get('start_date', [''])[0]
+            last = query.get('end_date', ['9999-12-31'])[0]
+            rows = [row for row in rows if first <= row['day'] <= last]
+        start = int(query.get('next_token', ['0'])[0])
+        end = start + self.page_size
+        body = {'data': rows[start:end], 'next_token': str(end) if end < len(rows) else None}
+        return 200, body, {}
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                url = urlsplit(self.path)
+                query = parse_qs(url.query)
+                with stub._lock:
+                    stub.requests.append({'path': url.path, 'query': query, 'headers': dict(self.headers)})
+                    stub.in_flight += 1
+                    stub.max_in_flight = max(stub.max_in_flight, stub.in_flight)
+                try:
+                    if stub.delays.get(url.path):
+                        time.sleep(stub.delays[url.path])
+                    status, body, headers = stub._respond(url.path, query)
+                finally:
+                    with stub._lock:
+                        stub.in_flight -= 1
+                payload = json.dumps(body).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(payload)))
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.end_headers()
+                try:
+                    self.wfile.write(payload)
+                except (BrokenPipeError, ConnectionResetError):
+                    # The client timed out and went away
+                    pass
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
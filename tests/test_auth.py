@@ -0,0 +1,94 @@
+import time
+import jwt
+import pytest
+from flask import Flask, g, json
+from src.middlewares import auth
+from src.middlewares.auth import TokenVerifier, require_auth
+
+SECRET = 'test-secret-of-at-least-thirty-two-bytes'
+
+
+def token(exp_in=3600, secret=SECRET, **claims):
+    return jwt.encode({'email': 'a@example.com', 'exp': int(time.time()) + exp_in, **claims}, secret, algorithm='HS256')
+
+
+@pytest.fixture
+def verifier(monkeypatch):
+    verifier = TokenVerifier(SECRET, cache_size=3)
+    monkeypatch.setattr(auth, 'token_verifier', verifier)
+    return verifier
+
+
+@pytest.fixture
+def client(verifier):
+    app = Flask(__name__)
+
+    @app.route('/me')
+    @require_auth
+    def me():
+        return {'email': g.user['email']}
+
+    return app.test_client()
+
+
+def message(response):
+    return json.loads(response.data)['message']
+
+
+def test_claims_in_g(client):
+    response = client.get('/me', headers={'Authorization': f"Bearer {token()}"})
+
+    assert response.status_code == 200
+    assert response.json == {'email': 'a@example.com'}
+
+
+@pytest.mark.parametrize('header', [None, '', 'Bearer', 'Bearer ', 'a b c'])
+def test_missing_or_malformed_header(client, header):
+    response = client.get('/me', headers={'Authorization': header} if header is not None else {})
+
+    assert response.status_code == 401
+    assert message(response) == "Authorization header is missing"
+
+
+def test_expired_token(client):
+    response = client.get('/me', headers={'Authorization': f"Bearer {token(exp_in=-10)}"})
+
+    assert response.status_code == 401
+    assert message(response) == "Token has expired"
+
+
+@pytest.mark.parametrize('value', ['not-a-jwt', token(secret='other-secret-of-at-least-thirty-two-bytes')],
+                         ids=['malformed', 'wrong-secret'])
+def test_invalid_token(client, value):
+    response = client.get('/me', headers={'Authorization': f"Bearer {value}"})
+
+    assert response.status_code == 401
+    assert message(response) == "Token is invalid"
+
+
+def test_repeat_tokens_served_from_cache(verifier):
+    value = token()
+    verifier.verify(value)
+    verifier.verify(value)
+
+    assert verifier.stats()['hits'] == 1
+    assert verifier.stats()['misses'] == 1
+
+
+def test_cached_token_not_served_after_exp(verifier):
+    value = token(exp_in=1)
+    verifier.verify(value)
+    time.sleep(1.1)
+
+    with pytest.raises(jwt.ExpiredSignatureError):
+        verifier.verify(value)
+
+
+def test_cache_is_bounded(verifier):
+    values = [token(n=i) for i in range(5)]
+    for value in values:
+        verifier.verify(value)
+    verifier.verify(values[0])
+
+    assert verifier.stats()['cached'] == 3
+    assert verifier.stats()['hits'] == 0
@@ -0,0 +1,74 @@
+import pytest
+from flask import Flask
+from werkzeug.middleware.proxy_fix import ProxyFix
+from src import config
+from src.controllers import user_controller
+from src.controllers.user_controller import auth_limited
+from src.services.passwords import ConcurrencyLimiter
+
+
+class RecordingLimiter(ConcurrencyLimiter):
+    def __init__(self):
+        super().__init__()
+        self.keys = []
+
+    def acquire(self, keys):
+        self.keys.append(keys)
+        super().acquire(keys)
+
+
+@pytest.fixture
+def limiter(monkeypatch):
+    limiter = RecordingLimiter()
+    monkeypatch.setattr(user_controller, 'auth_limiter', limiter)
+    return limiter
+
+
+@pytest.fixture
+def app():
+    app = Flask(__name__)
+
+    @app.route('/login', methods=['POST'])
+    @auth_limited
+    def login():
+        return 'ok'
+
+    return app
+
+
+def test_limits_by_email_only_by_default(app, limiter, monkeypatch):
+    monkeypatch.setattr(config, 'AUTH_LIMIT_BY_IP', False)
+
+    response = app.test_client().post('/login', json={'email': ' A@Example.com'}, environ_base={'REMOTE_ADDR': '10.0.0.1'})
+
+    assert response.status_code == 200
+    assert limiter.keys == [['email:a@example.com']]
+
+
+def test_limits_by_ip_when_enabled(app, limiter, monkeypatch):
+    monkeypatch.setattr(config, 'AUTH_LIMIT_BY_IP', True)
+
+    app.test_client().post('/login', json={'email': 'a@example.com'}, environ_base={'REMOTE_ADDR': '10.0.0.1'})
+
+    assert limiter.keys == [['ip:10.0.0.1', 'email:a@example.com']]
+
+
+def test_ip_from_trusted_proxy(app, limiter, monkeypatch):
+    monkeypatch.setattr(config, 'AUTH_LIMIT_BY_IP', True)
+    app.wsgi_app = ProxyFix(app.wsgi_app, x_for=1)
+
+    # The client made up the first entry, the load balancer appended the address it saw
+    app.test_client().post('/login', json={'email': 'a@example.com'}, environ_base={'REMOTE_ADDR': '10.0.0.1'},
+                           headers={'X-Forwarded-For': '1.2.3.4, 203.0.113.7'})
+
+    assert limiter.keys == [['ip:203.0.113.7', 'email:a@example.com']]
+
+
+def test_too_many_per_email(app, limiter, monkeypatch):
+    monkeypatch.setattr(config, 'AUTH_LIMIT_BY_IP', False)
+    limiter.acquire(['email:a@example.com'])
+    limiter.acquire(['email:a@example.com'])
+
+    response = app.test_client().post('/login', json={'email': 'a@example.com'})
+
+    assert response.status_code == 429
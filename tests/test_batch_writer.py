@@ -0,0 +1,110 @@
+import pytest
+from google.api_core import exceptions
+from src.services.batch_writer import BatchWriter, MAX_BATCH_OPERATIONS
+from tests.fakes import FakeFirestore
+
+
+@pytest.fixture
+def client():
+    return FakeFirestore()
+
+
+def writes(client, count, data=None):
+    collection = client.collection('display_info')
+    return [(collection.document(f"doc-{i}"), data or {'day': f"2024-01-{i % 28 + 1:02d}", 'score': i})
+            for i in range(count)]
+
+
+def test_writes_every_operation(client):
+    writer = BatchWriter(client, base_delay=0)
+
+    assert writer.write(writes(client, 1200)) == 1200
+    assert len(client.documents) == 1200
+    assert client.documents['display_info/doc-7'] == {'day': '2024-01-08', 'score': 7}
+
+
+def test_chunks_at_operation_limit(client):
+    writer = BatchWriter(client, base_delay=0)
+    writer.write(writes(client, 1200))
+
+    assert sorted(client.commits, reverse=True) == [MAX_BATCH_OPERATIONS, MAX_BATCH_OPERATIONS, 200]
+
+
+def test_chunks_at_byte_limit(client):
+    writer = BatchWriter(client, base_delay=0, max_bytes=64 * 1024)
+    # About 10 KB per document, so 6 fit under the limit
+    operations = writes(client, 20, {'series': b'x' * 10000})
+
+    chunks = list(writer.chunk(operations))
+    assert [len(chunk) for chunk in chunks] == [6, 6, 6, 2]
+
+    writer.write(operations)
+    assert sorted(client.commits, reverse=True) == [6, 6, 6, 2]
+    assert len(client.documents) == 20
+
+
+def test_oversized_operation_gets_its_own_batch(client):
+    writer = BatchWriter(client, base_delay=0, max_bytes=1024)
+    operations = writes(client, 3, {'series': b'x' * 4096})
+
+    assert [len(chunk) for chunk in writer.chunk(operations)] == [1, 1, 1]
+
+
+def test_deletes(client):
+    writer = BatchWriter(client, base_delay=0)
+    operations = writes(client, 10)
+    writer.write(operations)
+
+    writer.write([(reference, None) for reference, _ in operations[:4]])
+    assert len(client.documents) == 6
+    assert 'display_info/doc-0' not in client.documents
+
+
+def test_merge_keeps_other_fields(client):
+    writer = BatchWriter(client, base_delay=0)
+    reference = client.collection('display_info').document('doc')
+    writer.write([(reference, {'day': '2024-01-01', 'recommendation': 'old'})])
+
+    writer.write([(reference, {'recommendation': 'new'})], merge=True)
+    assert client.documents['display_info/doc'] == {'day': '2024-01-01', 'recommendation': 'new'}
+
+
+@pytest.mark.parametrize("error", [exceptions.Aborted("contention"), exceptions.ServiceUnavailable("unavailable"),
+                                   exceptions.DeadlineExceeded("deadline")])
+def test_retries_retryable_errors(client, error):
+    writer = BatchWriter(client, base_delay=0, max_retries=3)
+    client.fail_commits = [error, error]
+
+    assert writer.write(writes(client, 10)) == 10
+    assert len(client.documents) == 10
+    assert writer.stats()['retries'] == 2
+
+
+def test_gives_up_after_max_retries(client):
+    writer = BatchWriter(client, base_delay=0, max_retries=2)
+    client.fail_commits = [exceptions.Aborted("contention")] * 3
+
+    with pytest.raises(exceptions.Aborted):
+        writer.write(writes(client, 10))
+    assert client.documents == {}
+    assert writer.stats()['failures'] == 1
+
+
+def test_does_not_retry_other_errors(client):
+    writer = BatchWriter(client, base_delay=0, max_retries=3)
+    client.fail_commits = [exceptions.PermissionDenied("denied")]
+
+    with pytest.raises(exceptions.PermissionDenied):
+        writer.write(writes(client, 10))
+    assert writer.stats()['retries'] == 0
+
+
+def test_raises_first_error_after_all_batches_settle(client):
+    writer = BatchWriter(client, max_workers=1, base_delay=0, max_operations=10)
+    client.fail_commits = [exceptions.PermissionDenied("first"), exceptions.InvalidArgument("second")]
+
+    with pytest.raises(exceptions.PermissionDenied, match="first"):
+        writer.write(writes(client, 30))
+    # The third batch still committed
+    assert client.commits == [10]
+    assert len(client.documents) == 10
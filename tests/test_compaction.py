@@ -0,0 +1,116 @@
+import pytest
+from google.api_core import exceptions
+from src.db.firestore import db
+from src.services import compaction
+from src.services.batch_writer import BatchWriter
+from src.services.compaction import compact_collection
+from src.utils import collection_keys, document_id
+
+EMAIL = 'a@example.com'
+OTHER = 'b@example.com'
+
+
+@pytest.fixture(autouse=True)
+def clean(monkeypatch):
+    db.documents.clear()
+    db.fail_commits.clear()
+    db.commits.clear()
+    monkeypatch.setattr(compaction, 'batch_writer', BatchWriter(db, base_delay=0))
+
+
+def display_row(day, email=EMAIL, **fields):
+    return {'email': email, 'day': day, 'bedtime_start': f"{day}T23:00:00.000-08:00", 'sleep_score': 80, **fields}
+
+
+def target(row, collection='display_info'):
+    return document_id(row, collection_keys[collection])
+
+
+def put(document_id_, row, collection='display_info'):
+    db.documents[f"{collection}/{document_id_}"] = dict(row)
+
+
+def get(document_id_, collection='display_info'):
+    return db.documents.get(f"{collection}/{document_id_}")
+
+
+def test_keeps_the_upserted_document_over_an_older_copy():
+    row = display_row('2024-01-01')
+    newer = {**row, 'hrv': b'HVTS-encoded', 'model_run_id': 'run-2', 'recommendation': 'Keep it up'}
+    put(target(row), newer)
+    # Streams before the hex id
+    put('000legacy', {**row, 'hrv': [40.0, 41.0], 'recommendation': 'Go to bed earlier'})
+
+    result = compact_collection('display_info')
+
+    assert get(target(row)) == newer
+    assert get('000legacy') is None
+    assert result == {'scanned': 2, 'remaining': 1, 'moved': 0, 'deleted': 1}
+
+
+def test_moves_a_legacy_document_without_a_target():
+    row = display_row('2024-01-02', hrv=[40.0])
+    put('zzzlegacy', row)
+    put('000legacy', row)
+
+    result = compact_collection('display_info')
+
+    assert get(target(row)) == row
+    assert get('zzzlegacy') is None and get('000legacy') is None
+    assert result == {'scanned': 2, 'remaining': 1, 'moved': 1, 'deleted': 2}
+
+
+def test_raw_collections_use_the_oura_id():
+    row = {'email': EMAIL, 'id': 'sleep-1', 'day': '2024-01-01', 'average_hrv': 44}
+    put('legacy-1', row, 'main_raw')
+    put('legacy-2', {**row, 'average_hrv': 45}, 'main_raw')
+
+    compact_collection('main_raw')
+
+    assert list(db.documents) == [f"main_raw/{target(row, 'main_raw')}"]
+
+
+def test_only_the_given_user():
+    mine, theirs = display_row('2024-01-01'), display_row('2024-01-01', email=OTHER)
+    put('legacy-mine', mine)
+    put('legacy-theirs', theirs)
+
+    result = compact_collection('display_info', EMAIL)
+
+    assert get(target(mine)) == mine
+    assert get('legacy-theirs') == theirs
+    assert result['scanned'] == 1
+
+
+def test_compacted_collection_is_left_alone():
+    rows = [display_row(f"2024-01-{day:02d}") for day in range(1, 11)]
+    for row in rows:
+        put(target(row), row)
+
+    result = compact_collection('display_info')
+
+    assert result == {'scanned': 10, 'remaining': 10, 'moved': 0, 'deleted': 0}
+    assert db.commits == []
+
+
+def test_scan_reads_only_key_fields(monkeypatch):
+    put('legacy', display_row('2024-01-01', heart_rate=[60.0] * 96))
+    seen = []
+    original = compaction.document_id
+    monkeypatch.setattr(compaction, 'document_id', lambda record, columns: seen.append(set(record)) or original(record, columns))
+
+    compact_collection('display_info')
+
+    assert seen == [{'email', 'day', 'bedtime_start'}]
+
+
+def test_copies_are_kept_when_the_move_fails():
+    row = display_row('2024-01-03')
+    put('legacy', row)
+    db.fail_commits.append(exceptions.PermissionDenied("denied"))
+
+    with pytest.raises(exceptions.PermissionDenied):
+        compact_collection('display_info')
+
+    assert get('legacy') == row
+    assert get(target(row)) is None
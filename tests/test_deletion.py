@@ -0,0 +1,98 @@
+import threading
+import pytest
+from google.api_core import exceptions
+from src.db.firestore import db
+from src.db.collections import display_info, main_raw
+from src.services import deletion, sync_state
+from src.services.batch_writer import BatchWriter
+from src.services.deletion import USER_COLLECTIONS, DeletionError, delete_user_data
+from tests.fakes import RecordingCache
+
+EMAIL = 'a@example.com'
+OTHER = 'b@example.com'
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    db.documents.clear()
+    db.fail_commits.clear()
+    cache = RecordingCache()
+    monkeypatch.setattr(deletion, 'display_cache', cache)
+    monkeypatch.setattr(deletion, 'batch_writer', BatchWriter(db, base_delay=0))
+    return cache
+
+
+def seed(email, count):
+    for collection in USER_COLLECTIONS:
+        for i in range(count):
+            collection.document(f"{email}-{i}").set({'email': email, 'day': f"2024-01-{i % 28 + 1:02d}"})
+
+
+def remaining(email):
+    return sum(1 for data in db.documents.values() if data.get('email') == email)
+
+
+def test_deletes_only_the_users_documents(cache):
+    seed(EMAIL, 1200)
+    seed(OTHER, 10)
+
+    report = delete_user_data(EMAIL)
+
+    assert remaining(EMAIL) == 0
+    assert remaining(OTHER) == 10 * len(USER_COLLECTIONS)
+    assert report['deleted'] == 1200 * len(USER_COLLECTIONS)
+    assert set(report['collections']) == {collection.id for collection in USER_COLLECTIONS}
+    assert all(result['deleted'] == 1200 and result['passes'] == 1 for result in report['collections'].values())
+    assert cache.invalidated == [EMAIL]
+
+
+def test_clears_sync_state(cache):
+    seed(EMAIL, 3)
+    sync_state._document(EMAIL).set({'main': {'day': '2024-01-03'}})
+
+    delete_user_data(EMAIL)
+
+    assert not sync_state._document(EMAIL).get().exists
+
+
+def test_failed_pass_is_rerun(cache):
+    seed(EMAIL, 20)
+    db.fail_commits.append(exceptions.PermissionDenied("denied"))
+
+    report = delete_user_data(EMAIL, collections=[display_info])
+
+    assert remaining(EMAIL) == 20 * (len(USER_COLLECTIONS) - 1)
+    assert report['collections']['display_info']['deleted'] == 20
+    assert report['collections']['display_info']['passes'] == 2
+
+
+def test_reports_collections_that_failed(cache):
+    seed(EMAIL, 5)
+    db.fail_commits.extend(exceptions.PermissionDenied("denied") for _ in range(deletion.MAX_PASSES))
+
+    with pytest.raises(DeletionError) as error:
+        delete_user_data(EMAIL, collections=[main_raw])
+
+    report = error.value.report
+    assert report['collections'] == {'main_raw': {'error': '403 denied'}}
+    assert report['deleted'] == 0
+    assert remaining(EMAIL) == 5 * len(USER_COLLECTIONS)
+    # The sync state is kept so the next sync does not skip what is left, the cache is dropped either way
+    assert cache.invalidated == [EMAIL]
+
+
+def test_requests_share_one_pool(cache):
+    seed(EMAIL, 5)
+    seed(OTHER, 5)
+    before = {thread.name for thread in threading.enumerate()}
+
+    threads = [threading.Thread(target=delete_user_data, args=(email,)) for email in (EMAIL, OTHER) * 4]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    started = {thread.name for thread in threading.enumerate()} - before
+    assert all(name.startswith(('deletion', 'batch-writer')) for name in started)
+    assert len([name for name in started if name.startswith('deletion')]) <= len(USER_COLLECTIONS)
+    assert remaining(EMAIL) == remaining(OTHER) == 0
@@ -0,0 +1,112 @@
+import pandas as pd
+import pandas.testing as pdt
+import pytest
+from src.services.display import merge_display_sources, build_display_frame
+from tests.oura_frames import oura_frames
+
+
+# The merge and iterrows loop update_scores used before display.py, kept as the reference output
+def reference_display_frame(df_main, df_sleep, df_activity, df_sleep_time):
+    df = df_main.merge(df_sleep[["contributors", "day", "score"]], on='day', how='left').merge(df_activity.rename({"score":"activity_score"}, axis=1)[["day","activity_score"]], on="day", how="left")
+    if(len(df_sleep_time) > 0):
+        df = df.merge(df_sleep_time[["day", "recommendation", "status"]], on="day", how="left")
+    df['contributors'] = df['contributors'].apply(lambda x: {} if pd.isna(x) else x)
+    df.sort_values(by='day', ascending=False, inplace=True)
+
+    records = []
+    for i, row in df.iterrows():
+        records.append({
+            "day": row["day"],
+            "sleep_score": row["score"],
+            "readiness_score": row.get("readiness", {}).get("score") if isinstance(row.get("readiness"), dict) else 0,
+            "activity_score": row["activity_score"],
+            "efficiency": row["efficiency"],
+            "restfulness": row.get("contributors", {}).get("restfulness") if isinstance(row.get("contributors"), dict) else 0,
+            "total_sleep": row["total_sleep_duration"],
+            "awake": row["awake_time"],
+            "rem_sleep": row["rem_sleep_duration"],
+            "light_sleep": row["light_sleep_duration"],
+            "deep_sleep": row["deep_sleep_duration"],
+            "latency": row["latency"],
+            "bedtime_start": row["bedtime_start"],
+            "bedtime_end": row["bedtime_end"],
+            "heart_rate": row.get("heart_rate", {}).get("items") if isinstance(row.get("heart_rate"), dict) else list(),
+            "average_heart_rate": row["average_heart_rate"],
+            "hrv": row.get("hrv", {}).get("items") if isinstance(row.get("hrv"), dict) else list(),
+            "average_hrv": row["average_hrv"],
+            "type": row["type"],
+            "oura_recommendation": row.get("recommendation", ""),
+            "oura_status": row.get("status", "")
+        })
+    return pd.DataFrame(records)
+
+
+def display_frame(df_main, df_sleep, df_activity, df_sleep_time):
+    return build_display_frame(merge_display_sources(df_main, df_sleep, df_activity, df_sleep_time))
+
+
+@pytest.mark.parametrize("days", [1, 30, 365])
+@pytest.mark.parametrize("sleep_time", [True, False])
+def test_matches_iterrows_output(days, sleep_time):
+    frames = oura_frames(days, sleep_time=sleep_time)
+    expected = reference_display_frame(*frames)
+    result = display_frame(*frames)
+
+    pdt.assert_frame_equal(result.reset_index(drop=True), expected.reset_index(drop=True))
+
+
+def test_sleep_time_columns():
+    df_display = display_frame(*oura_frames(30))
+
+    assert df_display["oura_recommendation"].isin(["earlier_bedtime", "follow_optimal_bedtime"]).all()
+    assert df_display["oura_status"].isin(["only_recommended_found", "optimal_found"]).all()
+
+
+def test_without_sleep_time_defaults_to_empty_strings():
+    df_display = display_frame(*oura_frames(30, sleep_time=False))
+
+    assert (df_display["oura_recommendation"] == "").all()
+    assert (df_display["oura_status"] == "").all()
+
+
+def test_missing_nested_dicts():
+    df_main, df_sleep, df_activity, df_sleep_time = oura_frames(30)
+    df_display = display_frame(df_main, df_sleep, df_activity, df_sleep_time).set_index("day")
+
+    # Day 0 has no readiness, heart_rate, hrv or daily sleep
+    first = df_main["day"][0]
+    assert df_display.at[first, "readiness_score"] == 0
+    assert df_display.at[first, "heart_rate"] == []
+    assert df_display.at[first, "hrv"] == []
+    assert pd.isna(df_display.at[first, "restfulness"])
+    assert pd.isna(df_display.at[first, "sleep_score"])
+
+    second = df_main["day"][1]
+    assert df_display.at[second, "readiness_score"] == df_main["readiness"][1]["score"]
+    assert df_display.at[second, "heart_rate"] == df_main["heart_rate"][1]["items"]
+
+
+def test_nested_columns_absent():
+    df_main, df_sleep, df_activity, df_sleep_time = oura_frames(10)
+    df_main = df_main.drop(columns=["readiness", "heart_rate", "hrv"])
+    df_display = display_frame(df_main, df_sleep, df_activity, df_sleep_time)
+
+    assert (df_display["readiness_score"] == 0).all()
+    assert df_display["heart_rate"].map(len).eq(0).all()
+    assert df_display["hrv"].map(len).eq(0).all()
+
+
+def test_sorted_newest_first():
+    df_display = display_frame(*oura_frames(30))
+
+    assert df_display["day"].tolist() == sorted(df_display["day"], reverse=True)
+
+
+def test_window_without_daily_rows():
+    df_main, df_sleep, df_activity, df_sleep_time = oura_frames(3)
+    df_display = display_frame(df_main, pd.DataFrame(), pd.DataFrame(), pd.DataFrame())
+
+    assert len(df_display) == 3
+    assert df_display["sleep_score"].isna().all()
+    assert df_display["activity_score"].isna().all()
+    assert (df_display["oura_status"] == "").all()
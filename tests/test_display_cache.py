@@ -0,0 +1,121 @@
+import time
+import pytest
+from src.db.firestore import db
+from src.services.display_cache import DisplayCache
+from src.controllers import data_controller
+
+fakeredis = pytest.importorskip('fakeredis')
+
+EMAIL = 'a@example.com'
+RECORDS = [{'day': '2024-01-02', 'sleep_score': 80}, {'day': '2024-01-01', 'sleep_score': 75}]
+
+
+@pytest.fixture
+def cache():
+    return DisplayCache(fakeredis.FakeRedis(), ttl=60, stale_ttl=600)
+
+
+def test_set_then_lookup(cache):
+    assert cache.set(EMAIL, RECORDS)
+
+    records, age, fresh = cache.lookup(EMAIL)
+    assert records == RECORDS
+    assert fresh
+    assert age < 1
+
+
+def test_stale_entries_while_revalidating(cache):
+    cache.ttl = 0
+    cache.set(EMAIL, RECORDS)
+    time.sleep(0.01)
+
+    records, _, fresh = cache.lookup(EMAIL)
+    assert records == RECORDS
+    assert not fresh
+    assert cache.peek(EMAIL) is None
+
+
+def test_invalidate_drops_every_window(cache):
+    cache.set(EMAIL, RECORDS)
+    cache.set(EMAIL, RECORDS[:1], window=('2024-01-02', None))
+    cache.set('b@example.com', RECORDS)
+
+    cache.invalidate(EMAIL)
+    assert cache.lookup(EMAIL)[0] is None
+    assert cache.lookup(EMAIL, ('2024-01-02', None))[0] is None
+    assert cache.lookup('b@example.com')[0] == RECORDS
+
+
+def test_set_with_current_generation(cache):
+    cache.invalidate(EMAIL)
+    generation = cache.generation(EMAIL)
+
+    assert cache.set(EMAIL, RECORDS, generation=generation)
+    assert cache.lookup(EMAIL)[0] == RECORDS
+
+
+def test_set_skipped_after_invalidation(cache):
+    generation = cache.generation(EMAIL)
+    cache.invalidate(EMAIL)
+
+    assert not cache.set(EMAIL, RECORDS, generation=generation)
+    assert cache.lookup(EMAIL)[0] is None
+    assert cache.stats()['skipped_sets'] == 1
+
+
+def test_generation_is_per_user(cache):
+    generation = cache.generation(EMAIL)
+    cache.invalidate('b@example.com')
+
+    assert cache.set(EMAIL, RECORDS, generation=generation)
+
+
+class SyncDuringRead:
+    # display_info whose stream lets a sync finish (and invalidate) while the rebuild is reading
+    def __init__(self, collection, cache):
+        self.collection = collection
+        self.cache = cache
+
+    def where(self, *args):
+        query = self.collection.where(*args)
+        cache = self.cache
+
+        class Query:
+            def stream(self):
+                docs = list(query.stream())
+                cache.invalidate(EMAIL)
+                yield from docs
+
+        return Query()
+
+
+@pytest.fixture
+def rebuild(cache, monkeypatch):
+    db.documents.clear()
+    for record in RECORDS:
+        db.collection('display_info').document(record['day']).set({'email': EMAIL, **record})
+    calls = []
+    monkeypatch.setattr(data_controller, 'display_cache', cache)
+    monkeypatch.setattr(data_controller, '_schedule_sync',
+                        lambda email, token: calls.append(('sync', cache.lookup(email)[0] is not None)))
+    yield calls
+    db.documents.clear()
+
+
+def test_rebuild_caches_then_schedules_sync(cache, rebuild):
+    records = data_controller._build_display_info(EMAIL, 'token')
+
+    assert [record['day'] for record in records] == ['2024-01-02', '2024-01-01']
+    assert cache.lookup(EMAIL)[0] == records
+    # The sync was queued once the records were cached
+    assert rebuild == [('sync', True)]
+
+
+def test_rebuild_racing_a_sync_is_not_cached(cache, rebuild, monkeypatch):
+    monkeypatch.setattr(data_controller, 'display_info', SyncDuringRead(db.collection('display_info'), cache))
+
+    records = data_controller._build_display_info(EMAIL, 'token')
+
+    assert len(records) == 2
+    assert cache.lookup(EMAIL)[0] is None
+    assert rebuild == [('sync', False)]
@@ -0,0 +1,83 @@
+import base64
+import json
+import pytest
+from src.db.firestore import db
+from src.controllers.data_controller import _query_display_info, BadRequest
+
+EMAIL = 'a@example.com'
+
+
+@pytest.fixture(autouse=True)
+def display_info():
+    db.documents.clear()
+    collection = db.collection('display_info')
+    for i in range(40):
+        day = f"2024-01-{i // 2 + 1:02d}"
+        # Two periods (sleep and nap) per day
+        collection.document(f"doc-{i:02d}").set({'email': EMAIL, 'day': day, 'sleep_score': i, 'heart_rate': b''})
+    collection.document('other').set({'email': 'b@example.com', 'day': '2024-01-05', 'sleep_score': 0})
+    yield
+    db.documents.clear()
+
+
+def pages(args):
+    records, cursor = _query_display_info(EMAIL, args)
+    yield records
+    while cursor:
+        records, cursor = _query_display_info(EMAIL, {**args, 'cursor': cursor})
+        yield records
+
+
+def test_cursor_pages_cover_every_record_once():
+    seen = [record['sleep_score'] for page in pages({'limit': '7'}) for record in page]
+
+    assert sorted(seen) == list(range(40))
+    days = [f"2024-01-{score // 2 + 1:02d}" for score in seen]
+    assert days == sorted(days, reverse=True)
+
+
+def test_page_boundary_inside_a_day():
+    first, second = list(pages({'limit': '3', 'end': '2024-01-19'}))[:2]
+
+    # The third record is the first period of 2024-01-18, the next page starts with its second period
+    assert [record['day'] for record in first] == ['2024-01-19', '2024-01-19', '2024-01-18']
+    assert second[0]['day'] == '2024-01-18'
+    assert second[0]['sleep_score'] != first[2]['sleep_score']
+
+
+def test_cursor_carries_day_and_document_id():
+    _, cursor = _query_display_info(EMAIL, {'limit': '1'})
+
+    assert json.loads(base64.urlsafe_b64decode(cursor)) == ['2024-01-20', 'doc-39']
+
+
+def test_projected_pages_keep_cursors():
+    records = [record for page in pages({'limit': '15', 'fields': 'sleep_score'}) for record in page]
+
+    assert len(records) == 40
+    assert set(records[0]) == {'day', 'sleep_score'}
+
+
+def cursor(value):
+    return base64.urlsafe_b64encode(json.dumps(value).encode('utf-8')).decode('utf-8')
+
+
+@pytest.mark.parametrize("value", [
+    cursor(['2024-01-05', 'display_info/other']),
+    cursor(['2024-01-05', '']),
+    cursor(['not a day', 'doc-01']),
+    cursor([None, 'doc-01']),
+    cursor('doc-01'),
+    base64.urlsafe_b64encode(b'doc-01').decode('utf-8'),
+    '%%%',
+])
+def test_invalid_cursors_are_rejected(value):
+    with pytest.raises(BadRequest):
+        _query_display_info(EMAIL, {'cursor': value})
+
+
+def test_cursor_stays_within_the_users_records():
+    records, _ = _query_display_info(EMAIL, {'cursor': cursor(['2024-01-05', 'other'])})
+
+    assert len(records) == 10
+    assert all(record['email'] == EMAIL for record in records)
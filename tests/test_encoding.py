@@ -0,0 +1,123 @@
+import gzip
+import numpy as np
+import orjson
+import pytest
+from flask import Flask, Response, json
+from src.middlewares import encoding
+from src.middlewares.encoding import init_app, to_columnar
+from tests.oura_frames import display_records
+
+
+@pytest.fixture
+def client():
+    app = Flask(__name__)
+    init_app(app)
+
+    @app.route('/display-info')
+    def display_info():
+        return Response(response=json.dumps({'message': "success", 'data': display_records(30)}), status=200,
+                        mimetype='application/json')
+
+    @app.route('/small')
+    def small():
+        return Response(response=json.dumps({'message': "success", 'value': float('nan'), 'score': np.int64(3)}),
+                        status=200, mimetype='application/json')
+
+    return app.test_client()
+
+
+def test_plain_json_matches_records(client):
+    response = client.get('/display-info')
+
+    assert response.content_encoding is None
+    assert response.json['data'][0]['day'] == display_records(30)[0]['day']
+
+
+def test_nan_and_numpy_values(client):
+    assert client.get('/small').json == {'message': "success", 'value': None, 'score': 3}
+
+
+def test_gzip(client):
+    response = client.get('/display-info', headers={'Accept-Encoding': 'gzip'})
+
+    assert response.content_encoding == 'gzip'
+    assert 'Accept-Encoding' in response.vary
+    assert orjson.loads(gzip.decompress(response.get_data()))['data'] == client.get('/display-info').json['data']
+
+
+def test_brotli_preferred(client):
+    brotli = pytest.importorskip('brotli')
+    response = client.get('/display-info', headers={'Accept-Encoding': 'gzip, br'})
+
+    assert response.content_encoding == 'br'
+    assert orjson.loads(brotli.decompress(response.get_data()))['message'] == "success"
+
+
+@pytest.mark.parametrize('accept, expected', [
+    ('br;q=0.5, gzip', 'gzip'),
+    ('gzip, br;q=0', 'gzip'),
+    ('br;q=0, gzip;q=0', None),
+    ('identity', None),
+], ids=['quality', 'br-refused', 'both-refused', 'identity'])
+def test_encoding_follows_quality_values(client, accept, expected, monkeypatch):
+    monkeypatch.setattr(encoding, 'brotli', pytest.importorskip('brotli'))
+
+    assert client.get('/display-info', headers={'Accept-Encoding': accept}).content_encoding == expected
+
+
+def test_gzip_without_brotli(client, monkeypatch):
+    monkeypatch.setattr(encoding, 'brotli', None)
+
+    assert client.get('/display-info', headers={'Accept-Encoding': 'br, gzip'}).content_encoding == 'gzip'
+
+
+def test_small_bodies_are_not_compressed(client):
+    assert client.get('/small', headers={'Accept-Encoding': 'gzip'}).content_encoding is None
+
+
+def test_columnar_layout(client):
+    rows = client.get('/display-info').json['data']
+    columns = client.get('/display-info?layout=columnar').json['data']
+
+    assert columns['day'] == [row['day'] for row in rows]
+    assert columns['heart_rate'] == [row['heart_rate'] for row in rows]
+
+
+def test_msgpack(client):
+    msgpack = pytest.importorskip('msgpack')
+    response = client.get('/display-info', headers={'Accept': 'application/msgpack'})
+
+    assert response.mimetype == 'application/msgpack'
+    assert msgpack.unpackb(response.get_data())['data'] == client.get('/display-info').json['data']
+
+
+def test_json_preferred_over_msgpack(client):
+    response = client.get('/display-info', headers={'Accept': 'application/json, application/msgpack;q=0.5'})
+
+    assert response.mimetype == 'application/json'
+
+
+def test_to_columnar_keeps_other_payloads():
+    assert to_columnar({'message': "success", 'data': 'done'}) == {'message': "success", 'data': 'done'}
+    assert to_columnar({'data': [{'a': 1}, {'b': 2}]})['data'] == {'a': [1, None], 'b': [None, 2]}
+
+
+def test_transcoding_reuses_the_dumped_payload(client, monkeypatch):
+    msgpack = pytest.importorskip('msgpack')
+    loads = orjson.loads
+    calls = []
+    monkeypatch.setattr(orjson, 'loads', lambda body: calls.append(body) or loads(body))
+
+    columnar = client.get('/display-info?layout=columnar')
+    packed = client.get('/display-info', headers={'Accept': 'application/msgpack'})
+
+    assert calls == []
+    assert loads(columnar.get_data())['data']['day'] == [record['day'] for record in display_records(30)]
+    assert msgpack.unpackb(packed.get_data())['data'] == loads(client.get('/display-info').get_data())['data']
+
+
+def test_msgpack_numpy_values(client):
+    msgpack = pytest.importorskip('msgpack')
+    response = client.get('/small', headers={'Accept': 'application/msgpack'})
+
+    assert msgpack.unpackb(response.get_data()) == {'message': "success", 'value': None, 'score': 3}
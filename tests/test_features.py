@@ -0,0 +1,118 @@
+import numpy as np
+import pandas as pd
+import pytest
+from src.services.features import FEATURE_COLUMNS, STORED_DEFAULTS, TimestampCache, feature_matrix, timestamp_cache
+from tests.oura_frames import oura_frames
+from src.services.display import merge_display_sources, build_display_frame
+
+
+# The features sync and display-info built before features.py, from a deep copy of the display frame, with the
+# stored placeholders (the display frame already fills a missing readiness score with 0) read as missing
+def reference_features(df_display):
+    df_tmp = df_display.copy(deep=True)
+    df_tmp['day'] = pd.to_datetime(df_tmp['day'], utc=True).dt.normalize()
+    df_tmp['bedtime_start'] = pd.to_datetime(df_tmp['bedtime_start'], utc=True)
+    df_tmp['bedtime_start'] = (df_tmp['bedtime_start'] - df_tmp['day']).dt.total_seconds()
+    df_tmp['bedtime_end'] = pd.to_datetime(df_tmp['bedtime_end'], utc=True)
+    df_tmp['bedtime_end'] = (df_tmp['bedtime_end'] - df_tmp['day']).dt.total_seconds()
+    df_main_predict = df_tmp[["sleep_score", "readiness_score", "activity_score", "efficiency", "restfulness", "total_sleep", "awake", "rem_sleep", "light_sleep", "deep_sleep", "latency", "bedtime_start", "bedtime_end", "average_heart_rate", "average_hrv"]]
+    matrix = df_main_predict.astype(np.float32).to_numpy()
+    for column, default in STORED_DEFAULTS.items():
+        index = FEATURE_COLUMNS.index(column)
+        matrix[matrix[:, index] == default, index] = np.nan
+    return matrix
+
+
+def display_frame(days):
+    return build_display_frame(merge_display_sources(*oura_frames(days)))
+
+
+@pytest.mark.parametrize("days", [1, 30, 3650])
+def test_matches_deep_copy_features(days):
+    df_display = display_frame(days)
+
+    np.testing.assert_allclose(feature_matrix(df_display), reference_features(df_display), rtol=1e-6)
+
+
+def test_float32_c_contiguous():
+    matrix = feature_matrix(display_frame(30))
+
+    assert matrix.dtype == np.float32
+    assert matrix.flags['C_CONTIGUOUS']
+    assert matrix.shape == (30, len(FEATURE_COLUMNS))
+
+
+def test_does_not_modify_the_frame():
+    df_display = display_frame(30)
+    before = df_display.copy(deep=True)
+    feature_matrix(df_display)
+
+    pd.testing.assert_frame_equal(df_display, before)
+
+
+def test_mixed_utc_offsets():
+    df_display = display_frame(3).assign(
+        day=["2024-03-01", "2024-03-02", "2024-03-03"],
+        bedtime_start=["2024-03-01T22:30:00-07:00", "2024-03-02T23:15:00+02:00", "2024-03-03T01:00:00+00:00"],
+        bedtime_end=["2024-03-02T06:30:00-07:00", "2024-03-03T07:00:00+02:00", "2024-03-03T09:00:00+00:00"],
+    )
+    start, end = FEATURE_COLUMNS.index("bedtime_start"), FEATURE_COLUMNS.index("bedtime_end")
+    matrix = feature_matrix(df_display)
+
+    # 22:30 at -07:00 is 05:30 UTC the next day
+    assert matrix[:, start].tolist() == [29.5 * 3600, 21.25 * 3600, 3600]
+    assert matrix[:, end].tolist() == [37.5 * 3600, 29 * 3600, 9 * 3600]
+    np.testing.assert_allclose(matrix, reference_features(df_display), rtol=1e-6)
+
+
+def test_mixed_iso_formats():
+    df_display = display_frame(3).assign(
+        day=["2024-03-01", "2024-03-02", "2024-03-03"],
+        bedtime_start=["2024-03-01T22:30:00.000-07:00", "2024-03-02T23:15:00+02:00", "2024-03-03T01:00:00Z"],
+    )
+    start = FEATURE_COLUMNS.index("bedtime_start")
+
+    assert feature_matrix(df_display)[:, start].tolist() == [29.5 * 3600, 21.25 * 3600, 3600]
+
+
+def test_none_and_unknown_become_nan():
+    df_display = display_frame(4)
+    df_display["readiness_score"] = [None, "Unknown", 70, 80]
+    df_display["bedtime_start"] = [None, "Unknown", df_display["bedtime_start"][2], df_display["bedtime_start"][3]]
+    matrix = feature_matrix(df_display)
+
+    readiness, start = FEATURE_COLUMNS.index("readiness_score"), FEATURE_COLUMNS.index("bedtime_start")
+    assert np.isnan(matrix[:2, readiness]).all()
+    assert matrix[2:, readiness].tolist() == [70, 80]
+    assert np.isnan(matrix[:2, start]).all()
+    assert not np.isnan(matrix[2:, start]).any()
+
+
+def test_parsed_timestamps_are_reused_across_calls():
+    cache = TimestampCache()
+    values = pd.Series(["2024-01-01T22:00:00+02:00", "2024-01-02T22:00:00+02:00", "2024-01-01T22:00:00+02:00", None])
+
+    first = cache.seconds(values)
+    second = cache.seconds(values)
+
+    np.testing.assert_array_equal(first, second)
+    assert first[0] == pd.Timestamp("2024-01-01T20:00:00Z").timestamp()
+    assert np.isnan(first[3])
+    assert cache.stats()['misses'] == 2
+    assert cache.stats()['hits'] == 2
+
+
+def test_cache_is_bounded():
+    cache = TimestampCache(max_size=10)
+    cache.seconds(pd.Series(pd.date_range("2024-01-01", periods=25).strftime("%Y-%m-%d")))
+
+    assert cache.stats()['cached'] == 10
+
+
+def test_shared_cache_serves_repeat_frames():
+    df_display = display_frame(30)
+    feature_matrix(df_display)
+    misses = timestamp_cache.stats()['misses']
+
+    feature_matrix(df_display)
+    assert timestamp_cache.stats()['misses'] == misses
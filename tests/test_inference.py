@@ -0,0 +1,114 @@
+import threading
+import numpy as np
+import pandas as pd
+import pytest
+from src.services.features import FEATURE_COLUMNS
+from src.services.inference import BatchPredictor, native_booster
+from tests.models import pyfunc_model, StaticRegistry
+
+pytest.importorskip('xgboost')
+pytest.importorskip('mlflow')
+
+
+@pytest.fixture(scope='module')
+def model(tmp_path_factory):
+    return pyfunc_model(tmp_path_factory.mktemp('model') / 'model')
+
+
+def features(rows, seed=1):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame(rng.uniform(0, 100, (rows, len(FEATURE_COLUMNS))).astype(np.float32), columns=FEATURE_COLUMNS)
+
+
+def pyfunc_labels(model, df):
+    pyfunc, label_encoder = model
+    return label_encoder.inverse_transform(pyfunc.predict(df))
+
+
+def test_finds_the_booster(model):
+    assert native_booster(model[0]) is not None
+
+
+def test_native_matches_pyfunc(model):
+    predictor = BatchPredictor(StaticRegistry(*model), window=0)
+    df = features(200)
+
+    labels, run_id = predictor.score(df)
+
+    assert run_id == 'run-1'
+    assert list(labels) == list(pyfunc_labels(model, df))
+    assert predictor.stats()['native_batches'] == 1
+
+
+def test_pyfunc_path_matches(model):
+    predictor = BatchPredictor(StaticRegistry(*model), window=0, native=False)
+    df = features(50)
+
+    assert list(predictor.score(df)[0]) == list(pyfunc_labels(model, df))
+    assert predictor.stats()['native_batches'] == 0
+
+
+def test_matrix_input(model):
+    predictor = BatchPredictor(StaticRegistry(*model), window=0)
+    df = features(20)
+
+    assert list(predictor.score(df.to_numpy())[0]) == list(pyfunc_labels(model, df))
+
+
+def test_reordered_booster_features(model, tmp_path):
+    reordered = pyfunc_model(tmp_path / 'model', columns=list(reversed(FEATURE_COLUMNS)))
+    predictor = BatchPredictor(StaticRegistry(*reordered), window=0)
+    df = features(50)
+
+    labels, _ = predictor.score(df)
+    assert list(labels) == list(pyfunc_labels(reordered, df[list(reversed(FEATURE_COLUMNS))]))
+    assert predictor.stats()['native_batches'] == 1
+
+
+def test_unknown_booster_features_fall_back_to_pyfunc(tmp_path):
+    columns = [f"f{i}" for i in range(len(FEATURE_COLUMNS))]
+    other = pyfunc_model(tmp_path / 'model', columns=columns)
+    predictor = BatchPredictor(StaticRegistry(*other), window=0)
+
+    # The booster names features the matrix does not have, so it is not used natively
+    assert predictor._native('run-1', other[0]) is None
+
+
+def test_concurrent_requests_share_batches(model):
+    predictor = BatchPredictor(StaticRegistry(*model), window=0.05)
+    frames = [features(10, seed=i) for i in range(16)]
+    results = [None] * len(frames)
+
+    def request(i):
+        results[i] = predictor.score(frames[i])[0]
+
+    threads = [threading.Thread(target=request, args=(i,)) for i in range(len(frames))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    for df, labels in zip(frames, results):
+        assert list(labels) == list(pyfunc_labels(model, df))
+    stats = predictor.stats()
+    assert stats['requests'] == 16
+    assert stats['batches'] < 16
+    assert stats['rows'] == 160
+
+
+def test_empty_input(model):
+    labels, run_id = BatchPredictor(StaticRegistry(*model), window=0).score(features(0))
+
+    assert len(labels) == 0
+    assert run_id is None
+
+
+def test_errors_reach_the_caller(model):
+    class Broken(StaticRegistry):
+        def get(self, run_id=None):
+            raise RuntimeError("model store unavailable")
+
+    predictor = BatchPredictor(Broken(*model), window=0.01)
+    with pytest.raises(RuntimeError):
+        predictor.score(features(5))
+    assert predictor.stats()['errors'] == 1
@@ -0,0 +1,98 @@
+import threading
+import time
+from src.services.jobs import JobQueue, LocalJobStore, SUCCEEDED, FAILED
+
+
+def wait_for(queue, job_id, timeout=5):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = queue.get(job_id)
+        if job['status'] in (SUCCEEDED, FAILED):
+            return job
+        time.sleep(0.01)
+    raise AssertionError(f"job {job_id} did not finish")
+
+
+def test_runs_job_and_releases_lock():
+    queue = JobQueue(LocalJobStore())
+    job, created = queue.submit('update-scores', 'a@example.com', lambda x: x * 2, 21)
+
+    assert created
+    finished = wait_for(queue, job['id'])
+    assert finished['status'] == SUCCEEDED
+    assert finished['result'] == 42
+    assert queue.store.claim('update-scores:a@example.com', 'other') is None
+
+
+def test_one_job_per_user_and_kind():
+    release = threading.Event()
+    queue = JobQueue(LocalJobStore())
+    first, created = queue.submit('update-scores', 'a@example.com', release.wait)
+    second, created_again = queue.submit('update-scores', 'a@example.com', release.wait)
+    other, created_other = queue.submit('update-scores', 'b@example.com', lambda: None)
+
+    assert created and not created_again and created_other
+    assert second['id'] == first['id']
+    release.set()
+    wait_for(queue, first['id'])
+
+
+def test_failed_job_records_error():
+    def fail():
+        raise ValueError("boom")
+
+    queue = JobQueue(LocalJobStore())
+    job, _ = queue.submit('rescore', 'all', fail)
+
+    finished = wait_for(queue, job['id'])
+    assert finished['status'] == FAILED
+    assert finished['error']['error'] == "boom"
+
+
+def test_local_records_expire():
+    store = LocalJobStore(job_ttl=0.05)
+    store.save({'id': 'old'})
+    time.sleep(0.06)
+    store.save({'id': 'new'})
+
+    assert store.load('old') is None
+    assert store.load('new') == {'id': 'new'}
+    assert list(store._jobs) == ['new']
+
+
+def test_local_refresh_extends_record():
+    store = LocalJobStore(job_ttl=0.1)
+    store.save({'id': 'job'})
+    store.claim('kind:user', 'job')
+    time.sleep(0.06)
+
+    assert store.refresh('kind:user', 'job')
+    time.sleep(0.06)
+    assert store.load('job') == {'id': 'job'}
+    assert not store.refresh('kind:other', 'job')
+
+
+class RecordingStore(LocalJobStore):
+    def __init__(self):
+        super().__init__()
+        self.refreshed = []
+
+    def refresh(self, lock_key, job_id):
+        self.refreshed.append((lock_key, job_id))
+        return super().refresh(lock_key, job_id)
+
+
+def test_heartbeat_refreshes_running_jobs():
+    release = threading.Event()
+    store = RecordingStore()
+    queue = JobQueue(store, heartbeat=0.01)
+    job, _ = queue.submit('rescore', 'all', release.wait)
+
+    time.sleep(0.1)
+    assert ('rescore:all', job['id']) in store.refreshed
+    release.set()
+    wait_for(queue, job['id'])
+
+    count = len(store.refreshed)
+    time.sleep(0.05)
+    assert len(store.refreshed) == count
@@ -0,0 +1,76 @@
+import pickle
+import time
+import numpy as np
+import pandas as pd
+import pytest
+from src.services.features import FEATURE_COLUMNS
+from src.services.model_registry import ModelRegistry
+from tests.models import pyfunc_model
+
+pytest.importorskip('xgboost')
+pytest.importorskip('mlflow')
+
+
+# A MODEL_DIR as the registry expects it, model/ and label_encoder.pkl
+@pytest.fixture(scope='module')
+def model_dir(tmp_path_factory):
+    path = tmp_path_factory.mktemp('model-dir')
+    _, label_encoder = pyfunc_model(path / 'model')
+    with open(path / 'label_encoder.pkl', 'wb') as f:
+        pickle.dump(label_encoder, f)
+    return path
+
+
+def registry(model_dir):
+    # An unreachable tracking server, so any MLflow call would fail the test
+    return ModelRegistry('http://127.0.0.1:9', 'XGBoost', model_dir=str(model_dir), poll_interval=1, load_timeout=10)
+
+
+def test_local_run_id(model_dir):
+    assert registry(model_dir).find_production_run() == f"local:{model_dir}"
+
+
+def test_loads_the_local_model(model_dir):
+    models = registry(model_dir)
+
+    run_id, model, label_encoder = models.get()
+
+    assert run_id == f"local:{model_dir}"
+    features = pd.DataFrame(np.full((3, len(FEATURE_COLUMNS)), 50, dtype=np.float32), columns=FEATURE_COLUMNS)
+    assert len(label_encoder.inverse_transform(model.predict(features))) == 3
+    assert models.stats()['loads'] == 1
+
+
+def test_start_loads_in_the_background(model_dir):
+    models = registry(model_dir)
+    swaps = []
+    models.on_swap(lambda previous, run_id: swaps.append((previous, run_id)))
+
+    models.start()
+    assert models.get()[0] == f"local:{model_dir}"
+    time.sleep(1.5)
+
+    assert models.ready
+    # A local directory is pinned, the worker does not poll for another run
+    assert models.stats()['loads'] == 1
+    assert swaps == [(None, f"local:{model_dir}")]
+
+
+def test_cached_runs_are_reused(model_dir):
+    models = registry(model_dir)
+    models.get()
+    models.get()
+
+    # The first get() loads the run inline since start() was never called, both are then served from memory
+    assert models.stats()['hits'] == 2
+    assert models.stats()['misses'] == 0
+    assert models.stats()['loads'] == 1
+
+
+def test_importing_the_controllers_does_not_start_it():
+    from src.controllers import data_controller
+    from src.services.model_registry import model_registry
+
+    assert data_controller.data is not None
+    assert model_registry._worker is None
+    assert model_registry.stats()['loads'] == 0
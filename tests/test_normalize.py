@@ -0,0 +1,154 @@
+import json
+import os
+import pandas as pd
+import pytest
+from src.services.display import SERIES_COLUMNS, merge_display_sources, build_display_frame
+from src.services.normalize import COLLECTION_SCHEMAS, normalize_frame
+from src.services.timeseries_codec import encode_sample
+from src.utils import default_values
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures", "oura")
+
+
+def recorded(endpoint):
+    with open(os.path.join(FIXTURES, f"{endpoint}.json")) as f:
+        return pd.DataFrame(json.load(f)["data"])
+
+
+# The frames _process_chunk hands to normalize_frame for the recorded responses, collection id -> frame
+def synced_frames():
+    df_main = recorded("sleep")
+    df_sleep = recorded("daily_sleep")
+    df_activity = recorded("daily_activity")
+    df_readiness = recorded("daily_readiness")
+    df_sleep_time = recorded("sleep_time")
+
+    df_display = build_display_frame(merge_display_sources(df_main, df_sleep, df_activity, df_sleep_time))
+    df_activity["met"] = [encode_sample(met) for met in df_activity["met"].tolist()]
+    for column in SERIES_COLUMNS:
+        df_main[column] = [encode_sample(sample) for sample in df_main[column].tolist()]
+    df_display["recommendation"] = "Keep it up"
+    df_display["model_run_id"] = "run"
+
+    frames = {
+        "display_info": df_display,
+        "main_raw": df_main,
+        "sleep_raw": df_sleep,
+        "activity_raw": df_activity,
+        "readiness_raw": df_readiness,
+        "sleep_time_raw": df_sleep_time,
+    }
+    for dataframe in frames.values():
+        dataframe["email"] = "user@example.com"
+    return frames
+
+
+def normalized(collection_id):
+    return normalize_frame(synced_frames()[collection_id], collection_id)
+
+
+@pytest.mark.parametrize("collection_id", COLLECTION_SCHEMAS)
+def test_no_nulls_left(collection_id):
+    df = normalized(collection_id)
+
+    assert not df.isna().any().any()
+
+
+@pytest.mark.parametrize("collection_id", COLLECTION_SCHEMAS)
+def test_declared_dtypes(collection_id):
+    df = normalized(collection_id)
+
+    for column, declared in COLLECTION_SCHEMAS[collection_id].items():
+        if column not in df.columns:
+            continue
+        if declared == "int64":
+            assert pd.api.types.is_integer_dtype(df[column]), column
+        else:
+            assert df[column].dtype == declared, column
+
+
+@pytest.mark.parametrize("collection_id", COLLECTION_SCHEMAS)
+def test_recorded_values_kept(collection_id):
+    before = synced_frames()[collection_id]
+    original = before.copy()
+    df = normalize_frame(before, collection_id)
+
+    for column in original.columns:
+        present = original[column].notna()
+        assert df.loc[present, column].tolist() == original.loc[present, column].tolist(), column
+
+
+def test_missing_activity_fields():
+    df = normalized("activity_raw").set_index("day")
+
+    assert df.at["2026-03-03", "score"] == default_values["int64"]
+    assert df.at["2026-03-03", "average_met_minutes"] == default_values["float64"]
+    assert df.at["2026-03-02", "score"] == 75
+
+
+def test_missing_readiness_temperature():
+    df = normalized("readiness_raw").set_index("day")
+
+    assert df.at["2026-03-02", "temperature_deviation"] == 0.0
+    assert df.at["2026-03-02", "temperature_trend_deviation"] == 0.0
+    assert df.at["2026-03-01", "temperature_deviation"] == -0.12
+
+
+def test_nap_without_samples():
+    df = normalized("main_raw").set_index("id")
+    nap = "9e0f8f1c-1b6a-4c1d-8c2e-6b1d2a7f4e52"
+
+    assert df.at[nap, "average_hrv"] == 0.0
+    assert df.at[nap, "heart_rate"] == default_values["object"]
+    assert df.at[nap, "readiness"] == default_values["object"]
+    assert df.at[nap, "readiness_score_delta"] == 0.0
+
+
+def test_sleep_time_without_optimal_bedtime():
+    df = normalized("sleep_time_raw").set_index("day")
+
+    assert df.at["2026-03-02", "optimal_bedtime"] == default_values["object"]
+    assert df.at["2026-03-02", "status"] == "not_enough_nights"
+
+
+def test_display_day_without_daily_sleep():
+    df = normalized("display_info")
+    day = df[df["day"] == "2026-03-02"].iloc[0]
+
+    assert day["sleep_score"] == 0
+    assert day["restfulness"] == 0
+    assert day["readiness_score"] == 79
+    assert day["oura_recommendation"] == "improve_efficiency"
+    # 2026-03-03 has a daily sleep whose restfulness contributor is null
+    assert df.loc[df["day"] == "2026-03-03", "restfulness"].tolist() == [0]
+
+
+def test_string_and_category_columns():
+    df = pd.DataFrame({
+        "day": pd.array(["2026-03-01", None], dtype="string"),
+        "type": pd.Categorical(["long_sleep", None]),
+        "score": [80, None],
+    })
+    normalize_frame(df, "sleep_raw")
+
+    assert df["day"].tolist() == ["2026-03-01", default_values["object"]]
+    assert df["type"].tolist() == ["long_sleep", default_values["object"]]
+    assert df["score"].tolist() == [80, 0]
+    assert pd.api.types.is_integer_dtype(df["score"])
+
+
+def test_integers_downcast():
+    df = normalize_frame(pd.DataFrame({"score": [80, 91, None]}), "sleep_raw")
+
+    assert df["score"].dtype == "int8"
+
+
+def test_unknown_collection_fills_by_kind():
+    df = normalize_frame(pd.DataFrame({
+        "count": pd.array([1, None], dtype="Int64"),
+        "ratio": [0.5, None],
+        "flag": pd.array([True, None], dtype="boolean"),
+        "label": ["a", None],
+    }), "other_raw")
+
+    assert df.to_dict("records")[1] == {"count": 0, "ratio": 0.0, "flag": False, "label": default_values["object"]}
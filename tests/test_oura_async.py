@@ -0,0 +1,85 @@
+import time
+import pandas as pd
+import pytest
+from src import config
+from src.services.oura_async import AsyncOuraFetcher, FetchError, oura_fetcher
+from src.services.oura_client import OuraClient
+
+PREFIX = '/v2/usercollection'
+HEADERS = {'Authorization': 'Bearer token'}
+ENDPOINTS = ('sleep', 'daily_sleep', 'daily_activity', 'daily_readiness')
+
+
+def fetcher(max_concurrency=8):
+    return AsyncOuraFetcher(OuraClient(connect_timeout=1, read_timeout=5, backoff_base=0.01),
+                            max_concurrency=max_concurrency)
+
+
+def calls(server, endpoints=ENDPOINTS, params=None):
+    return {endpoint: (f"{server.url}{PREFIX}/{endpoint}", params, HEADERS) for endpoint in endpoints}
+
+
+def serve(server, days=250):
+    days = pd.date_range('2024-01-01', periods=days).strftime('%Y-%m-%d').tolist()
+    for endpoint in ENDPOINTS:
+        server.serve(f"{PREFIX}/{endpoint}", [{'id': f"{endpoint}-{day}", 'day': day} for day in days])
+
+
+def test_matches_fetch_all(oura_server):
+    serve(oura_server)
+    params = {'start_date': '2024-02-01', 'end_date': '2024-08-01'}
+
+    bodies = fetcher().fetch_many(calls(oura_server, params=params))
+
+    client = OuraClient()
+    for endpoint, (url, params, headers) in calls(oura_server, params=params).items():
+        assert bodies[endpoint] == client.fetch_all(url, params=params, headers=headers)
+    assert len(bodies['sleep']['data']) == 183
+
+
+def test_failed_call_cancels_the_others(oura_server):
+    serve(oura_server)
+    for endpoint in ENDPOINTS[1:]:
+        oura_server.delay(f"{PREFIX}/{endpoint}", 2)
+    oura_server.script(f"{PREFIX}/sleep", (401, {'detail': 'Unauthorized'}, {}))
+    async_fetcher = fetcher()
+
+    start = time.perf_counter()
+    with pytest.raises(FetchError) as error:
+        async_fetcher.fetch_many(calls(oura_server))
+
+    assert error.value.name == 'sleep'
+    assert time.perf_counter() - start < 1
+    assert async_fetcher.stats()['cancelled'] == len(ENDPOINTS) - 1
+    assert async_fetcher.stats()['in_flight'] == 0
+
+
+def test_concurrency_is_capped(oura_server):
+    endpoints = [f"endpoint_{i}" for i in range(8)]
+    for endpoint in endpoints:
+        oura_server.serve(f"{PREFIX}/{endpoint}", [{'day': '2024-01-01'}])
+        oura_server.delay(f"{PREFIX}/{endpoint}", 0.1)
+
+    start = time.perf_counter()
+    bodies = fetcher(max_concurrency=2).fetch_many(calls(oura_server, endpoints))
+
+    assert len(bodies) == len(endpoints)
+    assert oura_server.max_in_flight == 2
+    # Four rounds of two
+    assert time.perf_counter() - start >= 0.4
+
+
+def test_retries_through_the_client_backoff(oura_server):
+    serve(oura_server, days=10)
+    oura_server.script(f"{PREFIX}/sleep", (503, {}, {}), (429, {}, {'Retry-After': '0'}))
+    async_fetcher = fetcher()
+
+    bodies = async_fetcher.fetch_many(calls(oura_server, ['sleep']))
+
+    assert len(bodies['sleep']['data']) == 10
+    assert async_fetcher.stats()['retries'] == 2
+    assert async_fetcher.client.stats()['requests'] == 3
+
+
+def test_shared_fetcher_uses_the_configured_concurrency():
+    assert oura_fetcher.max_concurrency == config.OURA_ASYNC_CONCURRENCY
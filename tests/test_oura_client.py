@@ -0,0 +1,105 @@
+import time
+import pandas as pd
+import pytest
+import requests
+from src.services.oura_client import OuraClient, RateLimiter
+
+HEADERS = {'Authorization': 'Bearer token'}
+
+
+def client(**kwargs):
+    kwargs.setdefault('backoff_base', 0.01)
+    return OuraClient(connect_timeout=1, read_timeout=2, **kwargs)
+
+
+def test_fetch_all_follows_next_token(oura_server):
+    days = pd.date_range('2023-06-01', periods=500).strftime('%Y-%m-%d').tolist()
+    oura_server.serve('/v2/usercollection/sleep', [{'day': day} for day in days])
+
+    body = client().fetch_all(oura_server.url + '/v2/usercollection/sleep', params={'start_date': '2024-01-01'},
+                              headers=HEADERS)
+
+    assert [row['day'] for row in body['data']] == [day for day in days if day >= '2024-01-01']
+    assert oura_server.count('/v2/usercollection/sleep') == 3
+    assert all(request['query']['start_date'] == ['2024-01-01'] for request in oura_server.requests)
+    assert oura_server.requests[0]['headers']['Authorization'] == 'Bearer token'
+
+
+def test_error_body_without_data_is_returned(oura_server):
+    oura_server.script('/v2/usercollection/sleep', (200, {'detail': 'Token expired'}, {}))
+
+    assert client().fetch_all(oura_server.url + '/v2/usercollection/sleep') == {'detail': 'Token expired'}
+
+
+def test_retries_429_honouring_retry_after(oura_server):
+    oura_server.serve('/v2/usercollection/sleep', [{'day': 1}])
+    oura_server.script('/v2/usercollection/sleep', (429, {}, {'Retry-After': '0.2'}))
+    oura = client()
+
+    body = oura.fetch_all(oura_server.url + '/v2/usercollection/sleep', headers=HEADERS)
+
+    assert body == {'data': [{'day': 1}]}
+    stats = oura.stats()
+    assert stats['rate_limited'] == 1
+    assert stats['retries'] == 1
+    assert stats['requests'] == 2
+
+
+def test_retry_after_delay_is_waited(oura_server):
+    oura_server.serve('/v2/usercollection/sleep', [{'day': 1}])
+    oura_server.script('/v2/usercollection/sleep', (429, {}, {'Retry-After': '0.3'}))
+    oura = client()
+
+    start = time.perf_counter()
+    response = oura.get(oura_server.url + '/v2/usercollection/sleep')
+
+    assert response.status_code == 200
+    assert time.perf_counter() - start >= 0.3
+    latency = oura.stats()['latency_seconds']['/v2/usercollection/sleep']
+    assert latency['count'] == 2
+
+
+def test_retries_server_errors_for_gets(oura_server):
+    oura_server.serve('/v2/usercollection/sleep', [{'day': 1}])
+    oura_server.script('/v2/usercollection/sleep', (503, {}, {}), (502, {}, {}))
+
+    assert client().get_json(oura_server.url + '/v2/usercollection/sleep')['data'] == [{'day': 1}]
+    assert oura_server.count('/v2/usercollection/sleep') == 3
+
+
+def test_gives_up_after_max_retries(oura_server):
+    oura_server.script('/v2/usercollection/sleep', *[(500, {}, {})] * 3)
+    oura = client(max_retries=2)
+
+    with pytest.raises(requests.HTTPError):
+        oura.get_json(oura_server.url + '/v2/usercollection/sleep')
+    assert oura_server.count('/v2/usercollection/sleep') == 3
+    assert oura.stats()['errors'] == 1
+
+
+def test_client_errors_are_not_retried(oura_server):
+    oura_server.script('/v2/usercollection/sleep', (401, {'detail': 'Unauthorized'}, {}))
+
+    response = client().get(oura_server.url + '/v2/usercollection/sleep')
+    assert response.status_code == 401
+    assert oura_server.count('/v2/usercollection/sleep') == 1
+
+
+def test_read_timeout_is_retried(oura_server):
+    oura_server.serve('/v2/usercollection/sleep', [{'day': 1}])
+    oura_server.delay('/v2/usercollection/sleep', 0.5)
+    oura = OuraClient(connect_timeout=1, read_timeout=0.1, max_retries=1, backoff_base=0.01)
+
+    with pytest.raises(requests.Timeout):
+        oura.get(oura_server.url + '/v2/usercollection/sleep')
+    assert oura.stats()['retries'] == 1
+
+
+def test_rate_limiter_spaces_requests_per_key():
+    limiter = RateLimiter(rate=10, burst=2)
+
+    assert limiter.try_acquire('a') == 0
+    assert limiter.try_acquire('a') == 0
+    assert limiter.try_acquire('a') == pytest.approx(0.1, abs=0.02)
+    # Other tokens have their own bucket
+    assert limiter.try_acquire('b') == 0
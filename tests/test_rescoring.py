@@ -0,0 +1,141 @@
+import threading
+import time
+import pytest
+from src.controllers import data_controller
+from src.db.firestore import db
+from src.services import rescoring, sync
+from src.services.batch_writer import BatchWriter
+from src.services.inference import BatchPredictor
+from src.services.jobs import JobQueue, RedisJobStore
+from src.services.rescoring import rescore
+from src.services.sync import sync_scores
+from tests.fakes import RecordingCache
+from tests.models import StaticRegistry, pyfunc_model
+from tests.oura_frames import oura_rows
+
+pytest.importorskip('xgboost')
+pytest.importorskip('mlflow')
+
+EMAIL = 'a@example.com'
+OTHER = 'b@example.com'
+PREFIX = '/v2/usercollection'
+
+
+@pytest.fixture(scope='module')
+def model(tmp_path_factory):
+    return pyfunc_model(tmp_path_factory.mktemp('model') / 'model')
+
+
+def use_run(monkeypatch, model, run_id):
+    registry = StaticRegistry(*model, run_id=run_id)
+    predictor = BatchPredictor(registry, window=0)
+    monkeypatch.setattr(sync, 'batch_predictor', predictor)
+    monkeypatch.setattr(rescoring, 'batch_predictor', predictor)
+    monkeypatch.setattr(rescoring, 'model_registry', registry)
+
+
+@pytest.fixture
+def scored(oura_server, model, monkeypatch):
+    db.documents.clear()
+    monkeypatch.setenv('OURA_API_BASE_URI', oura_server.url + PREFIX)
+    monkeypatch.setattr(sync, 'display_cache', RecordingCache())
+    monkeypatch.setattr(rescoring, 'display_cache', RecordingCache())
+    monkeypatch.setattr(rescoring, 'batch_writer', BatchWriter(db, base_delay=0))
+    use_run(monkeypatch, model, 'run-1')
+    for path, rows in oura_rows(40).items():
+        oura_server.serve(f"{PREFIX}/{path}", rows)
+    sync_scores(EMAIL, 'token')
+    return display()
+
+
+def display():
+    return {path: dict(data) for path, data in db.documents.items() if path.startswith('display_info/')}
+
+
+def test_rescoring_predicts_what_sync_did(scored, model, monkeypatch):
+    # Every 7th day has no daily sleep, so its sleep_score was scored missing and stored as 0
+    assert any(record['sleep_score'] == 0 for record in scored.values())
+    use_run(monkeypatch, model, 'run-2')
+
+    summary = rescore()
+
+    rescored = display()
+    assert summary['rescored'] == len(scored)
+    assert {record['model_run_id'] for record in rescored.values()} == {'run-2'}
+    assert {path: record['recommendation'] for path, record in rescored.items()} == \
+        {path: record['recommendation'] for path, record in scored.items()}
+
+
+def seed(rows):
+    for i, run_id in enumerate(rows):
+        record = {'email': EMAIL if i % 2 else OTHER, 'day': f"2024-01-{i + 1:02d}", 'sleep_score': 80 + i,
+                  'recommendation': "Keep it up"}
+        if run_id is not None:
+            record['model_run_id'] = run_id
+        db.collection('display_info').document(f"doc-{i:02d}").set(record)
+
+
+@pytest.fixture
+def stored(model, monkeypatch):
+    db.documents.clear()
+    monkeypatch.setattr(rescoring, 'display_cache', RecordingCache())
+    monkeypatch.setattr(rescoring, 'batch_writer', BatchWriter(db, base_delay=0))
+    use_run(monkeypatch, model, 'run-2')
+    seed(['run-2'] * 10 + ['run-1'] * 5 + [None] * 3)
+    yield
+    db.documents.clear()
+
+
+def run_ids():
+    return [data.get('model_run_id') for path, data in sorted(db.documents.items()) if path.startswith('display_info/')]
+
+
+def test_reads_only_rows_of_other_runs(stored):
+    rescoring.legacy_scan.set({'completed_at': None})
+    reads = db.reads
+
+    summary = rescore()
+
+    assert summary['rescored'] == 5 and not summary['legacy_scan']
+    assert db.reads - reads == 5
+    assert run_ids() == ['run-2'] * 15 + [None] * 3
+
+
+def test_legacy_rows_are_scanned_once(stored):
+    first = rescore()
+    reads = db.reads
+    second = rescore()
+
+    assert first['rescored'] == 8 and first['legacy_scan']
+    assert run_ids() == ['run-2'] * 18
+    assert second['rescored'] == 0 and not second['legacy_scan']
+    assert db.reads == reads
+    assert rescoring.legacy_scan.get().to_dict()['run_id'] == 'run-2'
+
+
+def test_one_users_rescore_leaves_the_legacy_scan_pending(stored):
+    summary = rescore(EMAIL)
+
+    assert summary['users'] == 1 and summary['legacy_scan']
+    assert not rescoring.legacy_scan.get().exists
+    assert rescore()['rescored'] == 18 - summary['rescored'] - 10
+
+
+def test_workers_swapping_to_a_run_share_one_rescore(monkeypatch):
+    fakeredis = pytest.importorskip('fakeredis')
+    redis = fakeredis.FakeRedis()
+    release = threading.Event()
+    calls = []
+    monkeypatch.setattr(data_controller, 'rescore', lambda: calls.append(1) or release.wait(5))
+
+    workers = [JobQueue(RedisJobStore(redis)) for _ in range(3)]
+    for worker in workers:
+        monkeypatch.setattr(data_controller, 'job_queue', worker)
+        data_controller._rescore_on_swap('run-1', 'run-2')
+    monkeypatch.setattr(data_controller, 'job_queue', workers[0])
+    # The next run gets its own rescore
+    data_controller._rescore_on_swap('run-2', 'run-3')
+    time.sleep(0.2)
+    release.set()
+
+    assert len(calls) == 2
@@ -0,0 +1,89 @@
+import threading
+import time
+from src.services.single_flight import SingleFlight
+
+
+def concurrently(count, fn):
+    results = [None] * count
+    errors = [None] * count
+
+    def run(i):
+        try:
+            results[i] = fn()
+        except Exception as e:
+            errors[i] = e
+
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results, errors
+
+
+def test_concurrent_calls_share_one_computation():
+    flight = SingleFlight()
+    calls = []
+
+    def rebuild():
+        calls.append(1)
+        time.sleep(0.1)
+        return ['records']
+
+    results, errors = concurrently(10, lambda: flight.do('a@example.com', rebuild))
+
+    assert len(calls) == 1
+    assert results == [['records']] * 10
+    assert flight.stats()['leaders'] == 1
+    assert flight.stats()['shared'] == 9
+
+
+def test_keys_do_not_share():
+    flight = SingleFlight()
+    keys = iter(['a@example.com', 'b@example.com', 'c@example.com'])
+    lock = threading.Lock()
+
+    def request():
+        with lock:
+            key = next(keys)
+        return flight.do(key, lambda: time.sleep(0.05) or key)
+
+    results, _ = concurrently(3, request)
+    assert sorted(results) == ['a@example.com', 'b@example.com', 'c@example.com']
+    assert flight.stats()['leaders'] == 3
+
+
+def test_error_reaches_every_waiter():
+    flight = SingleFlight()
+
+    def rebuild():
+        time.sleep(0.1)
+        raise RuntimeError("firestore down")
+
+    _, errors = concurrently(5, lambda: flight.do('a@example.com', rebuild))
+
+    assert all(isinstance(error, RuntimeError) for error in errors)
+
+
+def test_later_calls_recompute():
+    flight = SingleFlight()
+    calls = []
+
+    flight.do('a@example.com', lambda: calls.append(1))
+    flight.do('a@example.com', lambda: calls.append(1))
+
+    assert len(calls) == 2
+    assert flight.stats()['in_flight'] == 0
+
+
+def test_waiter_recomputes_after_timeout():
+    flight = SingleFlight(wait_timeout=0.05)
+    release = threading.Event()
+    leader = threading.Thread(target=lambda: flight.do('a@example.com', release.wait))
+    leader.start()
+    time.sleep(0.01)
+
+    assert flight.do('a@example.com', lambda: 'own') == 'own'
+    assert flight.stats()['timeouts'] == 1
+    release.set()
+    leader.join()
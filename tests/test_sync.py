@@ -0,0 +1,143 @@
+import threading
+import pandas as pd
+import pytest
+from src.db.firestore import db
+from src.services import sync, sync_state
+from src.services.inference import BatchPredictor
+from src.services.sync import SyncError, sync_scores
+from tests.fakes import RecordingCache
+from tests.models import RECOMMENDATIONS, StaticRegistry, pyfunc_model
+from tests.oura_frames import oura_rows
+
+pytest.importorskip('xgboost')
+pytest.importorskip('mlflow')
+
+EMAIL = 'a@example.com'
+PREFIX = '/v2/usercollection'
+
+
+@pytest.fixture(scope='module')
+def model(tmp_path_factory):
+    return pyfunc_model(tmp_path_factory.mktemp('model') / 'model')
+
+
+@pytest.fixture
+def oura(oura_server, model, monkeypatch):
+    db.documents.clear()
+    oura_server.page_size = 10
+    monkeypatch.setenv('OURA_API_BASE_URI', oura_server.url + PREFIX)
+    monkeypatch.setattr(sync, 'batch_predictor', BatchPredictor(StaticRegistry(*model), window=0))
+    monkeypatch.setattr(sync, 'display_cache', RecordingCache())
+    return oura_server
+
+
+def serve(server, days):
+    rows = oura_rows(days)
+    for path, endpoint_rows in rows.items():
+        server.serve(f"{PREFIX}/{path}", endpoint_rows)
+    return rows
+
+
+def stored(collection):
+    return [data for path, data in db.documents.items() if path.startswith(f"{collection}/")]
+
+
+def test_syncs_every_collection(oura):
+    rows = serve(oura, 40)
+
+    summary = sync_scores(EMAIL, 'token')
+
+    # Pages of 10 regrouped so no day is split across chunks
+    assert summary['chunks'] == 5
+    assert summary['rows'] == len(rows['sleep'])
+    assert len(stored('display_info')) == len(rows['sleep'])
+    assert len(stored('main_raw')) == len(rows['sleep'])
+    assert len(stored('sleep_raw')) == len(rows['daily_sleep'])
+    assert len(stored('activity_raw')) == len(rows['daily_activity'])
+    assert len(stored('readiness_raw')) == len(rows['daily_readiness'])
+    assert len(stored('sleep_time_raw')) == len(rows['sleep_time'])
+    display = stored('display_info')
+    assert {record['recommendation'] for record in display} <= set(RECOMMENDATIONS)
+    assert {record['model_run_id'] for record in display} == {'run-1'}
+    assert all(record['email'] == EMAIL for record in display)
+    assert sync.display_cache.invalidated == [EMAIL] * summary['chunks']
+
+
+def test_records_the_watermarks(oura):
+    rows = serve(oura, 40)
+    sync_scores(EMAIL, 'token')
+
+    state = sync_state.get_state(EMAIL)
+
+    last_day = max(row['day'] for row in rows['sleep'])
+    assert state['last_day'] == last_day
+    assert state['endpoints']['main'] == last_day
+    assert state['endpoints']['sleep'] == max(row['day'] for row in rows['daily_sleep'])
+    assert state['last_synced_at'] is not None
+    assert 'row_counts' not in state
+
+
+def test_next_sync_starts_after_the_last_day(oura):
+    rows = serve(oura, 20)
+    sync_scores(EMAIL, 'token')
+    oura.requests.clear()
+
+    summary = sync_scores(EMAIL, 'token')
+
+    last_day = max(row['day'] for row in rows['sleep'])
+    start_date = (pd.Timestamp(last_day) + pd.Timedelta(days=1)).strftime('%Y-%m-%d')
+    assert summary['chunks'] == 0
+    assert oura.requests[0]['query']['start_date'] == [start_date]
+    assert oura.count(f"{PREFIX}/daily_sleep") == 0
+
+
+def test_resync_overwrites_instead_of_duplicating(oura):
+    serve(oura, 20)
+    sync_scores(EMAIL, 'token')
+    before = {collection: len(stored(collection)) for collection in ('display_info', 'main_raw', 'activity_raw')}
+
+    sync_state.clear(EMAIL)
+    sync_scores(EMAIL, 'token')
+
+    assert {collection: len(stored(collection)) for collection in before} == before
+
+
+def test_failed_endpoint_leaves_the_watermark(oura):
+    serve(oura, 20)
+    oura.script(f"{PREFIX}/daily_activity", (401, {'detail': 'Unauthorized'}, {}))
+
+    with pytest.raises(SyncError):
+        sync_scores(EMAIL, 'token')
+
+    state = sync_state.get_state(EMAIL)
+    assert state['last_day'] is None
+    assert state['failures'] == 1 and state['last_failed_at'] is not None
+    assert stored('display_info') == []
+
+
+def test_successful_sync_resets_the_failures(oura):
+    serve(oura, 20)
+    oura.script(f"{PREFIX}/daily_activity", (401, {'detail': 'Unauthorized'}, {}))
+    with pytest.raises(SyncError):
+        sync_scores(EMAIL, 'token')
+
+    sync_scores(EMAIL, 'token')
+
+    assert 'failures' not in sync_state.get_state(EMAIL)
+
+
+def test_record_sync_never_moves_back():
+    db.documents.clear()
+    newer = pd.DataFrame({'day': ['2024-01-10']})
+    older = pd.DataFrame({'day': ['2024-01-05']})
+
+    threads = [threading.Thread(target=sync_state.record_sync, args=(EMAIL, frame, {'main': frame}))
+               for frame in (newer, older) * 4]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    state = sync_state.get_state(EMAIL)
+    assert state['last_day'] == '2024-01-10'
+    assert state['endpoints'] == {'main': '2024-01-10'}
@@ -0,0 +1,106 @@
+import time
+from datetime import datetime, timedelta, timezone
+import jwt
+import pytest
+from flask import Flask
+from src import config
+from src.controllers import data_controller
+from src.db.firestore import db
+from src.middlewares import auth
+from src.middlewares.auth import TokenVerifier
+from src.services import sync_state
+
+EMAIL = 'a@example.com'
+SECRET = 'test-secret-of-at-least-thirty-two-bytes'
+
+
+class RecordingQueue:
+    def __init__(self):
+        self.submitted = []
+
+    def submit(self, kind, user, fn, *args):
+        self.submitted.append((kind, user, args))
+        return {'id': 'job-1', 'status': 'queued'}, True
+
+
+@pytest.fixture
+def queue(monkeypatch):
+    db.documents.clear()
+    queue = RecordingQueue()
+    monkeypatch.setattr(data_controller, 'job_queue', queue)
+    monkeypatch.setattr(config, 'DISPLAY_SYNC_INTERVAL', 900)
+    monkeypatch.setattr(config, 'DISPLAY_SYNC_RETRY', 60)
+    monkeypatch.setattr(config, 'DISPLAY_SYNC_MAX_BACKOFF', 600)
+    yield queue
+    db.documents.clear()
+
+
+def ago(seconds):
+    return datetime.now(timezone.utc) - timedelta(seconds=seconds)
+
+
+def set_state(**state):
+    sync_state._document(EMAIL).set(state)
+
+
+def test_never_synced_user_is_scheduled(queue):
+    data_controller._schedule_sync(EMAIL, 'token')
+
+    assert queue.submitted == [('update-scores', EMAIL, (EMAIL, 'token'))]
+
+
+def test_no_oura_token_skips_the_sync(queue):
+    data_controller._schedule_sync(EMAIL, None)
+
+    assert queue.submitted == []
+
+
+def test_recent_sync_is_not_repeated(queue):
+    set_state(last_synced_at=ago(60))
+    data_controller._schedule_sync(EMAIL, 'token')
+    set_state(last_synced_at=ago(1000))
+    data_controller._schedule_sync(EMAIL, 'token')
+
+    assert len(queue.submitted) == 1
+
+
+@pytest.mark.parametrize('failures, failed_ago, due', [
+    (1, 30, False),
+    (1, 90, True),
+    (3, 200, False),
+    (3, 300, True),
+    (10, 500, False),
+    (10, 700, True),
+], ids=['first-waiting', 'first-retried', 'third-waiting', 'third-retried', 'capped-waiting', 'capped-retried'])
+def test_failed_syncs_back_off(queue, failures, failed_ago, due):
+    set_state(last_synced_at=ago(3600), failures=failures, last_failed_at=ago(failed_ago))
+
+    data_controller._schedule_sync(EMAIL, 'token')
+
+    assert bool(queue.submitted) == due
+
+
+def test_record_failure_counts_until_a_sync_succeeds(queue):
+    sync_state.record_failure(EMAIL)
+    sync_state.record_failure(EMAIL)
+    assert sync_state.get_state(EMAIL)['failures'] == 2
+
+    sync_state.touch(EMAIL)
+
+    state = sync_state.get_state(EMAIL)
+    assert state['failures'] == 0
+    # The failure documents have no watermark yet, the next sync still backfills it from what is stored
+    assert sync_state.get_latest_day(EMAIL) == sync_state.DEFAULT_LATEST
+    assert 'last_day' in sync_state.get_state(EMAIL)
+
+
+def test_paged_display_info_schedules_the_sync(queue, monkeypatch):
+    monkeypatch.setattr(auth, 'token_verifier', TokenVerifier(SECRET))
+    app = Flask(__name__)
+    app.register_blueprint(data_controller.data)
+    token = jwt.encode({'email': EMAIL, 'oura_token': 'token', 'exp': int(time.time()) + 3600}, SECRET, algorithm='HS256')
+
+    response = app.test_client().get('/display-info?limit=5', headers={'Authorization': f"Bearer {token}"})
+
+    assert response.status_code == 200
+    assert queue.submitted == [('update-scores', EMAIL, (EMAIL, 'token'))]
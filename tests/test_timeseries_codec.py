@@ -0,0 +1,114 @@
+import base64
+import zlib
+import numpy as np
+import pandas as pd
+import pytest
+from src.services.timeseries_codec import (KIND_FLOAT32, KIND_INT16_DELTA, _header, decode, decode_items,
+                                           decode_record, encode, encode_columns, encode_sample, is_encoded)
+
+
+def round_trip(items):
+    return decode_items(encode(items))
+
+
+def kind(items):
+    return _header(encode(items))[0]
+
+
+@pytest.mark.parametrize('items', [
+    [],
+    [None, None, None],
+    [None, None, 61.0, 58.0, None, 55.0],
+    [61.0, 58.0, None, None],
+    [55, 56, 58, 61, 60],
+    [0.9, 1.1, 3.4, 1.0],
+    [12.25, -3.5, 0.125],
+    [16383, -16383, 0, 16383],
+])
+def test_round_trip(items):
+    assert round_trip(items) == items
+
+
+def test_empty():
+    assert len(decode(encode([]))) == 0
+
+
+def test_all_none():
+    values = decode(encode([None] * 10))
+
+    assert np.isnan(values).all()
+    assert round_trip([None] * 10) == [None] * 10
+
+
+def test_leading_nulls_keep_their_place():
+    items = [None, None, None, 61.0, 60.0]
+
+    assert np.isnan(decode(encode(items))[:3]).all()
+    assert round_trip(items) == items
+
+
+def test_int16_edge():
+    assert kind([16383, -16383]) == KIND_INT16_DELTA
+    assert kind([16384]) == KIND_FLOAT32
+    assert kind([-16384]) == KIND_FLOAT32
+    # 1638.4 needs one decimal, which takes it past the limit
+    assert kind([1638.4]) == KIND_FLOAT32
+    assert round_trip([16384]) == [16384.0]
+
+
+def test_float32_fallback():
+    items = [0.12345, 1.5, None, 2.0625]
+
+    assert kind(items) == KIND_FLOAT32
+    decoded = decode(encode(items))
+    assert np.isnan(decoded[2])
+    np.testing.assert_allclose(decoded[[0, 1, 3]], np.array([0.12345, 1.5, 2.0625], dtype=np.float32))
+
+
+def test_integral_series_decode_to_ints():
+    assert all(isinstance(item, int) for item in round_trip([55, 56, 58]))
+    assert all(isinstance(item, float) for item in round_trip([0.9, 1.1]))
+
+
+def test_legacy_values_pass_through():
+    legacy = base64.b64encode(zlib.compress(str([0.9, 1.1]).encode('utf-8'))).decode('utf-8')
+
+    assert decode_items([61.0, None, 58.0]) == [61.0, None, 58.0]
+    assert decode_items(legacy) == legacy
+    assert decode_items(None) is None
+    assert decode_items(b'not a series') == b'not a series'
+    assert not is_encoded(legacy)
+
+
+def test_rejects_other_versions():
+    blob = bytearray(encode([1, 2, 3]))
+    blob[4] = 99
+
+    with pytest.raises(ValueError):
+        decode(blob)
+
+
+def test_decode_record():
+    record = {'day': '2024-01-01', 'heart_rate': encode([61.0, None]), 'hrv': [40.0]}
+
+    assert decode_record(record, ['heart_rate', 'hrv']) == {'day': '2024-01-01', 'heart_rate': [61, None], 'hrv': [40.0]}
+
+
+def test_encode_sample_leaves_the_original():
+    sample = {'interval': 60.0, 'items': [0.9, 1.1], 'timestamp': '2024-01-01T04:00:00.000-08:00'}
+
+    encoded = encode_sample(sample)
+
+    assert sample['items'] == [0.9, 1.1]
+    assert is_encoded(encoded['items'])
+    assert encode_sample(None) is None
+
+
+def test_encode_columns_copies_the_frame():
+    df = pd.DataFrame({'day': ['2024-01-01', '2024-01-02'], 'heart_rate': [[61.0, 58.0], None]})
+
+    encoded = encode_columns(df, ['heart_rate', 'hrv'])
+
+    assert df['heart_rate'][0] == [61.0, 58.0]
+    assert is_encoded(encoded['heart_rate'][0])
+    assert encoded['heart_rate'][1] is None